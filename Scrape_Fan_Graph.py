@@ -1,134 +1,360 @@
 ﻿import os
+import sys
 import time
+import queue
 import shutil
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+import argparse
+import threading
+from datetime import datetime, timedelta
 from dotenv import load_dotenv, find_dotenv
 
-print("[INFO] Looking for .env file...")
-
-# Load credentials
-load_dotenv(find_dotenv())
-FG_EMAIL = os.getenv("FG_EMAIL")
-FG_PASSWORD = os.getenv("FG_PASSWORD")
-
-if not FG_EMAIL or not FG_PASSWORD:
-    raise ValueError("Missing FG_EMAIL or FG_PASSWORD in .env file")
-
-# Setup download path
-download_dir = os.path.abspath("downloads")
-os.makedirs(download_dir, exist_ok=True)
-
-chrome_options = Options()
-chrome_options.add_experimental_option("prefs", {
-    "download.default_directory": download_dir,
-    "download.prompt_for_download": False,
-    "safebrowsing.enabled": True
-})
-chrome_options.add_argument("--headless=new")
-chrome_options.add_argument("--disable-gpu")
-chrome_options.add_argument("--disable-software-rasterizer")
-chrome_options.add_argument("--disable-webgl")
-chrome_options.add_argument("--disable-3d-apis")
-chrome_options.add_argument("--ignore-certificate-errors")
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
-chrome_options.add_argument("--window-size=1920,1080")
-
-urls = {
-    "team_standard.csv": "https://www.fangraphs.com/leaders/splits-leaderboards?splitArr=&splitArrPitch=&autoPt=true&splitTeams=false&statType=team&statgroup=1&startDate=2025-03-01&endDate=2025-11-01&groupBy=season",
-    "team_advanced.csv": "https://www.fangraphs.com/leaders/splits-leaderboards?splitArr=&splitArrPitch=&autoPt=true&splitTeams=false&statType=team&statgroup=2&startDate=2025-03-01&endDate=2025-11-01&groupBy=season"
-}
-
-driver = None
-try:
-    print("🚀 Launching browser...")
-    driver = webdriver.Chrome(options=chrome_options)
+from team_registry import team_ids
+from replay import save_download_fixture
+from profiling import profiled
+
+DOWNLOAD_DIR = os.path.abspath("downloads")
+ARCHIVE_DIR = os.path.join(DOWNLOAD_DIR, "archive")
+RECORD_DIR = None  # set by --record: accepted exports are also saved as replay.py fixtures
+
+FANGRAPHS_BASE = "https://www.fangraphs.com"
+FANGRAPHS_BLOGS_BASE = "https://blogs.fangraphs.com"
+EXPORTS = {"team_standard.csv": 1, "team_advanced.csv": 2}
+
+
+def set_base_url(base_url=None):
+    """Send the login and every leaderboard page to ``base_url`` (e.g. a replay.py server); None means the live site."""
+    global SPLITS_URL, LOGIN_URL
+    SPLITS_URL = (base_url or FANGRAPHS_BASE).rstrip("/") + (
+        "/leaders/splits-leaderboards?splitArr=&splitArrPitch=&autoPt=true"
+        "&splitTeams=false&statType=team&statgroup={statgroup}&startDate={start}&endDate={end}&groupBy=season"
+    )
+    LOGIN_URL = (base_url or FANGRAPHS_BLOGS_BASE).rstrip("/") + "/wp-login.php"
+
+
+set_base_url(os.getenv("FANGRAPHS_BASE_URL"))
+
+
+def season_window(season):
+    return f"{season}-03-01", f"{season}-11-01"
+
+
+def splits_urls(start_date, end_date):
+    return {
+        filename: SPLITS_URL.format(statgroup=statgroup, start=start_date, end=end_date)
+        for filename, statgroup in EXPORTS.items()
+    }
+
+
+def load_credentials():
+    print("[INFO] Looking for .env file...")
+    load_dotenv(find_dotenv())
+    email = os.getenv("FG_EMAIL")
+    password = os.getenv("FG_PASSWORD")
+
+    if not email or not password:
+        raise ValueError("Missing FG_EMAIL or FG_PASSWORD in .env file")
+    return email, password
+
+
+def make_driver(download_dir):
+    # selenium is imported by the functions that drive the browser, not at module import
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    os.makedirs(download_dir, exist_ok=True)
+
+    chrome_options = Options()
+    chrome_options.add_experimental_option("prefs", {
+        "download.default_directory": download_dir,
+        "download.prompt_for_download": False,
+        "safebrowsing.enabled": True
+    })
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-software-rasterizer")
+    chrome_options.add_argument("--disable-webgl")
+    chrome_options.add_argument("--disable-3d-apis")
+    chrome_options.add_argument("--ignore-certificate-errors")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920,1080")
+
+    return webdriver.Chrome(options=chrome_options)
+
+
+def login(driver, email, password):
+    from selenium.webdriver.common.by import By
 
     print("🔐 Logging into FanGraphs...")
-    driver.get("https://blogs.fangraphs.com/wp-login.php")
+    driver.get(LOGIN_URL)
     time.sleep(3)
 
-    driver.find_element(By.ID, "user_login").send_keys(FG_EMAIL)
-    driver.find_element(By.ID, "user_pass").send_keys(FG_PASSWORD)
+    driver.find_element(By.ID, "user_login").send_keys(email)
+    driver.find_element(By.ID, "user_pass").send_keys(password)
     driver.find_element(By.ID, "wp-submit").click()
     time.sleep(4)
 
-    for filename, url in urls.items():
-        print(f"\n📊 Visiting {filename} page...")
-        driver.get(url)
-        time.sleep(4)
-
-        try:
-            driver.execute_script("""
-                const footer = document.querySelector('[id^="sticky_footer"], .sticky-footer');
-                if (footer) footer.remove();
-            """)
-        except Exception as e:
-            print(f"⚠️ Footer removal error: {e}")
-
-        try:
-            export = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.LINK_TEXT, "Export Data"))
-            )
-            driver.execute_script("arguments[0].scrollIntoView(true);", export)
-            time.sleep(1)
-            driver.execute_script("arguments[0].click();", export)
-            print("💾 Export clicked.")
-        except TimeoutException:
-            print(f"❌ Could not export {filename}")
-            continue
-
-        downloaded = None
-        for _ in range(5):  # check every 3s, for up to 15s
-            time.sleep(3)
-            candidates = [
-                f for f in os.listdir(download_dir)
-                if f.endswith(".csv") and "Leader" in f
-            ]
-            if candidates:
-                candidates.sort(key=lambda x: os.path.getmtime(os.path.join(download_dir, x)), reverse=True)
-                downloaded = os.path.join(download_dir, candidates[0])
-                if time.time() - os.path.getmtime(downloaded) < 60:
+
+def export_csv(driver, url, download_dir, label):
+    """Open a splits leaderboard page, click Export Data and return the downloaded file path."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+
+    print(f"\n📊 Visiting {label} page...")
+    driver.get(url)
+    time.sleep(4)
+
+    try:
+        driver.execute_script("""
+            const footer = document.querySelector('[id^="sticky_footer"], .sticky-footer');
+            if (footer) footer.remove();
+        """)
+    except Exception as e:
+        print(f"⚠️ Footer removal error: {e}")
+
+    try:
+        export = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.LINK_TEXT, "Export Data"))
+        )
+        driver.execute_script("arguments[0].scrollIntoView(true);", export)
+        time.sleep(1)
+        driver.execute_script("arguments[0].click();", export)
+        print("💾 Export clicked.")
+    except TimeoutException:
+        print(f"❌ Could not export {label}")
+        return None
+
+    downloaded = None
+    for _ in range(5):  # check every 3s, for up to 15s
+        time.sleep(3)
+        candidates = [
+            f for f in os.listdir(download_dir)
+            if f.endswith(".csv") and "Leader" in f
+        ]
+        if candidates:
+            candidates.sort(key=lambda x: os.path.getmtime(os.path.join(download_dir, x)), reverse=True)
+            downloaded = os.path.join(download_dir, candidates[0])
+            if time.time() - os.path.getmtime(downloaded) < 60:
+                break
+
+    if not downloaded:
+        print(f"⚠️ No file detected for {label}")
+        return None
+
+    print(f"✅ File downloaded: {os.path.basename(downloaded)}")
+
+    try:
+        validate_export(downloaded)
+    except ValueError as e:
+        print(f"❌ Rejected {label}: {e}")
+        os.remove(downloaded)
+        return None
+
+    if RECORD_DIR:
+        save_download_fixture(RECORD_DIR, url, downloaded)
+    return downloaded
+
+
+def validate_export(path):
+    """Every team code in an export must be in the team registry."""
+    import pandas as pd
+    team_ids(pd.read_csv(path, usecols=["Tm"])["Tm"])
+
+
+def archive_path(filename, date_str):
+    return os.path.join(ARCHIVE_DIR, date_str, filename.replace(".csv", f"_{date_str}.csv"))
+
+
+def is_archived(date_str):
+    return all(os.path.exists(archive_path(filename, date_str)) for filename in EXPORTS)
+
+
+def scrape_current():
+    """Daily mode: season-to-date exports into downloads/ plus today's archive copy.
+
+    Returns the export file names written to downloads/; a failure is printed and skipped.
+    """
+    email, password = load_credentials()
+    today = datetime.now().strftime("%Y-%m-%d")
+    urls = splits_urls(*season_window(datetime.now().year))
+
+    written = []
+    driver = None
+    try:
+        print("🚀 Launching browser...")
+        driver = make_driver(DOWNLOAD_DIR)
+        login(driver, email, password)
+
+        for filename, url in urls.items():
+            downloaded = export_csv(driver, url, DOWNLOAD_DIR, filename)
+            if not downloaded:
+                continue
+
+            final_path = os.path.join(DOWNLOAD_DIR, filename)
+            try:
+                if os.path.exists(final_path):
+                    os.remove(final_path)
+                shutil.move(downloaded, final_path)
+                print(f"📁 Moved to {filename}")
+                written.append(filename)
+            except Exception as e:
+                print(f"❌ Error moving file: {e}")
+                continue
+
+            target = archive_path(filename, today)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            try:
+                shutil.copy2(final_path, target)
+                print(f"📦 Archived copy: {os.path.basename(target)}")
+            except Exception as e:
+                print(f"❌ Archive failed: {e}")
+
+    except Exception as main_err:
+        print(f"🚨 Script error: {main_err}")
+    finally:
+        if driver:
+            driver.quit()
+    return written
+
+
+# === Historical snapshot backfill ===
+
+def snapshot_window(date_str):
+    """Stats window for the archive dated ``date_str``: season start through the day before.
+
+    Matches what the daily run would have exported that morning. Returns None for
+    off-season dates, which have no games to predict.
+    """
+    snap = datetime.strptime(date_str, "%Y-%m-%d")
+    season_start, season_end = season_window(snap.year)
+    end = (snap - timedelta(days=1)).strftime("%Y-%m-%d")
+    if not season_start <= end <= season_end:
+        return None
+    return season_start, end
+
+
+def snapshot_dates(start_date, end_date, boxscore_file=None):
+    """Archive dates to rebuild, optionally restricted to days that appear in the boxscore file."""
+    current = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    game_days = None
+
+    if boxscore_file and os.path.exists(boxscore_file):
+        import pandas as pd
+        game_days = set(pd.read_csv(boxscore_file, usecols=["Game Date"])["Game Date"].astype(str))
+
+    dates = []
+    while current <= end:
+        date_str = current.strftime("%Y-%m-%d")
+        if snapshot_window(date_str) and (game_days is None or date_str in game_days):
+            dates.append(date_str)
+        current += timedelta(days=1)
+    return dates
+
+
+def _backfill_worker(worker_id, jobs, results, email, password):
+    download_dir = os.path.join(DOWNLOAD_DIR, f"_backfill_worker_{worker_id}")
+    driver = None
+    try:
+        driver = make_driver(download_dir)
+        login(driver, email, password)
+
+        while True:
+            try:
+                date_str = jobs.get_nowait()
+            except queue.Empty:
+                break
+
+            start, end = snapshot_window(date_str)
+            ok = True
+            for filename, url in splits_urls(start, end).items():
+                target = archive_path(filename, date_str)
+                if os.path.exists(target):
+                    continue
+
+                downloaded = export_csv(driver, url, download_dir, f"{filename} [{start} → {end}]")
+                if not downloaded:
+                    ok = False
                     break
 
-        if not downloaded:
-            print(f"⚠️ No file detected for {filename}")
-            continue
-
-        print(f"✅ File downloaded: {os.path.basename(downloaded)}")
-
-        final_path = os.path.join(download_dir, filename)
-        try:
-            if os.path.exists(final_path):
-                os.remove(final_path)
-            shutil.move(downloaded, final_path)
-            print(f"📁 Moved to {filename}")
-        except Exception as e:
-            print(f"❌ Error moving file: {e}")
-            continue
-
-        today = datetime.now().strftime("%Y-%m-%d")
-        archive_dir = os.path.join(download_dir, "archive", today)
-        os.makedirs(archive_dir, exist_ok=True)
-        archive_name = filename.replace(".csv", f"_{today}.csv")
-        archive_path = os.path.join(archive_dir, archive_name)
-
-        try:
-            shutil.copy2(final_path, archive_path)
-            print(f"📦 Archived copy: {archive_name}")
-        except Exception as e:
-            print(f"❌ Archive failed: {e}")
-
-except Exception as main_err:
-    print(f"🚨 Script error: {main_err}")
-finally:
-    if driver:
-        driver.quit()
-
-print("\n🏁 Done.")
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(downloaded, target)
+                print(f"📦 [{worker_id}] Archived {os.path.basename(target)}")
+
+            results[date_str] = ok
+    except Exception as e:
+        print(f"🚨 Worker {worker_id} error: {e}")
+    finally:
+        if driver:
+            driver.quit()
+        shutil.rmtree(download_dir, ignore_errors=True)
+
+
+def backfill_snapshots(dates, workers=3):
+    """Export point-in-time splits for every date with a pool of logged-in browsers.
+
+    Dates that already have both archive files are skipped, so an interrupted run
+    resumes where it stopped. Each worker owns its own browser and download folder.
+    """
+    pending = [d for d in dates if not is_archived(d)]
+    print(f"🗂️ {len(dates) - len(pending)} of {len(dates)} snapshots already archived, {len(pending)} to fetch.")
+    if not pending:
+        return {}
+
+    email, password = load_credentials()
+    jobs = queue.Queue()
+    for date_str in pending:
+        jobs.put(date_str)
+
+    results = {}
+    threads = [
+        threading.Thread(target=_backfill_worker, args=(i, jobs, results, email, password), daemon=True)
+        for i in range(max(1, min(workers, len(pending))))
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    failed = sorted(d for d in pending if not results.get(d))
+    print(f"\n✅ Archived {len(pending) - len(failed)} snapshots.")
+    if failed:
+        print(f"⚠️ {len(failed)} snapshots failed (rerun to resume): {', '.join(failed[:10])}{' ...' if len(failed) > 10 else ''}")
+    return results
+
+
+@profiled
+def main(argv=None):
+    global RECORD_DIR
+    parser = argparse.ArgumentParser(description="Export FanGraphs team splits leaderboards.")
+    parser.add_argument("--backfill", action="store_true", help="rebuild dated archive snapshots instead of today's export")
+    parser.add_argument("--start", help="first archive date (YYYY-MM-DD) for --backfill")
+    parser.add_argument("--end", help="last archive date (YYYY-MM-DD) for --backfill, defaults to today")
+    parser.add_argument("--workers", type=int, default=3, help="concurrent browser sessions for --backfill")
+    parser.add_argument("--game-days-only", action="store_true", help="only snapshot dates present in data/mlb_boxscores_full.csv")
+    parser.add_argument("--base-url", help="load FanGraphs pages from here, e.g. a replay.py server (or set FANGRAPHS_BASE_URL)")
+    parser.add_argument("--record", metavar="DIR", help="also save every accepted export as a replay.py fixture in DIR")
+    args = parser.parse_args(argv)
+
+    if args.base_url:
+        set_base_url(args.base_url)
+    RECORD_DIR = args.record
+
+    if args.backfill:
+        if not args.start:
+            parser.error("--backfill requires --start")
+        end_date = args.end or datetime.now().strftime("%Y-%m-%d")
+        boxscores = "data/mlb_boxscores_full.csv" if args.game_days_only else None
+        backfill_snapshots(snapshot_dates(args.start, end_date, boxscores), workers=args.workers)
+    else:
+        missing = sorted(set(EXPORTS) - set(scrape_current()))
+        if missing:
+            # Non-zero exit, so the pipeline and the scheduler don't count the day's stats as fetched
+            sys.exit(f"❌ No fresh export for {', '.join(missing)}")
+
+    print("\n🏁 Done.")
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,56 @@
 ﻿import streamlit as st
 st.set_page_config(layout="wide")  # ✅ MUST BE FIRST
 
+import os
+import numpy as np
 import pandas as pd
-import altair as alt
 from datetime import datetime, timedelta
-from scipy.stats import norm
 
-# === Load data ===
-df = pd.read_csv("data/mlb_predictions_merged.csv")
-df.columns = df.columns.str.strip()
+from run_sim import line_probabilities, distribution_columns
+from publish import DATASETS, manifest_path, read_dataset
 
-if "Runs_1_5" not in df.columns:
-    st.error("❌ 'Runs_1_5' column not found. Run merge_predictions.py first.")
-    st.stop()
+# altair is imported inside the views that draw altair charts, so the first paint doesn't wait on it
 
-df = df.dropna(subset=["Home_Team", "Away_Team"])
-df["Game_Date"] = pd.to_datetime(df["Game_Date"])
-df["Runs_1_5"] = pd.to_numeric(df["Runs_1_5"], errors="coerce")
-df["Actual Runs"] = df["Runs_1_5"].round(1)
+COMPARABLES_FILE = "data/mlb_comparables.npz"
+
+# === View selector (drawn before any data is read)
+view = st.sidebar.radio("📊 Select View", [
+    "Daily Predictions",
+    "Summary & Performance",
+    "Bet Sizing Analysis",
+    "Confidence Accuracy Breakdown",
+    "Fireball Volume Over Time",
+    "Fireball Profit Curve",
+    "Top Daily Picks Leaderboard",
+    "Calendar Heatmap",
+    "Confidence Distribution Histogram"
+])
+
+# === Sampling profile of the view (?profile=LABEL in the URL), written at the end of the run (profiling.py)
+from profiling import SamplingProfiler, write_profile, slug
+if "profiler" in st.session_state:  # a rerun or st.stop() cut the last profiled run short
+    st.session_state.pop("profiler").stop()
+PROFILE_LABEL = st.query_params.get("profile")
+if PROFILE_LABEL:
+    st.session_state["profiler"] = SamplingProfiler().start()
+
+def file_version(path):
+    # Cache key for the loaders below: a rewritten file is a new version
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def data_version(dataset):
+    # The pipeline's working file where it runs; a clone of the repo only has the published partitions
+    working = file_version(DATASETS[dataset][0])
+    if working is not None:
+        return ("working", working)
+    published = file_version(manifest_path(dataset))
+    return None if published is None else ("published", published)
+
+def read_data(dataset, version):
+    return pd.read_csv(DATASETS[dataset][0]) if version[0] == "working" else read_dataset(dataset)
 
 # === Fireball display tier ===
 def fireballs(p):
@@ -27,23 +60,16 @@ def fireballs(p):
     elif p >= 0.60: return "🔥🔥"
     else: return "🔥"
 
-# === Confidence logic ===
-STD_DEV = 1.25
-def get_dynamic_confidence(model_total, target, bet_type):
-    if bet_type.startswith("OVER"):
-        return 1 - norm.cdf(target, loc=model_total, scale=STD_DEV)
-    else:
-        return norm.cdf(target, loc=model_total, scale=STD_DEV)
-
 # === Correctness checkers ===
 def mark_correct_symbol(row):
     try:
         actual = float(row["Actual Runs"])
+        line = float(row["Bet"].split(" ")[-1])
+        if actual == line:
+            return "➖"  # push on a whole-number line
         if row["Bet"].startswith("OVER"):
-            line = float(row["Bet"].split(" ")[-1])
             return "✅" if actual > line else "❌"
         elif row["Bet"].startswith("UNDER"):
-            line = float(row["Bet"].split(" ")[-1])
             return "✅" if actual < line else "❌"
         else:
             return "—"
@@ -59,25 +85,114 @@ def mark_correct_numeric(row):
     else:
         return None
 
-# === Assign core model columns
-target_total = 4.5
-df["Bet"] = df["Model_Total"].apply(lambda x: f"OVER {target_total}" if x > target_total else f"UNDER {target_total}")
-df["Confidence"] = df.apply(lambda row: get_dynamic_confidence(row["Model_Total"], target_total, row["Bet"]), axis=1)
-df["Correct"] = df.apply(mark_correct_numeric, axis=1)
-df["Correct Symbol"] = df.apply(mark_correct_symbol, axis=1)
+# === Per-pick explanations (written by predict_over_4_5.py) ===
+EXPLANATION_KEYS = ["Game_ID", "Game_Date", "Home_Team", "Away_Team", "Bias", "Matchup_ID"]
 
-# === View selector
-view = st.sidebar.radio("📊 Select View", [
-    "Daily Predictions",
-    "Summary & Performance",
-    "Bet Sizing Analysis",
-    "Confidence Accuracy Breakdown",
-    "Fireball Volume Over Time",
-    "Fireball Profit Curve",
-    "Top Daily Picks Leaderboard",
-    "Calendar Heatmap",
-    "Confidence Distribution Histogram"
-])
+def matchup_ids(frame):
+    # ESPN Game_ID keeps doubleheaders apart; rows predicted before it was stored fall back to date + teams
+    legacy_id = frame["Game_Date"].astype(str) + "_" + frame["Home_Team"].str.strip() + "_" + frame["Away_Team"].str.strip()
+    return frame["Game_ID"].astype(str).where(frame["Game_ID"].notna(), legacy_id)
+
+@st.cache_data(show_spinner=False)
+def load_explanations(version):
+    if version is None:
+        return None
+    exp = read_data("explanations", version)
+    exp["Game_Date"] = pd.to_datetime(exp["Game_Date"])
+    exp["Game_ID"] = exp["Game_ID"].astype("Int64")
+    exp["Matchup_ID"] = matchup_ids(exp)
+    return exp.drop_duplicates("Matchup_ID", keep="last").set_index("Matchup_ID", drop=False)
+
+# === Nearest past games in the model's scaled feature space (written by predict_over_4_5.py) ===
+@st.cache_resource(show_spinner=False)
+def load_comparables(version):
+    if version is None:
+        return None
+    from comparables import ComparablesIndex  # scipy's KD-tree, only once a pick is looked up
+    return ComparablesIndex.load(COMPARABLES_FILE)
+
+# === Line pricing from the simulated 1-5 run distributions (written by predict_over_4_5.py) ===
+@st.cache_data(show_spinner=False)
+def load_distributions(version):
+    if version is None:
+        return None
+    dist = read_data("distributions", version)
+    dist["Game_Date"] = pd.to_datetime(dist["Game_Date"])
+    dist["Game_ID"] = dist["Game_ID"].astype("Int64")
+    dist["Matchup_ID"] = matchup_ids(dist)
+    return dist.drop_duplicates("Matchup_ID", keep="last").set_index("Matchup_ID")
+
+DISTRIBUTIONS = load_distributions(data_version("distributions"))
+if DISTRIBUTIONS is None:
+    st.warning("⚠️ No run distributions found. Run predict_over_4_5.py to price lines.")
+
+MODEL_LINE = 4.5  # the line the stored Predicted_Over_4_5 / Confidence were made for
+
+def simulated(frame):
+    """Whether each row of ``frame`` has a simulated run distribution."""
+    if DISTRIBUTIONS is None:
+        return np.zeros(len(frame), dtype=bool)
+    return DISTRIBUTIONS.reindex(frame["Matchup_ID"])[distribution_columns()].notna().all(axis=1).to_numpy()
+
+def price_line(frame, line):
+    """Bet side and win probability at ``line`` for every row of ``frame`` (a push is neither).
+
+    Rows without a simulated distribution fall back to the model's own pick and Confidence at
+    the 4.5 line; at any other line they get no bet ("—") and NaN confidence.
+    """
+    if DISTRIBUTIONS is None:
+        dist = np.full((len(frame), len(distribution_columns())), np.nan)
+    else:
+        dist = DISTRIBUTIONS.reindex(frame["Matchup_ID"])[distribution_columns()].to_numpy(dtype=float)
+    p_over, p_under, _ = line_probabilities(dist, line)
+    over = p_over > p_under
+    confidence = np.where(over, p_over, p_under)
+    if line == MODEL_LINE:
+        fallback = np.isnan(confidence)
+        over = np.where(fallback, frame["Model_Over"].to_numpy(dtype=float) == 1, over)
+        confidence = np.where(fallback, frame["Model_Confidence"].to_numpy(dtype=float), confidence)
+    bet = np.where(np.isnan(confidence), "—", np.where(over, f"OVER {line}", f"UNDER {line}"))
+    return bet, confidence
+
+# === Load data, with the core model columns at the 4.5 line (parsed once per file version, not per rerun)
+@st.cache_data(show_spinner=False)
+def load_predictions(version, dist_version):
+    if version is None:
+        return None
+    df = read_data("predictions", version)
+    df.columns = df.columns.str.strip()
+    if "Runs_1_5" not in df.columns:
+        return None
+
+    df = df.dropna(subset=["Home_Team", "Away_Team"])
+    df["Game_Date"] = pd.to_datetime(df["Game_Date"])
+    if "Game_ID" not in df.columns:
+        df["Game_ID"] = pd.NA
+    df["Game_ID"] = df["Game_ID"].astype("Int64")
+    df["Runs_1_5"] = pd.to_numeric(df["Runs_1_5"], errors="coerce")
+    df["Actual Runs"] = df["Runs_1_5"].round(1)
+
+    df["Matchup_ID"] = matchup_ids(df)
+    df["Model_Over"] = pd.to_numeric(df["Predicted_Over_4_5"], errors="coerce")
+    df["Model_Confidence"] = pd.to_numeric(df["Confidence"], errors="coerce")
+    df["Simulated"] = simulated(df)
+    df["Bet"], df["Confidence"] = price_line(df, MODEL_LINE)
+    df["Correct"] = df.apply(mark_correct_numeric, axis=1)
+    df["Correct Symbol"] = df.apply(mark_correct_symbol, axis=1)
+    unsimulated = (~df["Simulated"]).sum()
+    if unsimulated:
+        print(f"⚠️ {unsimulated} of {len(df)} games have no run distribution: priced from the model's own "
+              f"{MODEL_LINE} confidence, unpriced at other lines")
+    return df
+
+df = load_predictions(data_version("predictions"), data_version("distributions"))
+if df is None:
+    st.error("❌ No merged predictions with 'Runs_1_5' found. Run merge_predictions.py first.")
+    st.stop()
+target_total = 4.5
+if not df["Simulated"].all():
+    st.sidebar.caption(f"⚠️ {(~df['Simulated']).sum()} game(s) have no run distribution: priced from the model's "
+                       f"own {MODEL_LINE} confidence, unpriced (—) at other lines.")
 
 # === Daily Predictions Tab
 if view == "Daily Predictions":
@@ -95,7 +210,6 @@ if view == "Daily Predictions":
 
     daily = df[df["Game_Date"].dt.date == selected_date].copy()
 
-    daily["Matchup_ID"] = daily["Game_Date"].astype(str) + "_" + daily["Home_Team"].str.strip() + "_" + daily["Away_Team"].str.strip()
     daily = daily.sort_values("Confidence", ascending=False)
     daily = daily.drop_duplicates("Matchup_ID")
     season_to_date = df[df["Game_Date"].dt.date <= selected_date].copy()
@@ -105,8 +219,8 @@ if view == "Daily Predictions":
     else:
         daily["Matchup"] = daily["Away_Team"] + " @ " + daily["Home_Team"]
         daily["Model Total"] = daily["Model_Total"].round(2)
-        daily["Bet"] = daily["Model Total"].apply(lambda x: f"OVER {target_total}" if x > target_total else f"UNDER {target_total}")
-        daily["Confidence"] = daily.apply(lambda row: get_dynamic_confidence(row["Model Total"], target_total, row["Bet"]), axis=1)
+        daily["Bet"], daily["Confidence"] = price_line(daily, target_total)
+        daily["Sim Runs"] = DISTRIBUTIONS["Sim_Mean"].reindex(daily["Matchup_ID"]).to_numpy() if DISTRIBUTIONS is not None else np.nan
         daily = daily[daily["Confidence"] >= min_conf].copy()
         daily["Confidence 🔥"] = daily["Confidence"].apply(fireballs)
         daily["Actual Runs"] = daily["Actual Runs"].fillna("—")
@@ -114,10 +228,48 @@ if view == "Daily Predictions":
         daily["Correct"] = daily.apply(mark_correct_numeric, axis=1).astype("boolean")
 
         st.dataframe(
-            daily[["Matchup", "Bet", "Confidence 🔥", "Model Total", "Actual Runs", "Correct Symbol"]],
+            daily[["Matchup", "Bet", "Confidence 🔥", "Model Total", "Sim Runs", "Actual Runs", "Correct Symbol"]],
             use_container_width=True
         )
 
+        explanations = load_explanations(data_version("explanations"))
+        if explanations is not None and not daily.empty:
+            with st.expander("🔍 Why this pick?"):
+                matchups = daily.set_index("Matchup_ID")["Matchup"]
+                choice = st.selectbox("Matchup", matchups.index, format_func=lambda m: matchups[m])
+                if choice in explanations.index:
+                    row = explanations.loc[choice]
+                    # Model_Total is P(Over 4.5) x 6, so contributions are shown on that scale
+                    contrib = row.drop(EXPLANATION_KEYS).astype(float) * 6
+                    top = contrib.reindex(contrib.abs().sort_values(ascending=False).index).head(8)
+                    import altair as alt
+                    st.caption(f"Baseline {row['Bias'] * 6:.2f} + feature contributions = Model Total {row['Bias'] * 6 + contrib.sum():.2f}")
+                    st.altair_chart(
+                        alt.Chart(top.rename("Impact").rename_axis("Feature").reset_index()).mark_bar().encode(
+                            x="Impact",
+                            y=alt.Y("Feature", sort=None),
+                            color=alt.condition("datum.Impact > 0", alt.value("firebrick"), alt.value("steelblue"))
+                        ),
+                        use_container_width=True
+                    )
+                else:
+                    st.info("No explanation stored for this game yet.")
+
+        comparables = load_comparables(file_version(COMPARABLES_FILE))
+        if comparables is not None:
+            with st.expander("🧭 Similar past games"):
+                matchups = daily.set_index("Matchup_ID")["Matchup"]
+                pick = st.selectbox("Pick", matchups.index, format_func=lambda m: matchups[m], key="comparables_pick")
+                k = st.slider("Comparables", 5, 50, 10, 5)
+                similar = comparables.neighbours(pick, k=k)
+                if similar.empty:
+                    st.info("This game isn't in the comparables index yet.")
+                else:
+                    over = (similar["Runs_1_5"] > target_total).mean()
+                    st.caption(f"{len(similar)} nearest of {len(comparables.pool)} settled games: "
+                               f"avg {similar['Runs_1_5'].mean():.2f} runs, {over:.0%} over {target_total}")
+                    st.dataframe(similar, use_container_width=True, hide_index=True)
+
         correct = daily["Correct"].sum()
         total = daily["Correct"].notna().sum()
         if total > 0:
@@ -127,8 +279,7 @@ if view == "Daily Predictions":
 
         # Rolling accuracy
         historical = season_to_date.copy()
-        historical["Bet"] = historical["Model_Total"].apply(lambda x: f"OVER {target_total}" if x > target_total else f"UNDER {target_total}")
-        historical["Confidence"] = historical.apply(lambda row: get_dynamic_confidence(row["Model_Total"], target_total, row["Bet"]), axis=1)
+        historical["Bet"], historical["Confidence"] = price_line(historical, target_total)
         historical = historical[historical["Confidence"] >= min_conf].copy()
         historical["Correct"] = historical.apply(mark_correct_numeric, axis=1).astype("boolean")
 
@@ -146,8 +297,7 @@ if view == "Daily Predictions":
 elif view == "Summary & Performance":
     st.title("📊 Model Performance Summary")
     target_total = 4.5
-    df["Bet"] = df["Model_Total"].apply(lambda x: f"OVER {target_total}" if x > target_total else f"UNDER {target_total}")
-    df["Confidence"] = df.apply(lambda row: get_dynamic_confidence(row["Model_Total"], target_total, row["Bet"]), axis=1)
+    df["Bet"], df["Confidence"] = price_line(df, target_total)
     df["Correct"] = df.apply(lambda row: mark_correct_numeric(row) if pd.notna(row["Actual Runs"]) else None, axis=1)
 
 
@@ -173,8 +323,7 @@ elif view == "Bet Sizing Analysis":
 
     df_filtered = df[(df["Game_Date"] >= pd.to_datetime(start_date)) & (df["Game_Date"] <= pd.to_datetime(end_date))].copy()
     target_total = 4.5
-    df_filtered["Bet"] = df_filtered["Model_Total"].apply(lambda x: f"OVER {target_total}" if x > target_total else f"UNDER {target_total}")
-    df_filtered["Confidence"] = df_filtered.apply(lambda row: get_dynamic_confidence(row["Model_Total"], target_total, row["Bet"]), axis=1)
+    df_filtered["Bet"], df_filtered["Confidence"] = price_line(df_filtered, target_total)
     df_filtered["Correct"] = df_filtered.apply(lambda row: mark_correct_numeric(row) if pd.notna(row["Actual Runs"]) else None, axis=1)
     df_filtered["Fireball_Level"] = (df_filtered["Confidence"] * 100).apply(lambda p: 5 if p >= 90 else 4 if p >= 80 else 3 if p >= 70 else 2 if p >= 60 else 1)
     df_filtered["Fireball 🔥 Tier"] = df_filtered["Fireball_Level"].map({5: "🔥🔥🔥🔥🔥", 4: "🔥🔥🔥🔥", 3: "🔥🔥🔥", 2: "🔥🔥", 1: "🔥"})
@@ -197,6 +346,7 @@ elif view == "Bet Sizing Analysis":
     summary["ROI %"] = (summary["Net_Profit"] / summary["Amount_Staked"] * 100).round(1)
 
     st.dataframe(summary, use_container_width=True)
+    import altair as alt
     st.altair_chart(
         alt.Chart(summary).mark_bar().encode(
             x="Fireball 🔥 Tier",
@@ -215,8 +365,9 @@ elif view == "Bet Sizing Analysis":
 # === Tab 4: Confidence Accuracy Breakdown
 elif view == "Confidence Accuracy Breakdown":
     st.title("📊 Accuracy by Confidence Bucket")
-    df["Confidence_Bucket"] = (df["Confidence"] * 10).astype(int) / 10
-    buckets = df[df["Correct"].notna()].groupby("Confidence_Bucket")["Correct"].agg(["count", "sum"])
+    priced = df[df["Confidence"].notna()].copy()
+    priced["Confidence_Bucket"] = (priced["Confidence"] * 10).astype(int) / 10
+    buckets = priced[priced["Correct"].notna()].groupby("Confidence_Bucket")["Correct"].agg(["count", "sum"])
     buckets["Accuracy %"] = (buckets["sum"] / buckets["count"] * 100).round(1)
     st.bar_chart(buckets["Accuracy %"])
     st.dataframe(buckets.reset_index(), use_container_width=True)
@@ -236,7 +387,7 @@ elif view == "Fireball Profit Curve":
     p_df["Fireball_Level"] = (p_df["Confidence"] * 100).apply(lambda p: 5 if p >= 90 else 4 if p >= 80 else 3 if p >= 70 else 2 if p >= 60 else 1)
     p_df["Bet_Size"] = p_df["Fireball_Level"].map({5: 15, 4: 10, 3: 5, 2: 2.5, 1: 1})
     p_df["Profit"] = p_df.apply(lambda r: r["Bet_Size"] if r["Correct"] else -r["Bet_Size"] * 1.1, axis=1)
-    cum = p_df.groupby(["Game_Date", "Fireball_Level"])["Profit"].sum().groupby(level=1).cumsum().unstack().fillna(method="ffill")
+    cum = p_df.groupby(["Game_Date", "Fireball_Level"])["Profit"].sum().groupby(level=1).cumsum().unstack().ffill()
     st.line_chart(cum)
 
 # === Tab 7: Top Daily Picks Leaderboard
@@ -315,6 +466,7 @@ elif view == "Calendar Heatmap":
         Profit=("Profit", "sum"),
         Volume=("Correct", "count")
     ).reset_index()
+    import altair as alt
     st.altair_chart(alt.Chart(daily).mark_bar().encode(
         x="Game_Date:T", y="Accuracy", color="Accuracy"
     ).properties(title="🎯 Accuracy % by Day"), use_container_width=True)
@@ -327,3 +479,9 @@ elif view == "Confidence Distribution Histogram":
     st.title("🧮 Model Confidence Histogram")
     hist = df[df["Confidence"].notna()]
     st.bar_chart(hist["Confidence"].round(2).value_counts().sort_index())
+
+if PROFILE_LABEL:
+    profiler = st.session_state.pop("profiler").stop()
+    profile_name = f"app.{slug(view)}"
+    write_profile(profiler, PROFILE_LABEL, profile_name, [view])
+    st.sidebar.caption(f"🔬 {view}: {profiler.wall:.2f} s sampled -> logs/profiles/{PROFILE_LABEL}/{profile_name}.*")
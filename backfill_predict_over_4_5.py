@@ -1,134 +1,147 @@
 ﻿import os 
+import glob
+import argparse
+import numpy as np
 import pandas as pd
-import joblib
 from datetime import datetime, timedelta
 
-# === Load model & scaler ===
-model = joblib.load("models/rf_model_over_4_5.joblib")
-scaler = joblib.load("models/scaler_over_4_5.joblib")
-
-# === Load game data ===
-games = pd.read_csv("data/mlb_boxscores_full.csv")
-games.columns = games.columns.str.strip().str.replace(" ", "_")
-games["Game_Date"] = pd.to_datetime(games["Game_Date"])
-
-# === Map full team names to 3-letter codes
-TEAM_NAME_MAP = {
-    "Athletics": "OAK", "Atlanta Braves": "ATL", "Baltimore Orioles": "BAL", "Boston Red Sox": "BOS",
-    "Chicago Cubs": "CHC", "Chicago White Sox": "CHW", "Cincinnati Reds": "CIN", "Cleveland Guardians": "CLE",
-    "Colorado Rockies": "COL", "Detroit Tigers": "DET", "Houston Astros": "HOU", "Kansas City Royals": "KCR",
-    "Los Angeles Angels": "LAA", "Los Angeles Dodgers": "LAD", "Miami Marlins": "MIA", "Milwaukee Brewers": "MIL",
-    "Minnesota Twins": "MIN", "New York Mets": "NYM", "New York Yankees": "NYY", "Oakland Athletics": "OAK",
-    "Philadelphia Phillies": "PHI", "Pittsburgh Pirates": "PIT", "San Diego Padres": "SDP", "San Francisco Giants": "SFG",
-    "Seattle Mariners": "SEA", "St. Louis Cardinals": "STL", "Tampa Bay Rays": "TBR", "Texas Rangers": "TEX",
-    "Toronto Blue Jays": "TOR", "Washington Nationals": "WSN"
-}
-games["Home_Team"] = games["Home_Team"].map(TEAM_NAME_MAP)
-games["Away_Team"] = games["Away_Team"].map(TEAM_NAME_MAP)
-
-# === Identify pending
-innings_cols = [col for col in games.columns if any(x in col for x in ["1th", "2th", "3th", "4th", "5th"])]
-games["is_pending"] = games[innings_cols].apply(lambda row: row.astype(str).str.contains("Pending", case=False).any(), axis=1)
-
-# === Completed games only
-games["Runs_1_5"] = games[innings_cols].apply(pd.to_numeric, errors="coerce").sum(axis=1)
-played_games = games[~games["is_pending"]].copy()
-played_games["Actual_Over_4_5"] = (played_games["Runs_1_5"] > 4.5).astype(int)
-
-# === Build 7-game rolling averages
-home = played_games[["Game_Date", "Home_Team", "Runs_1_5"]].rename(columns={"Home_Team": "Team"})
-away = played_games[["Game_Date", "Away_Team", "Runs_1_5"]].rename(columns={"Away_Team": "Team"})
-history = pd.concat([home, away]).dropna().sort_values(["Team", "Game_Date"])
-history["Form_7"] = history.groupby("Team")["Runs_1_5"].transform(lambda x: x.shift().rolling(7, min_periods=1).mean())
-
-# === Run predictions
-rows = []
-
-import glob
-
-# === Run predictions
-rows = []
-
-for _, row in played_games.iterrows():
-    game_date = row["Game_Date"].date()
-    archive_found = False
-
-    for offset in range(1, 4):
-        prior_date = (game_date - timedelta(days=offset)).strftime("%Y-%m-%d")
-        archive_dir = f"downloads/archive/{prior_date}/"
-
-        std_files = glob.glob(os.path.join(archive_dir, "team_standard*.csv"))
-        adv_files = glob.glob(os.path.join(archive_dir, "team_advanced*.csv"))
-
-        if std_files and adv_files:
-            std_path = std_files[0]
-            adv_path = adv_files[0]
-            print(f"✅ Found archive for {prior_date}")
-            archive_found = True
-            break
-        else:
-            print(f"⛔ Missing archive files in: {archive_dir}")
-
-    if not archive_found:
-        continue
-
-    try:
-        standard = pd.read_csv(std_path)
-        advanced = pd.read_csv(adv_path)
-    except Exception as e:
-        print(f"⚠️ Failed to read stats for {prior_date}: {e}")
-        continue
-
-
-    stats = pd.merge(standard, advanced, on="Tm", suffixes=("_std", "_adv")).rename(columns={"Tm": "Team"})
-    home_team = row["Home_Team"]
-    away_team = row["Away_Team"]
-
-    try:
-        home_stats = stats[stats["Team"] == home_team].iloc[0]
-        away_stats = stats[stats["Team"] == away_team].iloc[0]
-    except IndexError:
-        continue
-
-    # Recent form
-    home_form = history[(history["Team"] == home_team) & (history["Game_Date"] < row["Game_Date"])]["Form_7"].max()
-    away_form = history[(history["Team"] == away_team) & (history["Game_Date"] < row["Game_Date"])]["Form_7"].max()
-
-    def extract_features(team_row):
-        return [v for k, v in team_row.items() if any(stat in k for stat in [
-            "BB%", "K%", "ISO", "wRC+", "OBP", "SLG", "RBI", "AVG", "OPS"
-        ])]
-
-    features = extract_features(home_stats) + extract_features(away_stats)
-    features += [home_form or 0, away_form or 0]
-
-    try:
-        X_scaled = scaler.transform([features])
-    except Exception:
-        continue
-
-    pred = model.predict(X_scaled)[0]
-    conf = model.predict_proba(X_scaled)[0][pred]
-    total = model.predict_proba(X_scaled)[0][1] * 6
-
-    rows.append({
-        "Game_Date": row["Game_Date"],
-        "Home_Team": home_team,
-        "Away_Team": away_team,
-        "Predicted_Over_4_5": pred,
-        "Confidence": round(conf, 4),
-        "Model_Total": round(total, 2),
-        "Actual_Over_4_5": row["Actual_Over_4_5"],
-        "Runs_1_5": round(row["Runs_1_5"], 1)
-    })
-
-# === Save results
-df = pd.DataFrame(rows)
-df.to_csv("data/mlb_backfilled_predictions.csv", index=False)
-
-if not df.empty:
-    acc = (df["Predicted_Over_4_5"] == df["Actual_Over_4_5"]).mean()
-    print(f"✅ Saved {len(df)} predictions to mlb_backfilled_predictions.csv")
-    print(f"🎯 Accuracy: {acc:.2%}")
-else:
-    print("⚠️ No predictions made (missing archive data?)")
+from features import load_games, load_team_stats, stat_columns, rolling_form, FORM_COLUMNS, GAME_COLUMNS
+from team_registry import team_codes, team_table
+from predict_over_4_5 import load_model
+from ratings import pregame_ratings, RATINGS_STATE_FILE
+from pitchers import PitcherLog, starter_features
+from scope import Scope, add_scope_arguments, upsert_csv
+from profiling import profiled
+
+@profiled
+def main(argv=None):
+    """Re-predict the played games in scope (every one by default) with the team stats archived
+    before each -> data/mlb_backfilled_predictions.csv, upserting only their rows."""
+    parser = argparse.ArgumentParser(description="Re-predict played games with the team stats archived before them.")
+    add_scope_arguments(parser)
+    scope = Scope.from_args(parser.parse_args(argv))
+
+    # === Load model & scaler ===
+    model, scaler = load_model()
+
+    # === Load game data (team IDs come from the shared registry) ===
+    games = load_games("data/mlb_boxscores_full.csv", GAME_COLUMNS)
+    games["Home_Team"] = team_codes(games["Home_Team_ID"])
+    games["Away_Team"] = team_codes(games["Away_Team_ID"])
+
+    # === Identify pending
+    innings_cols = [col for col in games.columns if any(x in col for x in ["1th", "2th", "3th", "4th", "5th"])]
+    games["is_pending"] = games[innings_cols].apply(lambda row: row.astype(str).str.contains("Pending", case=False).any(), axis=1)
+
+    # === Opponent-adjusted ratings before each game, walked over the whole store as in predict
+    side_totals = [games[[f"{side}_{i}th" for i in range(1, 6)]].apply(pd.to_numeric, errors="coerce").sum(axis=1, min_count=5)
+                   for side in ["Home", "Away"]]
+    ratings = pregame_ratings(
+        games["Game_Date"], games["Home_Team_ID"], games["Away_Team_ID"], *side_totals, state_file=RATINGS_STATE_FILE
+    )
+
+    # === Both starters' pre-game lines from the pitcher log
+    starters = starter_features(PitcherLog.load(), games["Game_Date"], games["Home_SP_ID"], games["Away_SP_ID"])
+
+    # === Completed games only
+    games["Runs_1_5"] = games[innings_cols].apply(pd.to_numeric, errors="coerce").sum(axis=1)
+    played_games = games[~games["is_pending"]].reset_index(drop=True)
+    played_games["Actual_Over_4_5"] = (played_games["Runs_1_5"] > 4.5).astype(int)
+
+    # === Pre-game rolling form for each side of each played game (each team's own 1-5 runs, as in training)
+    side_runs = {
+        side: played_games[[f"{side}_{i}th" for i in range(1, 6)]].apply(pd.to_numeric, errors="coerce").sum(axis=1, min_count=5)
+        for side in ["Home", "Away"]
+    }
+    form = rolling_form(
+        played_games["Game_Date"], played_games["Home_Team_ID"], played_games["Away_Team_ID"], side_runs["Home"], side_runs["Away"]
+    )
+    form["Home_Last7_Runs_1_5"] = form["Home_Form_Scored_L7"]
+    form["Away_Last7_Runs_1_5"] = form["Away_Form_Scored_L7"]
+    played_mask = ~games["is_pending"].to_numpy()
+    form = pd.concat([form, ratings[played_mask].reset_index(drop=True), starters[played_mask].reset_index(drop=True)], axis=1)
+
+    # Team stats come first in the scaler's column order; the form columns it was fitted on follow
+    model_features = list(getattr(scaler, "feature_names_in_", FORM_COLUMNS))
+    form_values = form[[c for c in model_features if not c.startswith(("home_", "away_"))]].fillna(0).to_numpy()
+
+    # === Team stat tables per archive date, indexed by team ID
+    stat_tables = {}
+
+    def load_archive_table(prior_date):
+        if prior_date not in stat_tables:
+            archive_dir = f"downloads/archive/{prior_date}/"
+            std_files = glob.glob(os.path.join(archive_dir, "team_standard*.csv"))
+            adv_files = glob.glob(os.path.join(archive_dir, "team_advanced*.csv"))
+
+            table = None
+            if std_files and adv_files:
+                try:
+                    stats = load_team_stats(std_files[0], adv_files[0])
+                    table = team_table(stats, "Team", stat_columns(stats))
+                except Exception as e:
+                    print(f"⚠️ Failed to read stats for {prior_date}: {e}")
+            else:
+                print(f"⛔ Missing archive files in: {archive_dir}")
+            stat_tables[prior_date] = table
+        return stat_tables[prior_date]
+
+    # === Run predictions (the form above saw every played game; only those in scope are re-predicted)
+    rows = []
+    in_scope = played_games[scope.mask(played_games["Game_Date"], played_games["Game_ID"])]
+
+    for i, row in in_scope.iterrows():
+        game_date = row["Game_Date"].date()
+        table = None
+
+        for offset in range(1, 4):
+            prior_date = (game_date - timedelta(days=offset)).strftime("%Y-%m-%d")
+            table = load_archive_table(prior_date)
+            if table is not None:
+                break
+
+        if table is None:
+            continue
+
+        home_stats = table[row["Home_Team_ID"]]
+        away_stats = table[row["Away_Team_ID"]]
+        if np.isnan(home_stats).all() or np.isnan(away_stats).all():
+            continue
+
+        features = list(home_stats) + list(away_stats) + list(form_values[i])
+
+        try:
+            X_scaled = scaler.transform([features])
+        except Exception:
+            continue
+
+        pred = model.predict(X_scaled)[0]
+        conf = model.predict_proba(X_scaled)[0][pred]
+        total = model.predict_proba(X_scaled)[0][1] * 6
+
+        rows.append({
+            "Game_ID": row["Game_ID"],
+            "Game_Date": row["Game_Date"],
+            "Home_Team": row["Home_Team"],
+            "Away_Team": row["Away_Team"],
+            "Predicted_Over_4_5": pred,
+            "Confidence": round(conf, 4),
+            "Model_Total": round(total, 2),
+            "Actual_Over_4_5": row["Actual_Over_4_5"],
+            "Runs_1_5": round(row["Runs_1_5"], 1)
+        })
+
+    # === Save results
+    df = pd.DataFrame(rows)
+    upsert_csv("data/mlb_backfilled_predictions.csv", df, scope, "Game_Date", "Game_ID")
+
+    if not df.empty:
+        acc = (df["Predicted_Over_4_5"] == df["Actual_Over_4_5"]).mean()
+        print(f"✅ Saved {len(df)} predictions to mlb_backfilled_predictions.csv ({scope})")
+        print(f"🎯 Accuracy: {acc:.2%}")
+    else:
+        print("⚠️ No predictions made (missing archive data?)")
+
+
+if __name__ == "__main__":
+    main()
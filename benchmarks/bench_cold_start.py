@@ -0,0 +1,123 @@
+"""Cold-start budget for every pipeline stage and the dashboard.
+
+Each measurement runs in a fresh interpreter:
+
+  * import time of every stage / helper module, and which heavy libraries (sklearn,
+    scipy, altair, selenium) the import dragged in - importing a stage must not run it;
+  * the dashboard's first render (app.py under Streamlit's AppTest, data files read
+    cold), a rerun of the default view (loaders served from cache) and a switch to
+    every other view.
+
+Anything over its budget is flagged; --strict turns that into a non-zero exit.
+
+    python benchmarks/bench_cold_start.py
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+HEAVY = ["sklearn", "scipy", "altair", "selenium", "joblib"]
+
+MODULES = [
+    "team_registry", "features", "run_sim", "replay", "get_scores_full", "Scrape_Fan_Graph",
+    "predict_over_4_5", "merge_predictions", "train_model", "backfill_predict_over_4_5",
+    "serve_picks", "run_pipeline_and_push", "scheduler", "ratings", "comparables", "publish", "pitchers", "drift",
+    "scope", "profiling",
+]
+
+# milliseconds, on top of the bare interpreter
+BUDGETS = {
+    "import": 1500,
+    "first_render": 4000,
+    "rerun": 1500,
+    "view": 2500,
+}
+
+IMPORT_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"ms": (time.perf_counter() - start) * 1000, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+RENDER_PROBE = """
+import json, time
+from streamlit.testing.v1 import AppTest
+
+VIEWS = {views!r}
+at = AppTest.from_file("app.py", default_timeout=300)
+start = time.perf_counter()
+at.run()
+out = {{"first_render": (time.perf_counter() - start) * 1000, "exception": bool(at.exception)}}
+start = time.perf_counter()
+at.run()
+out["rerun"] = (time.perf_counter() - start) * 1000
+out["views"] = {{}}
+for view in VIEWS:
+    start = time.perf_counter()
+    at.sidebar.radio[0].set_value(view).run()
+    out["views"][view] = [(time.perf_counter() - start) * 1000, bool(at.exception)]
+print("@@" + json.dumps(out))
+"""
+
+VIEWS = [
+    "Summary & Performance", "Bet Sizing Analysis", "Confidence Accuracy Breakdown", "Fireball Volume Over Time",
+    "Fireball Profit Curve", "Top Daily Picks Leaderboard", "Calendar Heatmap", "Confidence Distribution Histogram",
+]
+
+
+def probe(code):
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return result.stdout
+
+
+def best_import(module, repeats):
+    runs = [json.loads(probe(IMPORT_PROBE.format(module=module, heavy=HEAVY)).strip().splitlines()[-1]) for _ in range(repeats)]
+    return min(r["ms"] for r in runs), runs[0]["heavy"]
+
+
+def flag(ms, budget):
+    return "✅" if ms <= budget else "❌"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--skip-app", action="store_true", help="only time the module imports")
+    parser.add_argument("--strict", action="store_true", help="exit 1 when anything is over budget or a view raises")
+    args = parser.parse_args()
+
+    over = 0
+    print(f"{'module':<28} {'import ms':>10}  heavy libraries loaded")
+    for module in MODULES:
+        try:
+            ms, heavy = best_import(module, args.repeats)
+        except RuntimeError as e:
+            print(f"{module:<28} {'-':>10}  not importable here: {e}")
+            continue
+        over += ms > BUDGETS["import"]
+        print(f"{module:<28} {ms:10.0f}  {flag(ms, BUDGETS['import'])} {', '.join(heavy) or '-'}")
+
+    if not args.skip_app:
+        out = probe(RENDER_PROBE.format(views=VIEWS))
+        render = json.loads(out[out.index("@@") + 2:].strip())
+        print(f"\n{'app.py':<34} {'ms':>8}  budget")
+        for label, key in [("first render (cold)", "first_render"), ("rerun, default view", "rerun")]:
+            over += render[key] > BUDGETS[key]
+            print(f"{label:<34} {render[key]:8.0f}  {flag(render[key], BUDGETS[key])} {BUDGETS[key]}")
+        for view, (ms, failed) in render["views"].items():
+            if failed:  # a view that raised rendered nothing worth timing
+                over += 1
+                print(f"{view:<34} {'-':>8}  ❌ view raised")
+                continue
+            over += ms > BUDGETS["view"]
+            print(f"{view:<34} {ms:8.0f}  {flag(ms, BUDGETS['view'])} {BUDGETS['view']}")
+
+    print(f"\n{over} measurement(s) over budget or failed")
+    if args.strict and over:
+        sys.exit(1)
@@ -0,0 +1,81 @@
+"""Per-pick latency of comparables.ComparablesIndex against scanning the history.
+
+Draws synthetic scaled feature vectors for histories of several sizes (22 columns, as
+the production scaler, and 58 with the rolling form), then times, per pick:
+
+  * a pandas scan of every historical row (the lookup the index replaces),
+  * a NumPy brute-force distance pass,
+  * the KD-tree query (with the same "settled before the pick" filter the app uses),
+
+checking that all three return the same neighbours.
+
+    python benchmarks/bench_comparables.py
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from comparables import ComparablesIndex
+
+
+def synthetic_history(n_games, n_features, seed=42):
+    """Scaled vectors for ``n_games`` games, 15 a day; the last day is today's unplayed slate."""
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n_games, n_features)).astype(np.float32)
+    dates = np.datetime64("2015-04-01") + (np.arange(n_games) // 15).astype("timedelta64[D]")
+    runs = rng.poisson(4.5, n_games).astype(float)
+    runs[-15:] = np.nan  # today's slate
+    ids = np.arange(n_games).astype(str)
+    teams = np.full(n_games, "NYY")
+    return X, ids, dates, teams, teams, runs
+
+
+def pandas_scan(history, x, k):
+    settled = history[history["Runs_1_5"].notna()]
+    dist = ((settled[history.columns[:-1]] - x) ** 2).sum(axis=1) ** 0.5
+    return dist.nsmallest(k).index.to_numpy()
+
+
+def numpy_scan(index, x, k):
+    d = np.sqrt(((index.X[index.pool] - x) ** 2).sum(axis=1))
+    return index.pool[np.argsort(d, kind="stable")[:k]]
+
+
+def best_of(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="2430,24300,243000", help="comma-separated history sizes (games)")
+    parser.add_argument("--features", default="22,58", help="comma-separated feature counts")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--picks", type=int, default=15)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'games':>8} {'features':>8} {'build ms':>9} {'pandas ms/pick':>15} {'numpy ms/pick':>14} {'kd-tree ms/pick':>16}  same")
+    for n_features in [int(f) for f in args.features.split(",")]:
+        for n_games in [int(s) for s in args.sizes.split(",")]:
+            arrays = synthetic_history(n_games, n_features)
+            build_s, index = best_of(lambda: ComparablesIndex(*arrays), args.repeats)
+            history = pd.DataFrame(index.X, columns=[f"f{i}" for i in range(n_features)]).assign(Runs_1_5=index.runs)
+            picks = np.arange(n_games - args.picks, n_games)  # today's slate: every settled game is earlier
+
+            pandas_s, pandas_rows = best_of(lambda: [pandas_scan(history, index.X[p], args.k) for p in picks], 1)
+            numpy_s, numpy_rows = best_of(lambda: [numpy_scan(index, index.X[p], args.k) for p in picks], args.repeats)
+            tree_s, tree_rows = best_of(lambda: [index.query(index.X[p], k=args.k, before=index.dates[p])[0] for p in picks], args.repeats)
+
+            same = all(set(a) == set(b) == set(c) for a, b, c in zip(pandas_rows, numpy_rows, tree_rows))
+            print(f"{n_games:>8} {n_features:>8} {build_s * 1000:>9.1f} {pandas_s / len(picks) * 1000:>15.2f} "
+                  f"{numpy_s / len(picks) * 1000:>14.2f} {tree_s / len(picks) * 1000:>16.3f}  {same}")
@@ -0,0 +1,99 @@
+"""Daily cost of drift.DriftMonitor against recomputing the live statistics from scratch.
+
+Draws synthetic feature rows (15 games a day, 22 or 90 features) for histories of several
+seasons since training, then times
+
+  * the training snapshot (deciles, moments and histograms of the training matrix),
+  * one day's update: load the state, fold the day's settled rows in, save it,
+  * the pandas recompute it replaces: mean, variance and binned counts over every row
+    since training, redone each day,
+
+checking that the streamed mean / variance / histogram equal the recomputed ones.
+
+    python benchmarks/bench_drift.py
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from drift import DriftMonitor, save_snapshot
+
+GAMES_PER_DAY = 15
+DAYS_PER_SEASON = 180
+
+
+def synthetic_rows(n_days, n_features, start, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((n_days * GAMES_PER_DAY, n_features))
+    dates = pd.Timestamp(start) + pd.to_timedelta(np.repeat(np.arange(n_days), GAMES_PER_DAY), unit="D")
+    return pd.DataFrame(X, columns=[f"f{i}" for i in range(n_features)]), pd.Series(dates)
+
+
+def pandas_recompute(live, edges):
+    """Every statistic over the full live history, as a daily job without saved state would."""
+    counts = np.zeros((live.shape[1], edges.shape[1] + 1), dtype=np.int64)
+    for j, (col, row) in enumerate(zip(live.columns, edges)):
+        bins = pd.cut(live[col], np.concatenate([[-np.inf], row[np.isfinite(row)], [np.inf]]), right=False, labels=False)
+        counts[j, :np.isfinite(row).sum() + 1] = bins.value_counts().reindex(range(np.isfinite(row).sum() + 1), fill_value=0)
+    return live.mean().to_numpy(), live.var(ddof=0).to_numpy(), counts
+
+
+def best_of(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seasons", default="0.25,1,5", help="comma-separated live history lengths (seasons since training)")
+    parser.add_argument("--features", default="22,90", help="comma-separated feature counts")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="bench_drift_")
+    snapshot_path = os.path.join(scratch, "snapshot.npz")
+    state_path = os.path.join(scratch, "state.npz")
+    try:
+        print(f"{'features':>8} {'seasons':>7} {'live rows':>9} {'snapshot ms':>11} {'daily update ms':>15} {'recompute ms':>12}  same")
+        for n_features in [int(f) for f in args.features.split(",")]:
+            train, train_dates = synthetic_rows(DAYS_PER_SEASON, n_features, "2019-04-01", seed=1)
+            snapshot_s, _ = best_of(lambda: save_snapshot(train, train_dates, snapshot_path), args.repeats)
+
+            for seasons in [float(s) for s in args.seasons.split(",")]:
+                n_days = max(int(seasons * DAYS_PER_SEASON), 2)
+                live, live_dates = synthetic_rows(n_days, n_features, "2020-04-01", seed=2)
+                pending = np.zeros(len(live), dtype=bool)
+
+                # Every day but the last already folded, as a season of daily runs would leave it
+                if os.path.exists(state_path):
+                    os.remove(state_path)
+                monitor = DriftMonitor.load(snapshot_path, state_path)
+                last = live_dates == live_dates.max()
+                monitor.update(live[~last], live_dates[~last], pending[~last])
+                monitor.save(state_path)
+
+                def daily():
+                    m = DriftMonitor.load(snapshot_path, state_path)
+                    m.update(live, live_dates, pending)
+                    m.save(os.path.join(scratch, "state_out.npz"))
+                    return m
+
+                update_s, streamed = best_of(daily, args.repeats)
+                recompute_s, (mean, var, counts) = best_of(lambda: pandas_recompute(live, streamed.train.edges), args.repeats)
+                same = (streamed.live.n == len(live) and np.allclose(streamed.live.mean, mean)
+                        and np.allclose(streamed.live.var, var) and np.array_equal(streamed.live.counts, counts))
+                print(f"{n_features:>8} {seasons:>7} {len(live):>9} {snapshot_s * 1000:>11.1f} {update_s * 1000:>15.2f} "
+                      f"{recompute_s * 1000:>12.1f}  {same}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
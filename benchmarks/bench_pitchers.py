@@ -0,0 +1,116 @@
+"""Timing for pitchers.PitcherLog starter lookups on synthetic multi-season game logs.
+
+Builds seasons of 15-game days where every team runs a five-man rotation and a bullpen
+(four pitching lines per side), then times
+
+  * building the index (sort + cumulative sums) from the log,
+  * one slate's starter features (15 games, both sides) - one vectorized lookup,
+  * every game's starter features at once, as train_model.py builds them,
+  * the per-pitcher pandas filter-and-tail scan the index replaces (slate only),
+  * one day's upsert into the saved log,
+
+and checks the ERA over the last 3 starts against the pandas scan.
+
+    python benchmarks/bench_pitchers.py --seasons 1,5,10
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from pitchers import PitcherLog, starter_features, save_pitching, innings_to_outs, LOG_COLUMNS
+from team_registry import N_TEAMS
+
+GAMES_PER_DAY = 15
+DAYS_PER_SEASON = 162
+STAFF = 13  # five starters, eight relievers
+
+
+def synthetic_log(n_seasons, seed=42):
+    """(games, log): one row per game with both starters' IDs, and four pitching lines per side."""
+    rng = np.random.default_rng(seed)
+    n_days = n_seasons * DAYS_PER_SEASON
+    days = pd.Timestamp("2015-04-01") + pd.to_timedelta(
+        np.arange(n_days) % DAYS_PER_SEASON + 365 * (np.arange(n_days) // DAYS_PER_SEASON), unit="D")
+    pairs = np.argsort(rng.random((n_days, N_TEAMS)), axis=1).reshape(n_days, GAMES_PER_DAY, 2)
+    starts_made = np.zeros(N_TEAMS, dtype=np.int64)
+
+    games, lines = [], []
+    for d, day in enumerate(days):
+        for g in range(GAMES_PER_DAY):
+            game_id = 400_000_000 + d * GAMES_PER_DAY + g
+            starters = {}
+            for side, team in zip(["Home", "Away"], pairs[d, g]):
+                staff = 10_000 + STAFF * team + np.arange(STAFF)
+                starter = staff[starts_made[team] % 5]
+                starts_made[team] += 1
+                starters[side] = starter
+                outs = [int(rng.integers(9, 22))]
+                outs += list(np.diff(np.sort(rng.choice(np.arange(1, 27 - outs[0]), 2, replace=False)), prepend=0, append=27 - outs[0]))
+                for k, (pitcher, o) in enumerate(zip([starter] + list(rng.choice(staff[5:], 3, replace=False)), outs)):
+                    h, er, bb, so = rng.poisson([o / 3, o / 10, o / 9, o / 3])
+                    lines.append([game_id, day.strftime("%Y-%m-%d"), side, team, pitcher, f"P{pitcher}", int(k == 0),
+                                  f"{o // 3}.{o % 3}", np.nan, h, er, er, bb, so, 0, o * 5])
+            games.append((game_id, day, starters["Home"], starters["Away"]))
+    log = pd.DataFrame(lines, columns=LOG_COLUMNS)
+    log["Outs"] = innings_to_outs(log["IP"])
+    return pd.DataFrame(games, columns=["Game_ID", "Game_Date", "Home_SP_ID", "Away_SP_ID"]), log
+
+
+def pandas_scan(log, pitcher_ids, dates, window=3):
+    """Reference: filter each pitcher's earlier starts and take the last ``window``."""
+    starts = log[log["Starter"] == 1].assign(Game_Date=lambda f: pd.to_datetime(f["Game Date"]))
+    era = []
+    for pitcher, day in zip(pitcher_ids, dates):
+        recent = starts[(starts["Pitcher ID"] == pitcher) & (starts["Game_Date"] < day)].sort_values("Game_Date").tail(window)
+        outs = recent["Outs"].sum()
+        era.append(27 * recent["ER"].sum() / outs if outs > 0 else np.nan)
+    return np.array(era)
+
+
+def best_of(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seasons", default="1,5,10", help="comma-separated history lengths (seasons)")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="bench_pitchers_")
+    try:
+        print(f"{'seasons':>7} {'lines':>8} {'build ms':>9} {'slate ms':>9} {'history ms':>11} "
+              f"{'pandas slate ms':>16} {'upsert ms':>10}  ERA_L3 matches")
+        for n_seasons in [int(s) for s in args.seasons.split(",")]:
+            games, log = synthetic_log(n_seasons)
+            build_s, index = best_of(lambda: PitcherLog(log), args.repeats)
+
+            slate = games.tail(GAMES_PER_DAY)
+            slate_s, features = best_of(lambda: starter_features(index, slate["Game_Date"], slate["Home_SP_ID"], slate["Away_SP_ID"]), args.repeats)
+            history_s, _ = best_of(lambda: starter_features(index, games["Game_Date"], games["Home_SP_ID"], games["Away_SP_ID"]), args.repeats)
+            pandas_s, reference = best_of(lambda: pandas_scan(log, slate["Home_SP_ID"], slate["Game_Date"]), 1)
+            matches = np.allclose(features["Home_SP_ERA_L3"].to_numpy(), reference, equal_nan=True)
+
+            # Daily scrape: yesterday's log on disk, one day's lines upserted
+            path = os.path.join(scratch, f"log_{n_seasons}.csv")
+            last_day = log["Game Date"] == log["Game Date"].max()
+            log[~last_day].to_csv(path, index=False)
+            day_lines = log[last_day].to_dict("records")
+            upsert_s, _ = best_of(lambda: save_pitching(day_lines, path), 1)
+
+            print(f"{n_seasons:>7} {len(log):>8} {build_s * 1000:>9.1f} {slate_s * 1000:>9.2f} {history_s * 1000:>11.1f} "
+                  f"{pandas_s * 1000:>16.1f} {upsert_s * 1000:>10.1f}  {matches}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
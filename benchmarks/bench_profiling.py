@@ -0,0 +1,85 @@
+"""Overhead of profiling.SamplingProfiler on workloads shaped like the pipeline's hot paths.
+
+Times each workload bare and under the sampler at several intervals:
+
+  * a pure-Python loop (row-wise ``apply``-style code),
+  * many small numpy calls (the run simulator's per-inning ``searchsorted`` steps),
+  * one long numpy call that releases the GIL (a large sort),
+  * a pandas row-wise ``apply`` over a frame of games,
+
+and reports the best sampled run's slowdown against the best bare run (the runs are
+interleaved) and the samples it took.
+
+    python benchmarks/bench_profiling.py --intervals 1,5,10
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from profiling import SamplingProfiler
+
+
+def python_loop():
+    total = 0
+    for i in range(3_000_000):
+        total += i % 7
+    return total
+
+
+def small_numpy():
+    rng = np.random.default_rng(0)
+    cdf = np.cumsum(rng.random((30, 12)), axis=1)
+    cdf /= cdf[:, -1:]
+    runs = 0
+    for _ in range(20_000):
+        runs += np.searchsorted(cdf[_ % 30], rng.random(8), side="right").sum()
+    return runs
+
+
+def big_numpy():
+    return np.sort(np.random.default_rng(0).random(20_000_000))[-1]
+
+
+def pandas_apply():
+    rng = np.random.default_rng(0)
+    games = pd.DataFrame({"Home": rng.poisson(2.4, 40_000), "Away": rng.poisson(2.2, 40_000)})
+    return games.apply(lambda row: row["Home"] + row["Away"] > 4.5, axis=1).sum()
+
+
+WORKLOADS = {"python loop": python_loop, "small numpy calls": small_numpy, "large numpy sort": big_numpy, "pandas apply": pandas_apply}
+
+
+def timed(fn, interval=None):
+    """(seconds, samples) for one run, bare or under the sampler at ``interval`` ms."""
+    profiler = SamplingProfiler(interval / 1000).start() if interval else None
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return elapsed, profiler.stop().samples if profiler is not None else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--intervals", default="1,5,10", help="comma-separated sampling intervals (ms)")
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args()
+    intervals = [float(i) for i in args.intervals.split(",")]
+
+    print(f"{'workload':<18} {'bare ms':>8}" + "".join(f" {f'{i:g} ms: slowdown / samples':>27}" for i in intervals))
+    for name, fn in WORKLOADS.items():
+        # Bare and sampled runs interleaved, best of each, so drift on a busy machine hits both alike
+        runs = {interval: [] for interval in [None] + intervals}
+        for _ in range(args.repeats):
+            for interval in runs:
+                runs[interval].append(timed(fn, interval))
+        bare = min(t for t, _ in runs[None])
+        cells = []
+        for interval in intervals:
+            best, samples = min(runs[interval])
+            cells.append(f"{100 * (best / bare - 1):>+19.1f}% / {samples:>4}")
+        print(f"{name:<18} {bare * 1000:>8.1f}" + "".join(f" {cell:>27}" for cell in cells))
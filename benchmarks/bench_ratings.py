@@ -0,0 +1,111 @@
+"""Timing and recovery for ratings.pregame_ratings on synthetic multi-season histories.
+
+Builds seasons of random 30-team schedules (15 games a day, 162 days a season) with
+known offensive / defensive strengths, then times
+
+  * the full day-by-day walk (every game's pre-game ratings) - target: sub-second,
+  * the daily incremental run: resume from the saved state and solve one new day,
+and checks the final ratings against a dense weighted least-squares fit over every game
+and against the true strengths.
+
+    python benchmarks/bench_ratings.py --seasons 1,5,10
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ratings import TeamRatings, pregame_ratings
+from team_registry import N_TEAMS
+
+GAMES_PER_DAY = 15
+DAYS_PER_SEASON = 162
+
+
+def synthetic_history(n_seasons, seed=42):
+    """One 162-day season a year from 2015; team strengths drift a little each season."""
+    rng = np.random.default_rng(seed)
+    off = rng.normal(0, 0.35, N_TEAMS)
+    dfn = rng.normal(0, 0.35, N_TEAMS)
+    frames = []
+    for season in range(n_seasons):
+        off = 0.7 * off + rng.normal(0, 0.2, N_TEAMS)
+        dfn = 0.7 * dfn + rng.normal(0, 0.2, N_TEAMS)
+        pairs = np.argsort(rng.random((DAYS_PER_SEASON, N_TEAMS)), axis=1).reshape(-1, 2)
+        start = pd.Timestamp("2015-04-01") + pd.DateOffset(years=season)
+        dates = start + pd.to_timedelta(np.repeat(np.arange(DAYS_PER_SEASON), GAMES_PER_DAY), unit="D")
+        home, away = pairs[:, 0], pairs[:, 1]
+        home_runs = rng.poisson(np.clip(2.35 + 0.15 + off[home] - dfn[away], 0.2, None)).astype(float)
+        away_runs = rng.poisson(np.clip(2.35 + off[away] - dfn[home], 0.2, None)).astype(float)
+        frames.append(pd.DataFrame({"date": dates, "home": home, "away": away, "home_runs": home_runs, "away_runs": away_runs}))
+    return pd.concat(frames, ignore_index=True), off, dfn
+
+
+def walk(history, **kwargs):
+    return pregame_ratings(history["date"], history["home"], history["away"], history["home_runs"], history["away_runs"], **kwargs)
+
+
+def final_model(history):
+    model = TeamRatings()
+    for day, games in history.groupby("date", sort=True):
+        model.add_games(day.toordinal(), games["home"], games["away"], games["home_runs"], games["away_runs"])
+    model.solve()
+    return model
+
+
+def dense_fit(history, model):
+    """Reference: the decayed ridge fit solved from the full dense design matrix in one go."""
+    g = len(history)
+    cols, data = model.design(history["home"].to_numpy(), history["away"].to_numpy())
+    X = np.zeros((2 * g, model.size))
+    np.add.at(X, (np.repeat(np.arange(2 * g), 4), cols.ravel()), data.ravel())
+    days = np.array([d.toordinal() for d in history["date"]] * 2)
+    w = 0.5 ** ((days.max() - days) / model.halflife_days)
+    y = np.concatenate([history["home_runs"], history["away_runs"]])
+    return np.linalg.solve(X.T @ (w[:, None] * X) + np.diag(model.penalty), X.T @ (w * y))
+
+
+def best_of(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seasons", default="1,5,10", help="comma-separated history lengths (seasons)")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="bench_ratings_")
+    try:
+        print(f"{'seasons':>7} {'games':>7} {'full walk ms':>13} {'+1 day ms':>10} {'days solved':>12} "
+              f"{'matches dense fit':>18} {'corr(off)':>10} {'corr(def)':>10}")
+        for n_seasons in [int(s) for s in args.seasons.split(",")]:
+            history, true_off, true_def = synthetic_history(n_seasons)
+            walk_s, _ = best_of(lambda: walk(history), args.repeats)
+
+            # Daily run: yesterday's state on disk, today's slate (unplayed) appended
+            state = os.path.join(scratch, f"state_{n_seasons}.npz")
+            walk(history, state_file=state)
+            today = history.tail(GAMES_PER_DAY).assign(date=history["date"].max() + pd.Timedelta(days=1), home_runs=np.nan, away_runs=np.nan)
+            extended = pd.concat([history, today], ignore_index=True)
+            incr_s, incr = best_of(lambda: walk(extended, state_file=state), args.repeats)
+
+            model = final_model(history)
+            matches = np.allclose(model.x, dense_fit(history, model), atol=1e-8)
+            corr_off = np.corrcoef(model.offense, true_off)[0, 1]
+            corr_def = np.corrcoef(model.defense, true_def)[0, 1]
+            print(f"{n_seasons:>7} {len(history):>7} {walk_s * 1000:>13.1f} {incr_s * 1000:>10.1f} {incr.attrs['days_solved']:>12} "
+                  f"{str(matches):>18} {corr_off:>10.3f} {corr_def:>10.3f}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
@@ -0,0 +1,93 @@
+"""Timing for features.rolling_form on synthetic schedules.
+
+Builds seasons of random 30-team schedules, times the one-pass engine across schedule
+sizes and window counts (cost should grow ~linearly in games x windows), and compares
+the four 7-game columns (scored/allowed, all games/venue) against the per-team
+groupby/lambda rolling mean it replaced, run once per column.
+
+    python benchmarks/bench_rolling_form.py
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from features import rolling_form
+from team_registry import N_TEAMS
+
+GAMES_PER_DAY = 15
+
+
+def synthetic_schedule(n_games, seed=42):
+    """n_games random matchups, 15 a day, with 1-5 inning runs per side (last day unplayed)."""
+    rng = np.random.default_rng(seed)
+    pairs = np.argsort(rng.random((n_games // GAMES_PER_DAY + 1, N_TEAMS)), axis=1).reshape(-1, 2)[:n_games]
+    dates = pd.Timestamp("2015-04-01") + pd.to_timedelta(np.arange(n_games) // GAMES_PER_DAY, unit="D")
+    runs = rng.poisson(2.3, size=(n_games, 2)).astype(float)
+    runs[-GAMES_PER_DAY:] = np.nan
+    return dates, pairs[:, 0], pairs[:, 1], runs[:, 0], runs[:, 1]
+
+
+def groupby_lambda_form(dates, home_ids, away_ids, home_runs, away_runs, window=7):
+    """Reference: the previous shift + rolling mean per team through groupby.transform(lambda),
+    once for each column the engine builds for one window (scored/allowed x all games/venue)."""
+    n = len(home_ids)
+    side = np.repeat([0, 1], n)
+    team = np.concatenate([home_ids, away_ids])
+    long = pd.DataFrame({
+        "row": np.tile(np.arange(n), 2),
+        "side": side,
+        "date": np.concatenate([np.asarray(dates), np.asarray(dates)]),
+        "Scored": np.concatenate([home_runs, away_runs]),
+        "Allowed": np.concatenate([away_runs, home_runs]),
+        "": team,
+        "Venue_": team * 2 + side,
+    }).dropna(subset=["Scored"])
+    columns = {}
+    for scope in ["", "Venue_"]:
+        games = long.sort_values([scope, "date", "row"], kind="stable")
+        for stat in ["Scored", "Allowed"]:
+            form = games.groupby(scope)[stat].transform(lambda x: x.shift().rolling(window, min_periods=1).mean())
+            out = np.full((2, n), np.nan)
+            out[games["side"].to_numpy(), games["row"].to_numpy()] = form.to_numpy()
+            columns[f"Home_Form_{stat}_{scope}L{window}"], columns[f"Away_Form_{stat}_{scope}L{window}"] = out
+    return columns
+
+
+def best_of(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="2430,24300,243000", help="comma-separated schedule sizes (games)")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    window_sets = [(7,), (3, 7, 15, 30), (3, 5, 7, 10, 15, 20, 30, 60)]
+    print(f"{'games':>8} {'windows':>8} {'columns':>8} {'ms':>9} {'ns/game/window':>15}")
+    for n_games in [int(s) for s in args.sizes.split(",")]:
+        schedule = synthetic_schedule(n_games)
+        for windows in window_sets:
+            secs, form = best_of(lambda: rolling_form(*schedule, windows=windows, halflives=()), args.repeats)
+            # scored + allowed, all games + venue split
+            work = n_games * len(windows) * 4
+            print(f"{n_games:>8} {len(windows):>8} {form.shape[1]:>8} {secs * 1000:>9.1f} {secs / work * 1e9:>15.1f}")
+
+        secs, form = best_of(lambda: rolling_form(*schedule, windows=(3, 7, 15, 30), halflives=(5,)), args.repeats)
+        print(f"{n_games:>8} {'4 + EWM':>8} {form.shape[1]:>8} {secs * 1000:>9.1f}")
+
+        engine_s, form = best_of(lambda: rolling_form(*schedule, windows=(7,), halflives=()), args.repeats)
+        ref_s, ref = best_of(lambda: groupby_lambda_form(*schedule), 1)
+        diff = max(np.nanmax(np.abs(values - form[name].to_numpy())) for name, values in ref.items())
+        print(f"{n_games:>8} 7-game form, {len(ref)} columns: engine {engine_s * 1000:.1f} ms, groupby/lambda "
+              f"{ref_s * 1000:.1f} ms, {ref_s / len(ref) * 1000:.1f} ms a column (max diff = {diff:.1e})\n")
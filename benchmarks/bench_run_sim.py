@@ -0,0 +1,63 @@
+"""Timing and accuracy for run_sim.RunSimulator.
+
+Fits the simulator on the boxscore store, simulates a 15-game slate at 100k paths per
+game (target: well under a second) and a full 2,430-game season at 10k paths, and
+checks the Monte Carlo distributions against exact ones obtained by convolving the
+ten half-inning pmfs.
+
+    python benchmarks/bench_run_sim.py
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from features import load_games
+from run_sim import RunSimulator, negbin_pmf, line_probabilities, MAX_RUNS, SLATE_PATHS
+
+
+def exact_distributions(sim, away_runs, home_runs):
+    """Reference: convolve every game's ten half-inning pmfs."""
+    league = sim.inning_means.sum(axis=1, keepdims=True)
+    out = np.empty((len(away_runs), MAX_RUNS + 1))
+    for i, (a, h) in enumerate(zip(away_runs, home_runs)):
+        pmf = negbin_pmf(sim.inning_means * np.array([[a], [h]]) / league, sim.dispersion)
+        total = np.ones(1)
+        for half_inning in pmf.reshape(-1, MAX_RUNS + 1):
+            total = np.convolve(total, half_inning)
+        out[i] = np.append(total[:MAX_RUNS], total[MAX_RUNS:].sum())
+    return out
+
+
+def best_of(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", default="data/mlb_boxscores_full.csv")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    sim = RunSimulator.fit(load_games(args.games))
+    print(f"League 1-5 runs per team-game {sim.team_mean:.2f}, half-inning dispersion r = {sim.dispersion:.3f}")
+
+    rng = np.random.default_rng(42)
+    season_away = rng.uniform(1.6, 3.2, 2430)
+    season_home = rng.uniform(1.6, 3.2, 2430)
+
+    for label, n_games, paths in [("15-game slate", 15, SLATE_PATHS), ("2,430-game season", 2430, SLATE_PATHS // 10)]:
+        away, home = season_away[:n_games], season_home[:n_games]
+        secs, dist = best_of(lambda: sim.simulate(away, home, paths=paths, seed=1), args.repeats)
+        exact = exact_distributions(sim, away, home)
+        over_err = np.abs(line_probabilities(dist, 4.5)[0] - line_probabilities(exact, 4.5)[0]).max()
+        print(f"{label:<18} {paths:>7,} paths/game {secs * 1000:9.1f} ms  "
+              f"({n_games * paths * 10 / secs / 1e6:6.1f}M half-innings/s, max |P(over 4.5) - exact| = {over_err:.4f})")
@@ -0,0 +1,119 @@
+"""Reprocessing one day with --start/--end against rerunning the stages over the whole store.
+
+Writes a synthetic boxscore store of several seasons (15 games a day, the last day's games
+pending) into a scratch working directory that borrows the repo's model and FanGraphs
+files, then times
+
+  * reading the store in full against reading one day with the pushed-down predicate,
+  * predict_over_4_5.py and merge_predictions.py over every game,
+  * the same two stages scoped to one settled day (reads, predicts and upserts that day),
+
+and checks that the scoped run leaves the predictions and merged files byte-identical to
+the full run's.
+
+    python benchmarks/bench_scoped.py --seasons 1,3
+"""
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+import predict_over_4_5
+import merge_predictions
+from scope import Scope, read_scoped
+from team_registry import TEAMS
+
+GAMES_PER_DAY = 15
+DAYS_PER_SEASON = 180
+
+
+def synthetic_store(path, n_seasons, seed=42):
+    """Boxscore store in the scraper's layout; returns the dates."""
+    rng = np.random.default_rng(seed)
+    names = np.array([aliases[0] for _, aliases in TEAMS])
+    n_days = n_seasons * DAYS_PER_SEASON
+    days = pd.Timestamp("2019-04-01") + pd.to_timedelta(
+        np.arange(n_days) % DAYS_PER_SEASON + 365 * (np.arange(n_days) // DAYS_PER_SEASON), unit="D")
+    order = np.argsort(rng.random((n_days, len(names))), axis=1).reshape(n_days, GAMES_PER_DAY, 2)
+    innings = rng.poisson(0.5, size=(n_days * GAMES_PER_DAY, 2, 9)).astype(object)
+    innings[-GAMES_PER_DAY:] = "Pending"
+
+    store = pd.DataFrame({
+        "Game Date": np.repeat(days.strftime("%Y-%m-%d"), GAMES_PER_DAY),
+        "Away Team": names[order[:, :, 0].ravel()],
+        "Home Team": names[order[:, :, 1].ravel()],
+        "Game ID": 401_000_000 + np.arange(n_days * GAMES_PER_DAY),
+    })
+    for i in range(9):
+        store[f"Away {i + 1}th"] = innings[:, 0, i]
+        store[f"Home {i + 1}th"] = innings[:, 1, i]
+    store.to_csv(path, index=False)
+    return days
+
+
+def quiet(fn, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    quiet(fn, *args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seasons", default="1,3", help="comma-separated store sizes (seasons)")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="bench_scoped_")
+    cwd = os.getcwd()
+    try:
+        os.makedirs(os.path.join(scratch, "data"))
+        os.makedirs(os.path.join(scratch, "models"))
+        for name in ["rf_model_over_4_5.joblib", "scaler_over_4_5.joblib"]:
+            os.symlink(os.path.join(ROOT, "models", name), os.path.join(scratch, "models", name))
+        os.symlink(os.path.join(ROOT, "downloads"), os.path.join(scratch, "downloads"))
+        os.chdir(scratch)
+
+        print(f"{'seasons':>7} {'games':>6} {'read all ms':>11} {'read day ms':>11} {'predict all s':>13} "
+              f"{'predict day s':>13} {'merge all s':>11} {'merge day s':>11}  same")
+        for n_seasons in [int(s) for s in args.seasons.split(",")]:
+            for f in os.listdir("data") + ["models/team_ratings_state.npz"]:
+                path = f if f.startswith("models") else os.path.join("data", f)
+                if os.path.exists(path):
+                    os.remove(path)
+            days = synthetic_store("data/mlb_boxscores_full.csv", n_seasons)
+            day = days[len(days) // 2].strftime("%Y-%m-%d")
+            one_day = Scope(day, day)
+
+            start = time.perf_counter()
+            store = pd.read_csv("data/mlb_boxscores_full.csv")
+            read_all = time.perf_counter() - start
+            start = time.perf_counter()
+            read_scoped("data/mlb_boxscores_full.csv", one_day, "Game Date", "Game ID")
+            read_day = time.perf_counter() - start
+
+            predict_all = timed(predict_over_4_5.main, [])
+            merge_all = timed(merge_predictions.main, [])
+            full = {f: open(f, "rb").read() for f in ["data/mlb_predictions.csv", "data/mlb_predictions_merged.csv"]}
+
+            predict_day = timed(predict_over_4_5.main, one_day.argv())
+            merge_day = timed(merge_predictions.main, one_day.argv())
+            same = all(open(f, "rb").read() == data for f, data in full.items())
+
+            print(f"{n_seasons:>7} {len(store):>6} {read_all * 1000:>11.1f} {read_day * 1000:>11.1f} {predict_all:>13.2f} "
+                  f"{predict_day:>13.2f} {merge_all:>11.2f} {merge_day:>11.2f}  {same}")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(scratch, ignore_errors=True)
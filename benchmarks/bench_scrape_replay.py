@@ -0,0 +1,201 @@
+"""Offline scraper benchmark against replay.py.
+
+Writes synthetic fixtures (a chunked scoreboard plus one boxscore page per game, in the
+formats the live sites return) unless --fixtures points at a recorded set, serves them
+from a local replay server and runs get_scores_full.backfill through it with no network:
+
+  * throughput at several injected latencies,
+  * retry behaviour with injected 503s,
+  * a rerun over the same range (settled games are skipped),
+  * one settled game refetched by ID (get_scores_full.py --games) and upserted,
+  * conditional GETs (ETag -> 304) when the same pages are refetched.
+
+    python benchmarks/bench_scrape_replay.py --days 14
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import threading
+import contextlib
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import replay
+import get_scores_full
+from team_registry import TEAMS
+from scope import Scope
+
+BOXSCORE_PAGE = """<html><body>
+<h2 class="ScoreCell__TeamName">{away}</h2><h2 class="ScoreCell__TeamName">{home}</h2>
+<div class="Gamestrip__Record">30-25, 15-12 Away</div><div class="Gamestrip__Record">28-27, 14-13 Home</div>
+<div class="Gamestrip__Score">{away_runs}</div><div class="Gamestrip__Score">{home_runs}</div>
+<table class="Table Table--align-center"><thead><tr><th></th>{header}<th>R</th><th>H</th><th>E</th></tr></thead>
+<tbody><tr><td>{away}</td>{away_cells}</tr><tr><td>{home}</td>{home_cells}</tr></tbody></table>
+{away_pitching}{home_pitching}
+</body></html>"""
+
+# ESPN's stat tables: a names table and a stats table side by side, rows aligned, team total last
+PITCHING_TABLE = """<div class="ResponsiveTable"><div class="flex">
+<table class="Table Table--fixed-left"><thead><tr><th>pitchers</th></tr></thead><tbody>{names}<tr><td>team</td></tr></tbody></table>
+<div class="Table__Scroller"><table class="Table"><thead><tr><th>IP</th><th>H</th><th>R</th><th>ER</th><th>BB</th><th>K</th><th>HR</th><th>PC-ST</th><th>ERA</th></tr></thead>
+<tbody>{stats}<tr><td>9.0</td><td></td><td></td><td></td><td></td><td></td><td></td><td></td><td></td></tr></tbody></table></div>
+</div></div>"""
+
+
+def pitching_table(rng, staff):
+    """Starter plus two relievers drawn from a team's staff of pitcher IDs."""
+    pitchers = [staff[rng.integers(5)], staff[5 + rng.integers(3)], staff[8 + rng.integers(4)]]
+    outs = [int(rng.integers(12, 21)), 0, 0]
+    outs[1] = int(rng.integers(1, 27 - outs[0]))
+    outs[2] = 27 - outs[0] - outs[1]
+    names = "".join(f'<tr><td><a class="Boxscore__AthleteName" href="/mlb/player/_/id/{p}/p-{p}">P. {p}</a></td></tr>' for p in pitchers)
+    stats = "".join(
+        f"<tr><td>{o // 3}.{o % 3}</td>" + "".join(f"<td>{v}</td>" for v in rng.poisson([o / 3, o / 9, o / 10, o / 9, o / 3, o / 30]))
+        + f"<td>{o * 5}-{o * 3}</td><td>4.00</td></tr>"
+        for o in outs
+    )
+    return PITCHING_TABLE.format(names=names, stats=stats)
+
+
+def synthetic_fixtures(fixture_dir, start, days, chunk_days, seed=42):
+    """Scoreboard chunks and boxscore pages for ``days`` of 15-game slates; returns the game count."""
+    rng = np.random.default_rng(seed)
+    names = [aliases[0] for _, aliases in TEAMS]
+    game_id = 401_700_000
+    staffs = {name: 30_000 + 12 * k + np.arange(12) for k, name in enumerate(names)}
+    chunk_start = start
+    end = start + timedelta(days=days - 1)
+
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+        events = []
+        day = chunk_start
+        while day <= chunk_end:
+            order = rng.permutation(len(names))
+            for k in range(len(names) // 2):
+                away, home = names[order[2 * k]], names[order[2 * k + 1]]
+                game_id += 1
+                first_pitch = day + timedelta(hours=17 + k % 6)  # 1-6 pm Eastern in UTC
+                events.append({
+                    "id": str(game_id),
+                    "date": first_pitch.strftime("%Y-%m-%dT%H:%MZ"),
+                    "status": {"type": {"state": "post", "shortDetail": "Final"}, "period": 9},
+                    "competitions": [{"competitors": [
+                        {"homeAway": "home", "team": {"displayName": home}},
+                        {"homeAway": "away", "team": {"displayName": away}},
+                    ]}],
+                })
+                innings = rng.poisson(0.5, size=(2, 9))
+                page = BOXSCORE_PAGE.format(
+                    away=away, home=home, away_runs=innings[0].sum(), home_runs=innings[1].sum(),
+                    header="".join(f"<th>{i}</th>" for i in range(1, 10)),
+                    away_cells="".join(f"<td>{r}</td>" for r in innings[0]),
+                    home_cells="".join(f"<td>{r}</td>" for r in innings[1]),
+                    away_pitching=pitching_table(rng, staffs[away]), home_pitching=pitching_table(rng, staffs[home]),
+                )
+                replay.save_fixture(
+                    fixture_dir, get_scores_full.BOXSCORE_URL.format(game_id=game_id), 200,
+                    {"Content-Type": "text/html", "ETag": f'"{game_id}-v1"'}, page.encode("utf-8"),
+                )
+            day += timedelta(days=1)
+
+        url = get_scores_full.SCOREBOARD_RANGE_URL.format(start=chunk_start.strftime("%Y%m%d"), end=chunk_end.strftime("%Y%m%d"))
+        replay.save_fixture(fixture_dir, url, 200, {"Content-Type": "application/json"},
+                            get_scores_full.json.dumps({"events": events}).encode("utf-8"))
+        chunk_start = chunk_end + timedelta(days=1)
+    return game_id - 401_700_000
+
+
+@contextlib.contextmanager
+def replay_server(fixture_dir, **kwargs):
+    server = replay.make_server(fixture_dir, port=0, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    get_scores_full.set_base_url(base_url)
+    try:
+        yield base_url, server.RequestHandlerClass.stats
+    finally:
+        server.shutdown()
+        server.server_close()
+        get_scores_full.set_base_url(None)
+
+
+def run_backfill(work_dir, start, end, chunk_days, restart=True):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        began = time.perf_counter()
+        get_scores_full.backfill(
+            start, end, chunk_days=chunk_days, delay=0, backoff=0.01, restart=restart,
+            checkpoint_file=os.path.join(work_dir, "checkpoint.json"),
+            output_file=os.path.join(work_dir, "boxscores_full.csv"),
+            output_file_1to5=os.path.join(work_dir, "boxscores_1to5.csv"),
+            pitcher_file=os.path.join(work_dir, "pitcher_log.csv"),
+        )
+        return time.perf_counter() - began
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", help="recorded fixture directory (default: synthesize into a temp dir)")
+    parser.add_argument("--start", default="2025-06-01")
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--chunk-days", type=int, default=7)
+    parser.add_argument("--latencies", default="0,20,50", help="comma-separated injected latencies (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    start = datetime.strptime(args.start, "%Y-%m-%d")
+    end_date = (start + timedelta(days=args.days - 1)).strftime("%Y-%m-%d")
+    scratch = tempfile.mkdtemp(prefix="bench_replay_")
+    try:
+        fixture_dir = args.fixtures
+        if fixture_dir is None:
+            fixture_dir = os.path.join(scratch, "fixtures")
+            n_games = synthetic_fixtures(fixture_dir, start, args.days, args.chunk_days)
+            print(f"Synthesized {n_games} games over {args.days} days in {fixture_dir}")
+
+        print(f"\n{'scenario':<28} {'seconds':>8} {'requests':>9} {'pages/s':>8}  server stats")
+        for latency in [float(x) for x in args.latencies.split(",")]:
+            work_dir = tempfile.mkdtemp(dir=scratch)
+            with replay_server(fixture_dir, latency_ms=latency) as (_, stats):
+                secs = run_backfill(work_dir, args.start, end_date, args.chunk_days)
+                print(f"{f'backfill, {latency:.0f} ms latency':<28} {secs:8.2f} {stats['requests']:9d} {stats['requests'] / secs:8.1f}  {stats}")
+
+        work_dir = tempfile.mkdtemp(dir=scratch)
+        with replay_server(fixture_dir, error_rate=args.error_rate) as (_, stats):
+            secs = run_backfill(work_dir, args.start, end_date, args.chunk_days)
+            label = f"backfill, {args.error_rate:.0%} 503s"
+            print(f"{label:<28} {secs:8.2f} {stats['requests']:9d} {stats['requests'] / secs:8.1f}  {stats}")
+
+            stats.clear()
+            secs = run_backfill(work_dir, args.start, end_date, args.chunk_days)
+            print(f"{'rerun (games settled)':<28} {secs:8.2f} {stats.get('requests', 0):9d} {'':>8}  {stats}")
+
+            # A data correction: one settled game refetched by ID, the store upserted
+            stats.clear()
+            corrected = int(pd.read_csv(os.path.join(work_dir, "boxscores_full.csv"))["Game ID"].iloc[-1])
+            began = time.perf_counter()
+            get_scores_full.scrape_games(
+                Scope(game_ids=[corrected]), output_file=os.path.join(work_dir, "boxscores_full.csv"),
+                output_file_1to5=os.path.join(work_dir, "boxscores_1to5.csv"), pitcher_file=os.path.join(work_dir, "pitcher_log.csv"),
+            )
+            secs = time.perf_counter() - began
+            print(f"{'refetch one game (--games)':<28} {secs:8.2f} {stats.get('requests', 0):9d} {'':>8}  {stats}")
+
+        with replay_server(fixture_dir) as (base_url, stats):
+            session, validators = requests.Session(), {}
+            fixtures = replay.load_fixtures(fixture_dir).values()
+            game_ids = [f["url"].rsplit("/", 1)[1] for f in fixtures if "/boxscore/" in f["url"]]
+            for _ in range(2):
+                for game_id in game_ids:
+                    get_scores_full.fetch_boxscore_page(game_id, session, validators)
+            print(f"{'refetch with validators':<28} {'':>8} {stats['requests']:9d} {'':>8}  {stats}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
@@ -0,0 +1,113 @@
+﻿"""Load test for serve_picks.py.
+
+Starts the picks server in its own process pinned to a single core, then drives it
+at a fixed request rate from keep-alive client threads and reports p50/p99 latency.
+A share of requests repeat with If-None-Match to exercise the 304 path.
+
+    python benchmarks/bench_serve_picks.py --rps 300 --seconds 10
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+import http.client
+import multiprocessing
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import serve_picks
+
+
+def run_server(port, data, core):
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {core})
+    serve_picks.serve(port=port, path=data)
+
+
+def wait_for_server(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            conn.getresponse().read()
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def client(port, paths, interval, stop_at, conditional_share, latencies, statuses):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    etags = {}
+    next_send = time.perf_counter()
+    while next_send < stop_at:
+        now = time.perf_counter()
+        if now < next_send:
+            time.sleep(next_send - now)
+
+        path = random.choice(paths)
+        headers = {}
+        if path in etags and random.random() < conditional_share:
+            headers["If-None-Match"] = etags[path]
+
+        start = time.perf_counter()
+        conn.request("GET", path, headers=headers)
+        resp = conn.getresponse()
+        resp.read()
+        latencies.append(time.perf_counter() - start)
+        statuses.append(resp.status)
+        if resp.getheader("ETag"):
+            etags[path] = resp.getheader("ETag")
+
+        next_send += interval
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rps", type=int, default=300)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--conditional-share", type=float, default=0.5)
+    parser.add_argument("--data", default=serve_picks.DATA_FILE)
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=run_server, args=(args.port, args.data, 0), daemon=True)
+    server.start()
+    if not wait_for_server(args.port):
+        sys.exit("❌ Server did not start")
+
+    dates = sorted(serve_picks.PicksIndex(args.data).cols["by_date"])
+    paths = ["/picks/today"]
+    paths += [f"/picks/{d}" for d in dates[-30:]]
+    paths += [f"/picks/{d}?line={line}&min_conf=0.6" for d in dates[-10:] for line in (3.5, 4.5, 5.5)]
+    paths += [f"/accuracy?line={line}&min_conf={c}" for line in (3.5, 4.5, 5.5) for c in (0.55, 0.6, 0.7)]
+    paths += [f"/accuracy?line=4.5&min_conf=0.55&through={d}" for d in dates[-30:]]
+
+    latencies, statuses = [], []
+    stop_at = time.perf_counter() + args.seconds
+    threads = [
+        threading.Thread(target=client, args=(
+            args.port, paths, args.clients / args.rps, stop_at, args.conditional_share, latencies, statuses
+        ))
+        for _ in range(args.clients)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    server.terminate()
+
+    lat_ms = np.array(latencies) * 1000
+    codes = {code: statuses.count(code) for code in sorted(set(statuses))}
+    print(f"Requests: {len(lat_ms)} in {elapsed:.1f}s ({len(lat_ms) / elapsed:.0f} req/s, target {args.rps})")
+    print(f"Status codes: {codes}")
+    print(f"Latency p50: {np.percentile(lat_ms, 50):.2f} ms | p90: {np.percentile(lat_ms, 90):.2f} ms | "
+          f"p99: {np.percentile(lat_ms, 99):.2f} ms | max: {lat_ms.max():.2f} ms")
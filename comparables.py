@@ -0,0 +1,96 @@
+"""Nearest past games in the model's scaled feature space.
+
+predict_over_4_5.py saves every game's scaled feature vector (exactly what the saved
+scaler feeds the model) with its date, teams and - once settled - its 1-5 run total.
+``ComparablesIndex`` builds a KD-tree over the settled games, so the k most similar
+past games for any pick are one tree query rather than a scan of the whole history:
+
+    index = ComparablesIndex.load()
+    index.neighbours(matchup_id, k=10)
+"""
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+COMPARABLES_FILE = "data/mlb_comparables.npz"
+
+
+def save_comparables(path, X, matchup_ids, dates, home_teams, away_teams, runs, feature_names, scope=None):
+    """Write the vectors and game metadata; rows with NaN ``runs`` are queryable but never neighbours.
+
+    With a partial ``scope`` (scope.Scope) the rows are upserted: saved games outside it are kept,
+    as long as they were scaled for the same features.
+    """
+    arrays = {
+        "X": np.asarray(X, dtype=np.float32),
+        "matchup_ids": np.asarray(matchup_ids, dtype=str),
+        "dates": np.asarray(pd.to_datetime(dates), dtype="datetime64[D]"),
+        "home": np.asarray(home_teams, dtype=str),
+        "away": np.asarray(away_teams, dtype=str),
+        "runs": np.asarray(runs, dtype=np.float64),
+    }
+    features = np.asarray(feature_names, dtype=str)
+    if scope is not None and not scope.full and os.path.exists(path):
+        with np.load(path) as saved:
+            if np.array_equal(saved["features"], features):
+                keep = ~(scope.mask(saved["dates"], saved["matchup_ids"]) | np.isin(saved["matchup_ids"], arrays["matchup_ids"]))
+                arrays = {key: np.concatenate([saved[key][keep], value]) for key, value in arrays.items()}
+                order = np.argsort(arrays["dates"], kind="stable")
+                arrays = {key: value[order] for key, value in arrays.items()}
+            else:
+                print("⚠️ Saved comparables were scaled for other features: only the games in scope are kept")
+
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, features=features, **arrays)
+    os.replace(tmp_path, path)
+
+
+class ComparablesIndex:
+    def __init__(self, X, matchup_ids, dates, home, away, runs, features=None):
+        self.X = np.asarray(X, dtype=np.float32)
+        self.matchup_ids = np.asarray(matchup_ids)
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        self.home = np.asarray(home)
+        self.away = np.asarray(away)
+        self.runs = np.asarray(runs, dtype=np.float64)
+        self.features = features
+        self.row_of = {m: i for i, m in enumerate(self.matchup_ids)}
+        self.pool = np.flatnonzero(~np.isnan(self.runs))  # settled games: the only possible neighbours
+        self.tree = cKDTree(self.X[self.pool]) if len(self.pool) else None
+
+    @classmethod
+    def load(cls, path=COMPARABLES_FILE):
+        with np.load(path) as saved:
+            return cls(saved["X"], saved["matchup_ids"], saved["dates"], saved["home"], saved["away"], saved["runs"],
+                       list(saved["features"]))
+
+    def query(self, x, k=10, before=None):
+        """Pool rows and distances of the k settled games nearest ``x``, optionally only games dated before ``before``."""
+        if self.tree is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        n = len(self.pool)
+        kk = min(k, n)
+        while True:
+            dist, idx = self.tree.query(x, k=kk)
+            dist, idx = np.atleast_1d(dist), np.atleast_1d(idx)
+            rows = self.pool[idx]
+            keep = self.dates[rows] < np.datetime64(before, "D") if before is not None else np.ones(len(rows), dtype=bool)
+            # Early-season picks have few earlier games among their nearest: widen the search
+            if keep.sum() >= k or kk == n:
+                return rows[keep][:k], dist[keep][:k]
+            kk = min(4 * kk, n)
+
+    def neighbours(self, matchup_id, k=10):
+        """The k most similar games settled before this one, nearest first (empty if it isn't indexed)."""
+        row = self.row_of.get(matchup_id)
+        if row is None:
+            return pd.DataFrame(columns=["Game_Date", "Matchup", "Runs_1_5", "Distance"])
+        rows, dist = self.query(self.X[row], k=k, before=self.dates[row])
+        return pd.DataFrame({
+            "Game_Date": pd.to_datetime(self.dates[rows]).date,
+            "Matchup": np.char.add(np.char.add(self.away[rows], " @ "), self.home[rows]),
+            "Runs_1_5": self.runs[rows],
+            "Distance": dist.round(3),
+        })
@@ -0,0 +1,222 @@
+"""Streaming feature-drift monitor: retrain when the inputs moved or enough new games settled.
+
+train_model.py saves a snapshot of the training features next to the model: per
+feature, the mean and variance and a histogram over ten fixed bins (the training
+deciles, open-ended at both sides). predict_over_4_5.py then folds each settled day's
+feature rows - exactly what the model saw - into running statistics over the same
+bins, once per day: a Welford mean/variance merge and a bin count, so a day costs one
+pass over its ~15 rows and the state stays a few KB whatever the history's length.
+
+The retrain decision compares the two:
+
+  * every settled game since the training's last date is a new label; NEW_LABELS_RETRAIN
+    of them trigger a retrain on their own;
+  * with MIN_LIVE_ROWS or more, any feature whose population stability index (PSI) over
+    the fixed bins reaches PSI_THRESHOLD triggers one too;
+  * otherwise the retrain is skipped.
+
+A new snapshot (a retrain) restarts the running statistics from the training's last date.
+
+    python drift.py            # per-feature report and today's decision
+    python train_model.py --if-needed
+"""
+import os
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+DRIFT_SNAPSHOT_FILE = "models/drift_snapshot_over_4_5.npz"  # next to the model it describes
+DRIFT_STATE_FILE = "models/drift_state.npz"
+N_BINS = 10
+PSI_THRESHOLD = 0.25      # the usual "significant shift" level
+MIN_LIVE_ROWS = 150       # about ten days of games before drift is judged
+NEW_LABELS_RETRAIN = 300  # about three weeks of games
+PSI_FLOOR = 1e-4          # empty bins count as this share, so PSI stays finite
+
+
+class RunningStats:
+    """Per-feature count, mean, sum of squared deviations and fixed-bin histogram, updated in batches."""
+
+    def __init__(self, features, edges, n=0, mean=None, m2=None, counts=None):
+        self.features = list(features)
+        self.edges = np.asarray(edges, dtype=np.float64)  # (features, N_BINS - 1), padded with +inf
+        k = len(self.features)
+        self.n = int(n)
+        self.mean = np.zeros(k) if mean is None else np.asarray(mean, dtype=np.float64)
+        self.m2 = np.zeros(k) if m2 is None else np.asarray(m2, dtype=np.float64)
+        self.counts = np.zeros((k, self.edges.shape[1] + 1), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+
+    @classmethod
+    def from_rows(cls, X, features, n_bins=N_BINS):
+        """Statistics of ``X`` over bins at its own quantiles (ties merged)."""
+        X = np.asarray(X, dtype=np.float64)
+        edges = np.full((X.shape[1], n_bins - 1), np.inf)
+        for j in range(X.shape[1]):
+            cuts = np.unique(np.quantile(X[:, j], np.linspace(0, 1, n_bins + 1)[1:-1])) if len(X) else []
+            edges[j, :len(cuts)] = cuts
+        stats = cls(features, edges)
+        stats.update(X)
+        return stats
+
+    def empty(self):
+        return RunningStats(self.features, self.edges)
+
+    @property
+    def var(self):
+        return self.m2 / self.n if self.n else np.full(len(self.features), np.nan)
+
+    def update(self, X):
+        """Fold a batch of rows in: Welford's merge of the batch's mean / variance, plus its bin counts."""
+        X = np.asarray(X, dtype=np.float64)
+        m = len(X)
+        if not m:
+            return
+        batch_mean = X.mean(axis=0)
+        batch_m2 = ((X - batch_mean) ** 2).sum(axis=0)
+        n = self.n + m
+        delta = batch_mean - self.mean
+        self.mean = self.mean + delta * m / n
+        self.m2 = self.m2 + batch_m2 + delta ** 2 * self.n * m / n
+        self.n = n
+        for j in range(X.shape[1]):
+            self.counts[j] += np.bincount(np.searchsorted(self.edges[j], X[:, j], side="right"), minlength=self.counts.shape[1])
+
+    def psi(self, other):
+        """Population stability index of ``other`` against these statistics, per feature."""
+        expected = np.maximum(self.counts / max(self.n, 1), PSI_FLOOR)
+        actual = np.maximum(other.counts / max(other.n, 1), PSI_FLOOR)
+        used = (self.counts > 0) | (other.counts > 0)
+        return np.where(used, (actual - expected) * np.log(actual / expected), 0.0).sum(axis=1)
+
+    def arrays(self, prefix):
+        return {f"{prefix}features": np.asarray(self.features, dtype=str), f"{prefix}edges": self.edges,
+                f"{prefix}n": np.int64(self.n), f"{prefix}mean": self.mean, f"{prefix}m2": self.m2,
+                f"{prefix}counts": self.counts}
+
+    @classmethod
+    def from_arrays(cls, saved, prefix):
+        return cls(list(saved[f"{prefix}features"]), saved[f"{prefix}edges"], int(saved[f"{prefix}n"]),
+                   saved[f"{prefix}mean"], saved[f"{prefix}m2"], saved[f"{prefix}counts"])
+
+
+def write_npz(path, **arrays):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+
+def save_snapshot(features, dates, path=DRIFT_SNAPSHOT_FILE):
+    """Snapshot of the training feature matrix, saved next to the model it trained."""
+    stats = RunningStats.from_rows(features.to_numpy(dtype=np.float64), features.columns)
+    trained_through = np.asarray(pd.to_datetime(dates), dtype="datetime64[D]").max()
+    write_npz(path, created=np.str_(datetime.now().isoformat(timespec="seconds")),
+              trained_through=trained_through, **stats.arrays("train_"))
+
+
+class DriftMonitor:
+    def __init__(self, train, created, trained_through, live=None, as_of=None):
+        self.train = train
+        self.created = created
+        self.trained_through = np.datetime64(trained_through, "D")
+        self.live = live if live is not None else train.empty()
+        self.as_of = np.datetime64(as_of, "D") if as_of is not None else self.trained_through
+
+    @classmethod
+    def load(cls, snapshot_path=DRIFT_SNAPSHOT_FILE, state_path=DRIFT_STATE_FILE):
+        """The monitor for the current snapshot (None before any training saved one). Running
+        statistics saved against an older snapshot are dropped."""
+        if not os.path.exists(snapshot_path):
+            return None
+        with np.load(snapshot_path) as saved:
+            monitor = cls(RunningStats.from_arrays(saved, "train_"), str(saved["created"]), saved["trained_through"])
+        if os.path.exists(state_path):
+            with np.load(state_path) as saved:
+                if str(saved["created"]) == monitor.created:
+                    monitor.live = RunningStats.from_arrays(saved, "live_")
+                    monitor.as_of = np.datetime64(saved["as_of"], "D")
+        return monitor
+
+    def save(self, path=DRIFT_STATE_FILE):
+        write_npz(path, created=np.str_(self.created), as_of=self.as_of, **self.live.arrays("live_"))
+
+    def update(self, frame, dates, pending):
+        """Fold in the settled rows of every complete day after the last one folded; returns the rows added.
+
+        A day is complete once none of its games is pending, or once a later day has results
+        (what is still pending then was postponed). ``frame`` needs the snapshot's columns.
+        """
+        day = np.asarray(pd.to_datetime(dates), dtype="datetime64[D]")
+        settled = ~np.asarray(pending, dtype=bool)
+        new = day > self.as_of
+        if not (new & settled).any():
+            return 0
+        last_result = day[settled].max()
+        open_days = np.unique(day[new & ~settled])
+        complete = new & ((day < last_result) | ~np.isin(day, open_days))
+        rows = complete & settled
+        if not rows.any():
+            return 0
+        self.live.update(frame.loc[rows, self.train.features].to_numpy(dtype=np.float64))
+        self.as_of = day[complete].max()
+        return int(rows.sum())
+
+    def report(self):
+        """Per-feature training vs live mean, the shift in training SDs and the PSI, most drifted first."""
+        sd = np.sqrt(self.train.var)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            shift = np.where(sd > 0, (self.live.mean - self.train.mean) / sd, 0.0)
+        return pd.DataFrame({
+            "Feature": self.train.features,
+            "Train_Mean": self.train.mean.round(4),
+            "Live_Mean": np.where(self.live.n, self.live.mean, np.nan).round(4),
+            "Shift_SD": np.where(self.live.n, shift, np.nan).round(3),
+            "PSI": np.where(self.live.n, self.train.psi(self.live), np.nan).round(4),
+        }).sort_values("PSI", ascending=False).reset_index(drop=True)
+
+    def decision(self, psi_threshold=PSI_THRESHOLD, min_rows=MIN_LIVE_ROWS, new_labels=NEW_LABELS_RETRAIN):
+        """(retrain?, why)."""
+        n = self.live.n
+        if n >= new_labels:
+            return True, f"{n} new settled games since training (threshold {new_labels})"
+        if n < min_rows:
+            return False, f"{n} new settled games, too few to judge drift (need {min_rows})"
+        report = self.report()
+        drifted = report[report["PSI"] >= psi_threshold]
+        if len(drifted):
+            top = ", ".join(f"{f} ({p:.2f})" for f, p in zip(drifted["Feature"][:3], drifted["PSI"][:3]))
+            return True, f"{len(drifted)} feature(s) drifted past PSI {psi_threshold}: {top}"
+        return False, f"no drift over {n} new settled games (max PSI {report['PSI'].max():.2f})"
+
+
+def retrain_decision(snapshot_path=DRIFT_SNAPSHOT_FILE, state_path=DRIFT_STATE_FILE, **thresholds):
+    """(retrain?, why) for the model the snapshot belongs to; always retrain when there is none."""
+    monitor = DriftMonitor.load(snapshot_path, state_path)
+    if monitor is None:
+        return True, f"no training snapshot ({snapshot_path})"
+    return monitor.decision(**thresholds)
+
+
+def main(argv=None):
+    """Print the per-feature drift report and the retrain decision."""
+    parser = argparse.ArgumentParser(description="Report feature drift against the training snapshot.")
+    parser.add_argument("--top", type=int, default=15, help="features to show, most drifted first")
+    parser.add_argument("--snapshot", default=DRIFT_SNAPSHOT_FILE)
+    parser.add_argument("--state", default=DRIFT_STATE_FILE)
+    args = parser.parse_args(argv)
+
+    monitor = DriftMonitor.load(args.snapshot, args.state)
+    if monitor is None:
+        print(f"⏭️ No training snapshot at {args.snapshot}: train_model.py saves one with the model")
+        return
+    print(f"📡 Snapshot {monitor.created}: {monitor.train.n} training rows through {monitor.trained_through}; "
+          f"{monitor.live.n} settled rows folded through {monitor.as_of}")
+    print(monitor.report().head(args.top).to_string(index=False))
+    retrain, reason = monitor.decision()
+    print(f"{'🔁 Retrain' if retrain else '⏭️ No retrain'}: {reason}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+﻿"""Per-prediction feature contributions for the random forest.
+
+Each tree's class-1 probability is decomposed along the decision path: it starts at
+the root value (the bias) and every split adds ``value[child] - value[parent]`` to
+the feature the parent split on. Averaging over trees gives, for every game,
+
+    predict_proba(X)[:, 1] == bias + contributions.sum(axis=1)
+
+All trees are folded into one sparse (total_nodes x n_features) delta matrix when the
+explainer is built, so explaining a slate is one ``decision_path`` call and one
+sparse matrix product for the whole forest.
+"""
+import numpy as np
+from scipy import sparse
+
+
+class TreePathExplainer:
+    def __init__(self, model, positive_class=1):
+        self.model = model
+        self.n_features = model.n_features_in_
+        class_idx = list(model.classes_).index(positive_class)
+
+        rows, cols, deltas, roots = [], [], [], []
+        offset = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            value = tree.value[:, 0, :]
+            prob = value[:, class_idx] / value.sum(axis=1)
+
+            parent = np.full(tree.node_count, -1)
+            internal = np.flatnonzero(tree.children_left >= 0)
+            parent[tree.children_left[internal]] = internal
+            parent[tree.children_right[internal]] = internal
+
+            child = np.flatnonzero(parent >= 0)
+            rows.append(child + offset)
+            cols.append(tree.feature[parent[child]])
+            deltas.append(prob[child] - prob[parent[child]])
+            roots.append(prob[0])
+            offset += tree.node_count
+
+        self.n_trees = len(model.estimators_)
+        self.bias = float(np.mean(roots))
+        self.deltas = sparse.csr_matrix(
+            (np.concatenate(deltas) / self.n_trees, (np.concatenate(rows), np.concatenate(cols))),
+            shape=(offset, self.n_features),
+        )
+
+    def explain(self, X):
+        """Return (bias, contributions) for already-scaled rows X; contributions is (n_games, n_features)."""
+        indicator, _ = self.model.decision_path(np.asarray(X, dtype=np.float32))
+        contributions = np.asarray((indicator @ self.deltas).todense())
+        return self.bias, contributions
+
+
+def top_contributions(contributions, feature_names, k=5):
+    """Per game, the k features with the largest absolute contribution as [(name, value), ...]."""
+    order = np.argsort(-np.abs(contributions), axis=1)[:, :k]
+    names = np.asarray(feature_names)
+    return [list(zip(names[idx], contributions[i, idx])) for i, idx in enumerate(order)]
@@ -0,0 +1,142 @@
+﻿"""Feature helpers shared by train_model.py, predict_over_4_5.py and backfill_predict_over_4_5.py.
+
+Everything is keyed on integer team IDs from team_registry, so per-team values are
+gathered with NumPy indexing rather than merged on team-name strings.
+"""
+import numpy as np
+import pandas as pd
+
+from team_registry import team_ids, team_table
+
+STAT_KEYS = ["BB%", "K%", "ISO", "wRC+", "OBP", "SLG", "RBI", "AVG", "OPS"]
+FORM_COLUMNS = ["Home_Last7_Runs_1_5", "Away_Last7_Runs_1_5"]
+ROLLING_WINDOWS = (3, 7, 15, 30)
+EWM_HALFLIVES = (5,)
+
+
+# What predict / backfill read of the store: keys, starters and innings 1-5 (the rest is never parsed)
+GAME_COLUMNS = ["Game Date", "Game ID", "Away Team", "Home Team", "Away SP ID", "Home SP ID"] + [
+    f"{side} {i}th" for i in range(1, 6) for side in ["Away", "Home"]
+]
+
+
+def load_games(path="data/mlb_boxscores_full.csv", columns=None):
+    """Boxscore store with underscored column names, parsed dates, Game_ID and team ID columns.
+
+    Game_ID is the ESPN gameId (nullable Int64: rows scraped before it was stored have none);
+    Home/Away_SP_ID are the starters, empty for rows scraped before they were parsed.
+    ``columns`` (e.g. GAME_COLUMNS) limits the read to those of them the file has.
+    """
+    wanted = None if columns is None else set(columns)
+    games = pd.read_csv(path, usecols=None if wanted is None else (lambda c: c.strip() in wanted))
+    games.columns = games.columns.str.strip().str.replace(" ", "_")
+    games["Game_Date"] = pd.to_datetime(games["Game_Date"])
+    if "Game_ID" not in games.columns:
+        games["Game_ID"] = pd.NA
+    games["Game_ID"] = games["Game_ID"].astype("Int64")
+    games["Home_Team_ID"] = team_ids(games["Home_Team"])
+    games["Away_Team_ID"] = team_ids(games["Away_Team"])
+    for col in ["Home_SP_ID", "Away_SP_ID"]:  # starters (ESPN athlete IDs), stored since the pitcher log
+        if col not in games.columns:
+            games[col] = pd.NA
+    return games
+
+
+def load_team_stats(standard_path="downloads/team_standard.csv", advanced_path="downloads/team_advanced.csv"):
+    standard = pd.read_csv(standard_path)
+    advanced = pd.read_csv(advanced_path)
+    return pd.merge(standard, advanced, on="Tm", suffixes=("_std", "_adv")).rename(columns={"Tm": "Team"})
+
+
+def stat_columns(team_stats):
+    return [col for col in team_stats.columns if any(stat in col for stat in STAT_KEYS)]
+
+
+def team_stat_features(home_ids, away_ids, team_stats):
+    """home_*/away_* FanGraphs columns for each game, gathered from an ID-indexed table.
+
+    Column names and order match what the saved scaler was fitted on.
+    """
+    cols = stat_columns(team_stats)
+    table = team_table(team_stats, "Team", cols)
+    values = np.hstack([table[np.asarray(home_ids)], table[np.asarray(away_ids)]])
+    names = [f"home_{c}" for c in cols] + [f"away_{c}" for c in cols]
+    return pd.DataFrame(values, columns=names)
+
+
+def _group_starts(keys):
+    """Index of the first row of each row's run of equal keys (keys already sorted)."""
+    idx = np.arange(len(keys))
+    new_run = np.ones(len(keys), dtype=bool)
+    new_run[1:] = keys[1:] != keys[:-1]
+    return np.maximum.accumulate(np.where(new_run, idx, 0))
+
+
+def _lagged_means(keys, values, valid, windows, halflives):
+    """Pre-game rolling and exponentially weighted means for rows sorted by (key, date).
+
+    Only ``valid`` (completed) rows feed the statistics, and a row only ever sees valid rows
+    before it with the same key. Window sums are differences of one prefix sum over the
+    valid rows, so every window costs O(rows) regardless of its length.
+    """
+    played = np.concatenate([[0], np.cumsum(valid)])
+    before = played[:-1]                         # valid rows before each row (global)
+    first = before[_group_starts(keys)]          # valid rows before each row's group
+    prefix = np.concatenate([[0.0], np.cumsum(values[valid])])
+
+    out = {}
+    for w in windows:
+        lo = np.maximum(before - w, first)
+        count = before - lo
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[f"L{w}"] = np.where(count > 0, (prefix[before] - prefix[lo]) / count, np.nan)
+
+    if halflives:
+        valid_keys = keys[valid]
+        for h in halflives:
+            ewm = pd.Series(values[valid]).groupby(valid_keys, sort=False).ewm(halflife=h).mean().to_numpy()
+            last = np.maximum(before - 1, 0)
+            out[f"EWM{h}"] = np.where(before > first, ewm[last] if len(ewm) else np.nan, np.nan)
+    return out
+
+
+def rolling_form(dates, home_ids, away_ids, home_runs, away_runs, windows=ROLLING_WINDOWS, halflives=EWM_HALFLIVES):
+    """Pre-game 1-5 inning form for both sides of every game, as one DataFrame.
+
+    For each side and each stat (runs scored, runs allowed) there is a mean over the team's
+    last ``w`` completed games for every window (``*_L{w}``), the same restricted to games
+    at the current venue - home form for the home side, road form for the away side
+    (``*_Venue_L{w}``) - and an exponentially weighted mean per half-life (``*_EWM{h}``).
+
+    Games with NaN runs (not played yet) get features but never feed them, and every value
+    uses strictly earlier games (same-day games in file order, so the second game of a
+    doubleheader sees the first). Rows keep the order of the inputs.
+
+    Even one window pays for both sorts and builds all its columns, so it is slower than a
+    single groupby/lambda rolling mean of one stat (~280 against ~180 ms on 243k games) but
+    about twice as fast for the same columns, and each further window is a few vectorised
+    passes (see benchmarks/bench_rolling_form.py).
+    """
+    n = len(home_ids)
+    team = np.concatenate([home_ids, away_ids]).astype(np.int64)
+    venue = np.repeat([0, 1], n)
+    day = np.tile(np.asarray(pd.to_datetime(dates), dtype="datetime64[D]").astype(np.int64), 2)
+    row = np.tile(np.arange(n), 2)
+    home_runs = np.asarray(home_runs, dtype=np.float64)
+    away_runs = np.asarray(away_runs, dtype=np.float64)
+    scored = np.concatenate([home_runs, away_runs])
+    allowed = np.concatenate([away_runs, home_runs])
+    valid = ~(np.isnan(scored) | np.isnan(allowed))
+
+    columns = {}
+    for scope, keys in [("", team), ("Venue_", team * 2 + venue)]:
+        order = np.lexsort((row, day, keys))
+        for stat, values in [("Scored", scored), ("Allowed", allowed)]:
+            means = _lagged_means(keys[order], values[order], valid[order], windows, halflives if not scope else ())
+            for suffix, sorted_values in means.items():
+                long = np.empty(2 * n)
+                long[order] = sorted_values
+                columns[f"Home_Form_{stat}_{scope}{suffix}"] = long[:n]
+                columns[f"Away_Form_{stat}_{scope}{suffix}"] = long[n:]
+    return pd.DataFrame(columns)
+
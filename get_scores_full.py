@@ -5,27 +5,164 @@ import pandas as pd
 import re
 import time
 import os
+import json
+import argparse
+from zoneinfo import ZoneInfo
+
+from team_registry import team_id, team_ids
+from replay import RecordingSession
+from pitchers import save_pitching, PITCHER_LOG_FILE
+from scope import Scope, add_scope_arguments
+from profiling import profiled
+
+ESPN_API_BASE = "https://site.api.espn.com"
+ESPN_WEB_BASE = "https://www.espn.com"
+RECORD_DIR = None  # set by --record: every 200 response is also saved as a replay.py fixture
+
+def set_base_url(base_url=None):
+    """Send every ESPN request to ``base_url`` (e.g. a replay.py server); None means the live hosts."""
+    global SCOREBOARD_URL, SCOREBOARD_RANGE_URL, BOXSCORE_URL
+    api = (base_url or ESPN_API_BASE).rstrip("/")
+    web = (base_url or ESPN_WEB_BASE).rstrip("/")
+    SCOREBOARD_URL = api + "/apis/site/v2/sports/baseball/mlb/scoreboard?dates={date}"
+    SCOREBOARD_RANGE_URL = api + "/apis/site/v2/sports/baseball/mlb/scoreboard?dates={start}-{end}&limit=1000"
+    BOXSCORE_URL = web + "/mlb/boxscore/_/gameId/{game_id}"
+
+set_base_url(os.getenv("ESPN_BASE_URL"))
+
+def make_session():
+    session = requests.Session()
+    return RecordingSession(session, RECORD_DIR) if RECORD_DIR else session
+
+CHECKPOINT_FILE = "data/boxscore_backfill_checkpoint.json"
+SLATE_TZ = ZoneInfo("America/New_York")  # ESPN files games under their Eastern-time date
+
+def scoreboard_game(e, date_str):
+    """One scoreboard event as the game dict used across this module."""
+    status = e.get("status", {})
+    competitors = e.get("competitions", [{}])[0].get("competitors", [])
+    teams = {c.get("homeAway"): c.get("team", {}).get("displayName", "") for c in competitors}
+    # Announced starters, until the boxscore page has pitching lines of its own
+    probables = {}
+    for c in competitors:
+        for p in c.get("probables", []):
+            athlete = p.get("athlete", {})
+            if athlete.get("id"):
+                probables[c.get("homeAway", "").title()] = (int(athlete["id"]), athlete.get("shortName", athlete.get("displayName", "")))
+                break
+    return {
+        "gameId": e["id"],
+        "date": date_str,
+        "start": e.get("date", ""),  # first pitch, ISO 8601 UTC
+        "away": teams.get("away", ""),
+        "home": teams.get("home", ""),
+        "state": status.get("type", {}).get("state", ""),
+        "period": status.get("period", 0),
+        "detail": status.get("type", {}).get("shortDetail", ""),
+        "probables": probables,
+    }
 
-def get_game_ids(date_obj):
+def get_game_ids(date_obj, session=requests):
     date_str = date_obj.strftime("%Y%m%d")
-    url = f"https://site.api.espn.com/apis/site/v2/sports/baseball/mlb/scoreboard?dates={date_str}"
-    r = requests.get(url)
+    url = SCOREBOARD_URL.format(date=date_str)
+    r = session.get(url)
     events = r.json().get("events", [])
     
     games = []
     for e in events:
         if "id" in e:
-            games.append({"gameId": e["id"], "date": date_obj.strftime("%Y-%m-%d")})
+            games.append(scoreboard_game(e, date_obj.strftime("%Y-%m-%d")))
         else:
             print(f"⚠️ Warning: No 'id' found for event on {date_obj.strftime('%Y-%m-%d')}")
     
     return games
 
-def extract_boxscore(game_id, game_date):
-    url = f"https://www.espn.com/mlb/boxscore/_/gameId/{game_id}"
-    print(f"🌐 Scraping HTML: {url}")
-    r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-    soup = BeautifulSoup(r.content, "html.parser")
+def get_game_ids_range(start_obj, end_obj, session=requests):
+    """Every game from start_obj to end_obj (inclusive) with one scoreboard request, as {date_str: [games]}.
+
+    A range response carries no slate date, so each event is filed under its first pitch
+    in Eastern time - the date ESPN's single-day scoreboard lists it under.
+    """
+    url = SCOREBOARD_RANGE_URL.format(start=start_obj.strftime("%Y%m%d"), end=end_obj.strftime("%Y%m%d"))
+    r = session.get(url, timeout=30)
+    r.raise_for_status()
+
+    by_date = {}
+    day = start_obj
+    while day <= end_obj:
+        by_date[day.strftime("%Y-%m-%d")] = []
+        day += timedelta(days=1)
+
+    for e in r.json().get("events", []):
+        if "id" not in e or "date" not in e:
+            print("⚠️ Warning: scoreboard event without id/date skipped")
+            continue
+        first_pitch = datetime.fromisoformat(e["date"].replace("Z", "+00:00")).astimezone(SLATE_TZ)
+        date_str = first_pitch.strftime("%Y-%m-%d")
+        if date_str in by_date:
+            by_date[date_str].append(scoreboard_game(e, date_str))
+    return by_date
+
+def fetch_boxscore_page(game_id, session=requests, validators=None):
+    """Download a boxscore page, sending If-None-Match / If-Modified-Since when ``validators``
+    holds a previous response for this game. Returns None when the page is unchanged (304)."""
+    headers = {"User-Agent": "Mozilla/5.0"}
+    if validators is not None:
+        headers.update(validators.get(game_id, {}))
+
+    r = session.get(BOXSCORE_URL.format(game_id=game_id), headers=headers)
+    if r.status_code == 304:
+        return None
+    r.raise_for_status()  # a 429 / 5xx page would otherwise parse as a game with no data
+
+    if validators is not None:
+        cached = {}
+        if r.headers.get("ETag"):
+            cached["If-None-Match"] = r.headers["ETag"]
+        if r.headers.get("Last-Modified"):
+            cached["If-Modified-Since"] = r.headers["Last-Modified"]
+        validators[game_id] = cached
+    return r.content
+
+def extract_boxscore(game_id, game_date, session=requests, probables=None):
+    print(f"🌐 Scraping HTML: {BOXSCORE_URL.format(game_id=game_id)}")
+    return parse_boxscore(fetch_boxscore_page(game_id, session), game_date, game_id, probables)
+
+PITCHING_STATS = {"IP": "IP", "H": "H", "R": "R", "ER": "ER", "BB": "BB", "K": "K", "HR": "HR", "PC-ST": "PC"}
+PLAYER_ID = re.compile(r"/id/(\d+)")
+
+def parse_pitching(soup):
+    """Each team's pitching lines on a boxscore page, away team first, in the order they pitched.
+
+    ESPN draws a stat table as two tables side by side - player names under a "pitchers"
+    header, and the stat columns - whose rows line up; the team-total row has no player link.
+    """
+    teams = []
+    for block in soup.select("div.ResponsiveTable"):
+        tables = block.find_all("table")
+        head = tables[0].find("thead") if tables else None
+        if len(tables) < 2 or head is None or "pitchers" not in head.get_text(" ", strip=True).lower():
+            continue
+        columns = [th.get_text(strip=True) for th in tables[1].find("thead").find_all("th")]
+        lines = []
+        for name_row, stat_row in zip(tables[0].find("tbody").find_all("tr"), tables[1].find("tbody").find_all("tr")):
+            link = name_row.find("a", href=PLAYER_ID)
+            if link is None:
+                continue
+            cells = dict(zip(columns, (td.get_text(strip=True) for td in stat_row.find_all("td"))))
+            line = {"Pitcher ID": int(PLAYER_ID.search(link["href"]).group(1)), "Pitcher": link.get_text(strip=True)}
+            for column, key in PITCHING_STATS.items():
+                line[key] = cells.get(column, "").split("-")[0]  # PC-ST "95-62" -> pitches
+            lines.append(line)
+        if lines:
+            teams.append(lines)
+    return teams
+
+def parse_boxscore(content, game_date, game_id=None, probables=None):
+    """One game row from a boxscore page. The row also carries the starters ("Away/Home SP ID")
+    and, under "Pitching", every pitcher's line for the pitcher log; ``probables`` (the
+    scoreboard's announced starters by side) stand in while the page has no pitching yet."""
+    soup = BeautifulSoup(content, "html.parser")
 
     team_names = soup.select("h2.ScoreCell__TeamName")
     if len(team_names) < 2:
@@ -34,6 +171,7 @@ def extract_boxscore(game_id, game_date):
 
     away_team = team_names[0].text.strip()
     home_team = team_names[1].text.strip()
+    away_id, home_id = team_id(away_team), team_id(home_team)  # rejects names missing from the registry
 
     records = soup.select("div.Gamestrip__Record")
     away_record = records[0].text.strip().split(',')[0] if len(records) > 0 else ""
@@ -82,9 +220,23 @@ def extract_boxscore(game_id, game_date):
     except Exception as e:
         print(f"⚠️ Error parsing inning data: {e}")
 
+    # === Pitching lines from the same page; each side's first pitcher started
+    pitching = parse_pitching(soup)
+    starters = dict(probables or {})
+    lines = []
+    if len(pitching) == 2:
+        for side, team, side_lines in zip(["Away", "Home"], [away_id, home_id], pitching):
+            starters[side] = (side_lines[0]["Pitcher ID"], side_lines[0]["Pitcher"])
+            for k, line in enumerate(side_lines):
+                lines.append({
+                    "Game ID": int(game_id) if game_id is not None else None, "Game Date": game_date,
+                    "Side": side, "Team ID": team, "Starter": int(k == 0), **line,
+                })
+
     print(f"✅ Parsed: {away_team} vs {home_team}")
 
     game_row = {
+        "Game ID": int(game_id) if game_id is not None else None,
         "Game Date": game_date,
         "Away Team": away_team,
         "Away Record": away_record,
@@ -92,13 +244,22 @@ def extract_boxscore(game_id, game_date):
         "Home Team": home_team,
         "Home Record": home_record,
         "Home Score": re.sub(r"\D", "", home_runs),
+        "Away Team ID": away_id,
+        "Home Team ID": home_id,
+        "Away SP ID": starters.get("Away", (None, None))[0],
+        "Away SP": starters.get("Away", (None, None))[1],
+        "Home SP ID": starters.get("Home", (None, None))[0],
+        "Home SP": starters.get("Home", (None, None))[1],
+        "Pitching Parsed": int(len(pitching) == 2),  # the page had both pitching tables
+        "Pitching": lines,
     }
     game_row.update(inning_data)
 
     return game_row
 
-def scrape_range(start_date, end_date, output_file="data/mlb_boxscores_full.csv", output_file_1to5="data/mlb_boxscores_1to5.csv"):
+def load_boxscores(output_file="data/mlb_boxscores_full.csv"):
     dtype_spec = {f"{side} {i}th": str for i in range(1, 10) for side in ["Away", "Home"]}
+    dtype_spec["Game ID"] = "Int64"
 
     if os.path.exists(output_file):
         existing_df = pd.read_csv(output_file, dtype=dtype_spec)
@@ -106,36 +267,59 @@ def scrape_range(start_date, end_date, output_file="data/mlb_boxscores_full.csv"
     else:
         existing_df = pd.DataFrame()
         print("🆕 No previous file found. Starting fresh.")
+    return existing_df
+
+def needs_scrape(existing_df, game):
+    """False when the store already has this game with innings 1-5 settled."""
+    if existing_df.empty:
+        return True
+
+    has_ids = "Game ID" in existing_df.columns
+    if has_ids and (existing_df["Game ID"] == int(game["gameId"])).any():
+        existing_row = existing_df[existing_df["Game ID"] == int(game["gameId"])]
+    else:
+        # Rows scraped before Game ID was stored can only be found by date and teams
+        legacy = existing_df[
+            (existing_df['Game Date'] == game['date']) &
+            (existing_df['Away Team'].notna()) &
+            (existing_df['Home Team'].notna())
+        ]
+        if has_ids:
+            legacy = legacy[legacy["Game ID"].isna()]
+        try:
+            away, home = team_id(game["away"]), team_id(game["home"])
+        except ValueError:  # exhibition / All-Star events
+            return True
+        existing_row = legacy[(team_ids(legacy["Away Team"]) == away) & (team_ids(legacy["Home Team"]) == home)]
+
+    if existing_row.empty:
+        return True
+    inning_cols = [f"Away {i}th" for i in range(1, 6)] + [f"Home {i}th" for i in range(1, 6)]
+    if existing_row[inning_cols].isin(["Pending"]).any().any():
+        return True
+    # Settled before pitching was parsed: one more fetch fills the pitcher log. Only one - the
+    # marker is written whether or not the page had pitching tables (postponed games have none)
+    return "Pitching Parsed" not in existing_row.columns or bool(existing_row["Pitching Parsed"].isna().any())
+
+def scrape_range(start_date, end_date, output_file="data/mlb_boxscores_full.csv", output_file_1to5="data/mlb_boxscores_1to5.csv",
+                 pitcher_file=PITCHER_LOG_FILE, refetch=False):
+    """Upsert every game from start_date to end_date; settled games are skipped unless ``refetch``."""
+    existing_df = load_boxscores(output_file)
 
     current = datetime.strptime(start_date, "%Y-%m-%d")
     end = datetime.strptime(end_date, "%Y-%m-%d")
     new_rows = []
+    session = make_session()
 
     while current <= end:
         print(f"📅 Checking games on {current.strftime('%Y-%m-%d')}")
-        games = get_game_ids(current)
+        games = get_game_ids(current, session)
         print(f"Found {len(games)} games.")
 
         for game in games:
-            should_scrape = True
-
-            if not existing_df.empty:
-                existing_row = existing_df[
-                    (existing_df['Game Date'] == game['date']) &
-                    (existing_df['Away Team'].notna()) &
-                    (existing_df['Home Team'].notna())
-                ]
-
-                if not existing_row.empty:
-                    inning_cols = [f"Away {i}th" for i in range(1, 6)] + [f"Home {i}th" for i in range(1, 6)]
-                    pending_innings = existing_row[inning_cols].isin(["Pending"]).any().any()
-
-                    if not pending_innings:
-                        should_scrape = False
-
-            if should_scrape:
+            if refetch or needs_scrape(existing_df, game):
                 try:
-                    row = extract_boxscore(game["gameId"], game["date"])
+                    row = extract_boxscore(game["gameId"], game["date"], session, game.get("probables"))
                     if row:
                         new_rows.append(row)
                 except Exception as e:
@@ -146,68 +330,452 @@ def scrape_range(start_date, end_date, output_file="data/mlb_boxscores_full.csv"
         current += timedelta(days=1)
 
     if new_rows:
-        new_df = pd.DataFrame(new_rows)
-
-        if not existing_df.empty:
-            merge_keys = ["Game Date", "Away Team", "Home Team"]
-            existing_df.set_index(merge_keys, inplace=True)
-            new_df.set_index(merge_keys, inplace=True)
-
-            combined = pd.concat([existing_df[~existing_df.index.isin(new_df.index)], new_df]).reset_index()
-        else:
-            combined = new_df.reset_index()
-
-        combined.sort_values(by=["Game Date", "Home Team"], inplace=True)
-
-        # Calculate YRFI
-        if 'Away 1th' in combined.columns and 'Home 1th' in combined.columns:
-            mask = (
-                combined['Away 1th'].notna() & combined['Home 1th'].notna() &
-                (combined['Away 1th'] != "Pending") & (combined['Home 1th'] != "Pending")
-            )
-
-            combined.loc[mask, 'Away 1th'] = combined.loc[mask, 'Away 1th'].apply(lambda x: int(float(x)))
-            combined.loc[mask, 'Home 1th'] = combined.loc[mask, 'Home 1th'].apply(lambda x: int(float(x)))
-
-            combined.loc[mask, 'YRFI'] = (
-                (combined.loc[mask, 'Away 1th'] + combined.loc[mask, 'Home 1th']) > 0
-            ).astype(int)
-
-            print("✅ YRFI column created.")
-        else:
-            print("⚠️ Missing 1st inning columns for YRFI.")
-
-        combined.to_csv(output_file, index=False)
-        print(f"✅ Saved full boxscores to {output_file} ({len(combined)} rows)")
-
-        # Save trimmed 1-5 innings data
-        if all(col in combined.columns for col in [f"Away {i}th" for i in range(1,6)] + [f"Home {i}th" for i in range(1,6)]):
-            mask_1to5 = (
-                combined[[f"Away {i}th" for i in range(1,6)] + [f"Home {i}th" for i in range(1,6)]]
-                .apply(lambda row: all(str(x) != "Pending" for x in row), axis=1)
-            )
+        save_boxscores(new_rows, existing_df, output_file, output_file_1to5, pitcher_file)
+    else:
+        print("ℹ️ No new games found to update.")
 
-            for inning in range(1,6):
-                combined[f"Away {inning}th"] = combined[f"Away {inning}th"].apply(lambda x: int(float(x)) if str(x).replace('.', '', 1).isdigit() else 0)
-                combined[f"Home {inning}th"] = combined[f"Home {inning}th"].apply(lambda x: int(float(x)) if str(x).replace('.', '', 1).isdigit() else 0)
+def scrape_games(scope, output_file="data/mlb_boxscores_full.csv", output_file_1to5="data/mlb_boxscores_1to5.csv",
+                 pitcher_file=PITCHER_LOG_FILE):
+    """Refetch the stored games in a --games scope (settled or not); their dates come from the store."""
+    existing_df = load_boxscores(output_file)
+    if existing_df.empty or "Game ID" not in existing_df.columns:
+        print("⚠️ No stored games with a Game ID to refetch.")
+        return
+    stored = existing_df[scope.mask(existing_df["Game Date"], existing_df["Game ID"])]
+    missing = set(scope.game_ids) - set(stored["Game ID"].astype(int))
+    if missing:
+        print(f"⚠️ Not in the store (scrape their dates with --start/--end): {sorted(missing)}")
 
-            combined.loc[mask_1to5, 'Total_1to5_Runs'] = (
-                combined.loc[mask_1to5, [f"Away {i}th" for i in range(1,6)] + [f"Home {i}th" for i in range(1,6)]]
-                .sum(axis=1)
-            )
+    new_rows = []
+    session = make_session()
+    for game_id, game_date in zip(stored["Game ID"].astype(int), stored["Game Date"]):
+        try:
+            row = extract_boxscore(str(game_id), game_date, session)
+            if row:
+                new_rows.append(row)
+        except Exception as e:
+            print(f"❌ Error parsing {game_id}: {e}")
+        time.sleep(0.75)
 
-            combined[['Game Date', 'Away Team', 'Home Team', 'Total_1to5_Runs']].dropna().to_csv(output_file_1to5, index=False)
-            print(f"✅ Saved 1-5 innings totals to {output_file_1to5}")
-        else:
-            print("⚠️ Missing inning columns to calculate 1-5 total.")
+    if new_rows:
+        save_boxscores(new_rows, existing_df, output_file, output_file_1to5, pitcher_file)
+    else:
+        print("ℹ️ No games refetched.")
+
+def write_csv_atomic(df, path):
+    """Write to a temp file and rename over ``path``, so an interrupted write never leaves half a CSV."""
+    tmp_path = f"{path}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+def save_boxscores(new_rows, existing_df, output_file="data/mlb_boxscores_full.csv", output_file_1to5="data/mlb_boxscores_1to5.csv",
+                   pitcher_file=PITCHER_LOG_FILE):
+    pitching = [line for row in new_rows for line in row.get("Pitching", [])]
+    new_df = pd.DataFrame(new_rows).drop(columns="Pitching", errors="ignore")
+    if "Game ID" not in new_df.columns:
+        new_df["Game ID"] = pd.NA
+    new_df["Game ID"] = new_df["Game ID"].astype("Int64")
+
+    if not existing_df.empty:
+        if "Game ID" not in existing_df.columns:
+            existing_df["Game ID"] = pd.NA
+        existing_df["Game ID"] = existing_df["Game ID"].astype("Int64")
+
+        # Upsert on Game ID, so doubleheaders stay two rows. Rows on either side without
+        # an ID fall back to the old (date, away, home) key.
+        team_keys = ["Game Date", "Away Team", "Home Team"]
+        same_id = existing_df["Game ID"].isin(new_df["Game ID"].dropna())
+        existing_keys = pd.MultiIndex.from_frame(existing_df[team_keys].astype(str))
+        legacy_match = existing_df["Game ID"].isna() & existing_keys.isin(pd.MultiIndex.from_frame(new_df[team_keys].astype(str)))
+        keyless = new_df[new_df["Game ID"].isna()]
+        keyless_match = existing_keys.isin(pd.MultiIndex.from_frame(keyless[team_keys].astype(str))) if not keyless.empty else False
+
+        combined = pd.concat([existing_df[~(same_id | legacy_match | keyless_match)], new_df], ignore_index=True)
+    else:
+        combined = new_df
+
+    combined.sort_values(by=["Game Date", "Home Team", "Game ID"], inplace=True)
+    combined["Away Team ID"] = team_ids(combined["Away Team"])
+    combined["Home Team ID"] = team_ids(combined["Home Team"])
+    for col in ["Away SP ID", "Home SP ID", "Pitching Parsed"]:
+        if col in combined.columns:
+            combined[col] = pd.to_numeric(combined[col], errors="coerce").astype("Int64")
+
+    # Calculate YRFI
+    if 'Away 1th' in combined.columns and 'Home 1th' in combined.columns:
+        mask = (
+            combined['Away 1th'].notna() & combined['Home 1th'].notna() &
+            (combined['Away 1th'] != "Pending") & (combined['Home 1th'] != "Pending")
+        )
+
+        combined.loc[mask, 'Away 1th'] = combined.loc[mask, 'Away 1th'].apply(lambda x: int(float(x)))
+        combined.loc[mask, 'Home 1th'] = combined.loc[mask, 'Home 1th'].apply(lambda x: int(float(x)))
+
+        combined.loc[mask, 'YRFI'] = (
+            (combined.loc[mask, 'Away 1th'] + combined.loc[mask, 'Home 1th']) > 0
+        ).astype(int)
+
+        print("✅ YRFI column created.")
+    else:
+        print("⚠️ Missing 1st inning columns for YRFI.")
+
+    write_csv_atomic(combined, output_file)
+    print(f"✅ Saved full boxscores to {output_file} ({len(combined)} rows)")
+    if pitching:
+        print(f"✅ Saved {save_pitching(pitching, pitcher_file)} pitching lines to {pitcher_file}")
+
+    # Save trimmed 1-5 innings data
+    if all(col in combined.columns for col in [f"Away {i}th" for i in range(1,6)] + [f"Home {i}th" for i in range(1,6)]):
+        mask_1to5 = (
+            combined[[f"Away {i}th" for i in range(1,6)] + [f"Home {i}th" for i in range(1,6)]]
+            .apply(lambda row: all(str(x) != "Pending" for x in row), axis=1)
+        )
+
+        for inning in range(1,6):
+            combined[f"Away {inning}th"] = combined[f"Away {inning}th"].apply(lambda x: int(float(x)) if str(x).replace('.', '', 1).isdigit() else 0)
+            combined[f"Home {inning}th"] = combined[f"Home {inning}th"].apply(lambda x: int(float(x)) if str(x).replace('.', '', 1).isdigit() else 0)
+
+        combined.loc[mask_1to5, 'Total_1to5_Runs'] = (
+            combined.loc[mask_1to5, [f"Away {i}th" for i in range(1,6)] + [f"Home {i}th" for i in range(1,6)]]
+            .sum(axis=1)
+        )
+
+        write_csv_atomic(
+            combined[['Game ID', 'Game Date', 'Away Team', 'Home Team', 'Total_1to5_Runs']].dropna(subset=['Total_1to5_Runs']),
+            output_file_1to5,
+        )
+        print(f"✅ Saved 1-5 innings totals to {output_file_1to5}")
+    else:
+        print("⚠️ Missing inning columns to calculate 1-5 total.")
+
+def backfill_game_ids(output_file="data/mlb_boxscores_full.csv"):
+    """Fill in Game ID for rows scraped before it was stored, matching scoreboard events on teams.
+
+    When a matchup appears twice on one date (doubleheader) events are assigned in
+    scoreboard order.
+    """
+    df = load_boxscores(output_file)
+    if df.empty:
+        return
+    if "Game ID" not in df.columns:
+        df["Game ID"] = pd.NA
+    df["Game ID"] = df["Game ID"].astype("Int64")
+
+    missing = df["Game ID"].isna()
+    session = make_session()
+    print(f"🔎 {int(missing.sum())} rows without Game ID across {df.loc[missing, 'Game Date'].nunique()} dates.")
+    for game_date in sorted(df.loc[missing, "Game Date"].unique()):
+        try:
+            events = get_game_ids(datetime.strptime(game_date, "%Y-%m-%d"), session)
+        except Exception as e:
+            print(f"❌ Scoreboard failed for {game_date}: {e}")
+            continue
+
+        taken = set(df["Game ID"].dropna().astype(int))
+        for idx in df.index[missing & (df["Game Date"] == game_date)]:
+            away, home = team_id(df.at[idx, "Away Team"]), team_id(df.at[idx, "Home Team"])
+            for event in events:
+                event_id = int(event["gameId"])
+                if event_id in taken:
+                    continue
+                try:
+                    matched = team_id(event["away"]) == away and team_id(event["home"]) == home
+                except ValueError:  # exhibition / All-Star events
+                    continue
+                if matched:
+                    df.at[idx, "Game ID"] = event_id
+                    taken.add(event_id)
+                    break
+        time.sleep(0.75)
+
+    df.to_csv(output_file, index=False)
+    print(f"✅ Game IDs filled: {int(df['Game ID'].notna().sum())}/{len(df)} rows.")
+
+# === Resumable backfill ===
+
+def load_checkpoint(checkpoint_file, start_date, end_date):
+    """Last completed date for this exact range, or None to start from the beginning."""
+    if not os.path.exists(checkpoint_file):
+        return None
+    with open(checkpoint_file) as f:
+        checkpoint = json.load(f)
+    if (checkpoint.get("start"), checkpoint.get("end")) != (start_date, end_date):
+        print(f"ℹ️ Checkpoint is for {checkpoint.get('start')} to {checkpoint.get('end')}; starting this range fresh.")
+        return None
+    return checkpoint.get("completed_through")
+
+def save_checkpoint(checkpoint_file, start_date, end_date, completed_through, games_written):
+    checkpoint = {
+        "start": start_date,
+        "end": end_date,
+        "completed_through": completed_through,
+        "games_written": games_written,
+        "updated": datetime.now().isoformat(timespec="seconds"),
+    }
+    tmp_path = f"{checkpoint_file}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, checkpoint_file)
+
+def fetch_with_retry(fetch, retries=3, backoff=5.0):
+    """Call fetch(), retrying network errors with exponential backoff; re-raises the last one."""
+    for attempt in range(retries + 1):
+        try:
+            return fetch()
+        except requests.RequestException as e:
+            if attempt == retries:
+                raise
+            wait = backoff * 2 ** attempt
+            print(f"⚠️ {e} - retrying in {wait:.0f}s")
+            time.sleep(wait)
+
+def backfill(start_date, end_date, chunk_days=7, delay=0.75, backoff=5.0, restart=False,
+             checkpoint_file=CHECKPOINT_FILE, output_file="data/mlb_boxscores_full.csv",
+             output_file_1to5="data/mlb_boxscores_1to5.csv", pitcher_file=PITCHER_LOG_FILE):
+    """Rebuild the store for a date range as a restartable job.
+
+    Dates are processed ``chunk_days`` at a time with one scoreboard request per chunk. Each
+    day's games are upserted into the store and the checkpoint is advanced only after that
+    write, so a crash, block or Ctrl-C loses at most the day in progress and the next run
+    with the same --start/--end resumes from the day after the checkpoint. A network
+    failure that survives the retries stops the job without checkpointing the day; a page
+    that fails to parse is logged and skipped as in scrape_range. Games already settled in
+    the store are not fetched again.
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    completed = None if restart else load_checkpoint(checkpoint_file, start_date, end_date)
+    current = start if completed is None else datetime.strptime(completed, "%Y-%m-%d") + timedelta(days=1)
+    if current > end:
+        print(f"✅ Backfill {start_date} to {end_date} already complete.")
+        return
+    if completed:
+        print(f"⏩ Resuming after checkpoint {completed}.")
+
+    total_days = (end - current).days + 1
+    print(f"🚀 Backfilling {total_days} days in {-(-total_days // chunk_days)} chunks of {chunk_days} "
+          f"(~{total_days * 15} boxscore pages at {delay}s each at most).")
+
+    session = make_session()
+    existing_df = load_boxscores(output_file)
+    games_written = 0
+    days_done = 0
+    job_start = time.time()
 
+    while current <= end:
+        chunk_end = min(current + timedelta(days=chunk_days - 1), end)
+        slates = fetch_with_retry(lambda: get_game_ids_range(current, chunk_end, session), backoff=backoff)
+
+        for date_str, games in slates.items():
+            rows = []
+            for game in games:
+                if not needs_scrape(existing_df, game):
+                    continue
+                try:
+                    content = fetch_with_retry(lambda: fetch_boxscore_page(game["gameId"], session), backoff=backoff)
+                    row = parse_boxscore(content, date_str, game["gameId"], game.get("probables"))
+                except requests.RequestException:
+                    if rows:
+                        save_boxscores(rows, existing_df, output_file, output_file_1to5, pitcher_file)
+                    print(f"⛔ Network failure on {date_str}; rerun the same command to resume from this day.")
+                    raise
+                except Exception as e:
+                    print(f"❌ Error parsing {game['gameId']}: {e}")
+                    row = None
+                if row:
+                    rows.append(row)
+                time.sleep(delay)
+
+            if rows:
+                save_boxscores(rows, existing_df, output_file, output_file_1to5, pitcher_file)
+                existing_df = load_boxscores(output_file)
+                games_written += len(rows)
+            save_checkpoint(checkpoint_file, start_date, end_date, date_str, games_written)
+
+            days_done += 1
+            elapsed = time.time() - job_start
+            eta = elapsed / days_done * (total_days - days_done)
+            print(f"📌 {date_str}: {len(rows)}/{len(games)} games written "
+                  f"(day {days_done}/{total_days}, ~{eta / 60:.1f} min left)")
+
+        current = chunk_end + timedelta(days=1)
+
+    print(f"🏁 Backfill {start_date} to {end_date} complete: {games_written} games written.")
+
+# === Live watch mode ===
+
+def mark_unplayed_innings(row, period):
+    """Reset innings that have not finished yet to 'Pending' so a live page is never read as settled."""
+    for inning in range(period, 10):
+        row[f"Away {inning}th"] = "Pending"
+        row[f"Home {inning}th"] = "Pending"
+    return row
+
+class SlateWatcher:
+    """Scoreboard polling state for one slate: what each game looked like last time and which are settled.
+
+    Only games that are live past the 5th (or just went final) are fetched, and only when
+    their scoreboard status moved on since the last one written; boxscore pages are requested
+    conditionally, so an unchanged game costs one cheap 304 at most. A status counts as seen
+    once its row is written: a failed fetch or parse is retried on the next poll, up to
+    FETCH_ATTEMPTS times, after which a final game is given up on (settled without a row).
+    Validators are only kept for pages that were written, so a 304 always means "nothing
+    new since the stored row".
+    """
+
+    FETCH_ATTEMPTS = 3
+
+    def __init__(self, output_file="data/mlb_boxscores_full.csv", output_file_1to5="data/mlb_boxscores_1to5.csv", session=None,
+                 pitcher_file=PITCHER_LOG_FILE):
+        self.output_file = output_file
+        self.output_file_1to5 = output_file_1to5
+        self.pitcher_file = pitcher_file
+        self.session = session or make_session()
+        self.validators = {}
+        self.last_seen = {}
+        self.failures = {}
+        self.settled = set()
+
+    def poll(self, slate=None):
+        """One scoreboard poll for ``slate`` (default today in Eastern time); upserts changed games,
+        returns (games, rows written)."""
+        games = get_game_ids(slate or datetime.now(SLATE_TZ), self.session)
+
+        updated, updated_ids = [], []
+        for game in games:
+            game_id = game["gameId"]
+            if game_id in self.settled:
+                continue
+
+            live_past_5th = game["state"] == "in" and game["period"] > 5
+            if not (live_past_5th or game["state"] == "post"):
+                continue
+
+            status = (game["state"], game["period"], game["detail"])
+            if self.last_seen.get(game_id) == status:
+                continue
+
+            try:
+                content = fetch_boxscore_page(game_id, self.session, self.validators)
+                if content is None:
+                    # Same page as the row already written: ask again (conditionally) next poll
+                    continue
+                row = parse_boxscore(content, game["date"], game_id, game.get("probables"))
+            except Exception as e:
+                print(f"❌ Error parsing {game_id}: {e}")
+                row = None
+
+            if not row:
+                # Never written, so its validators must not turn the next fetch into a 304
+                self.validators.pop(game_id, None)
+                self.fetch_failed(game_id, game, status)
+                continue
+            if game["state"] == "in":
+                row = mark_unplayed_innings(row, game["period"])
+            else:
+                self.settled.add(game_id)
+            self.last_seen[game_id] = status
+            self.failures.pop(game_id, None)
+            print(f"🔄 {game['detail']}: {row['Away Team']} @ {row['Home Team']}")
+            updated.append(row)
+            updated_ids.append(game_id)
+
+        if updated:
+            try:
+                save_boxscores(updated, load_boxscores(self.output_file), self.output_file, self.output_file_1to5, self.pitcher_file)
+            except Exception:
+                for game_id in updated_ids:  # nothing was written: fetch these in full again next poll
+                    self.last_seen.pop(game_id, None)
+                    self.validators.pop(game_id, None)
+                    self.settled.discard(game_id)
+                raise
+        return games, len(updated)
+
+    def fetch_failed(self, game_id, game, status):
+        """Count a failed fetch; after FETCH_ATTEMPTS in a row the status is skipped (a final game is settled)."""
+        self.failures[game_id] = self.failures.get(game_id, 0) + 1
+        if self.failures[game_id] < self.FETCH_ATTEMPTS:
+            return
+        print(f"⚠️ {game_id} ({game['detail']}): no row after {self.FETCH_ATTEMPTS} attempts, skipped")
+        self.last_seen[game_id] = status
+        self.failures.pop(game_id)
+        if game["state"] == "post":
+            self.settled.add(game_id)
+
+    def done(self, games):
+        """True once every game on the slate is final and settled (or given up on)."""
+        return all(g["state"] == "post" and g["gameId"] in self.settled for g in games)
+
+def watch(poll_seconds=20, output_file="data/mlb_boxscores_full.csv", output_file_1to5="data/mlb_boxscores_1to5.csv"):
+    """Poll today's scoreboard and upsert games as soon as their first five innings settle.
+
+    The slate is today's in Eastern time when the watch starts, past midnight too. Stops once
+    every game on it is final and written, or at once when it has no games.
+    """
+    watcher = SlateWatcher(output_file, output_file_1to5)
+    slate = datetime.now(SLATE_TZ)
+
+    while True:
+        try:
+            games, _ = watcher.poll(slate)
+        except Exception as e:
+            print(f"❌ Scoreboard poll failed: {e}")
+            time.sleep(poll_seconds)
+            continue
+
+        if not games:
+            print(f"⏭️ No games on the {slate:%Y-%m-%d} slate.")
+            break
+        if watcher.done(games):
+            print("🏁 All games on the slate are final.")
+            break
+
+        time.sleep(poll_seconds)
+
+@profiled
+def main(argv=None):
+    global RECORD_DIR
+    parser = argparse.ArgumentParser(description="Scrape ESPN MLB boxscores.")
+    parser.add_argument("--watch", action="store_true", help="poll today's slate and upsert games as innings 1-5 settle")
+    parser.add_argument("--poll", type=int, default=20, help="seconds between scoreboard polls in --watch mode")
+    parser.add_argument("--backfill-game-ids", action="store_true", help="fill Game ID for rows stored before it was tracked")
+    parser.add_argument("--backfill", action="store_true", help="resumable, checkpointed scrape of --start to --end")
+    add_scope_arguments(parser)  # without --backfill: refetch exactly these games, settled or not
+    parser.add_argument("--chunk-days", type=int, default=7, help="dates per scoreboard request in --backfill")
+    parser.add_argument("--restart", action="store_true", help="ignore the --backfill checkpoint and start from --start")
+    parser.add_argument("--base-url", help="send all ESPN requests here, e.g. a replay.py server (or set ESPN_BASE_URL)")
+    parser.add_argument("--record", metavar="DIR", help="also save every response as a replay.py fixture in DIR")
+    args = parser.parse_args(argv)
+
+    if args.base_url:
+        set_base_url(args.base_url)
+    RECORD_DIR = args.record
+
+    if args.backfill:
+        if not (args.start and args.end):
+            parser.error("--backfill needs --start and --end")
+        backfill(args.start, args.end, chunk_days=args.chunk_days, restart=args.restart)
+    elif args.backfill_game_ids:
+        backfill_game_ids()
+    elif args.watch:
+        print(f"👀 Watching today's slate (every {args.poll}s)...")
+        watch(poll_seconds=args.poll)
+    elif args.games:
+        scope = Scope.from_args(args)
+        print(f"🚀 Refetching boxscores: {scope}")
+        scrape_games(scope)
+    elif args.start or args.end:
+        start_date = args.start or args.end
+        end_date = args.end or datetime.today().strftime("%Y-%m-%d")
+        print(f"🚀 Refetching boxscores for: {start_date} to {end_date}")
+        scrape_range(start_date, end_date, refetch=True)
     else:
-        print("ℹ️ No new games found to update.")
+        today = datetime.today()
+        start_date = (today - timedelta(days=1)).strftime("%Y-%m-%d")
+        end_date = (today + timedelta(days=1)).strftime("%Y-%m-%d")
 
-if __name__ == "__main__":
-    today = datetime.today()
-    start_date = (today - timedelta(days=1)).strftime("%Y-%m-%d")
-    end_date = (today + timedelta(days=1)).strftime("%Y-%m-%d")
+        print(f"🚀 Scraping boxscores for: {start_date} to {end_date}")
+        scrape_range(start_date, end_date)
 
-    print(f"🚀 Scraping boxscores for: {start_date} to {end_date}")
-    scrape_range(start_date, end_date)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Per-pitcher game log and pre-game starting-pitcher features.
+
+get_scores_full.py reads every pitcher's line (IP, H, R, ER, BB, K, HR, pitches) from
+the boxscore page it already downloads and upserts it into data/mlb_pitcher_log.csv,
+one row per pitcher per game. ``PitcherLog`` holds the log sorted by (pitcher ID, date)
+with running totals over each pitcher's starts, so the aggregates over a pitcher's last
+``w`` starts before any date are one binary search and a difference of two cumulative sums.
+A whole slate - or the whole history, for training - is a single vectorized lookup:
+
+    log = PitcherLog.load()
+    starter_features(log, games["Game_Date"], games["Home_SP_ID"], games["Away_SP_ID"])
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+PITCHER_LOG_FILE = "data/mlb_pitcher_log.csv"
+LOG_COLUMNS = ["Game ID", "Game Date", "Side", "Team ID", "Pitcher ID", "Pitcher", "Starter",
+               "IP", "Outs", "H", "R", "ER", "BB", "K", "HR", "PC"]
+COUNT_STATS = ["Outs", "H", "R", "ER", "BB", "K", "HR", "PC"]
+STARTER_WINDOWS = (3, 10)
+KEY_STRIDE = 1 << 20  # (pitcher ID, day) -> one sortable int64: pitcher * stride + days since epoch
+
+# rate -> (counting stats summed, scale per out)
+STARTER_RATES = {
+    "ERA": (["ER"], 27),
+    "WHIP": (["H", "BB"], 3),
+    "K9": (["K"], 27),
+    "BB9": (["BB"], 27),
+}
+STARTER_STATS = list(STARTER_RATES) + ["Outs"]
+STARTER_COLUMNS = [f"{side}_SP_{name}" for side in ["Home", "Away"]
+                   for name in [f"{stat}_L{w}" for w in STARTER_WINDOWS for stat in STARTER_STATS] + ["Rest_Days"]]
+
+
+def innings_to_outs(ip):
+    """Boxscore innings ("5.2" = five and two thirds) as outs; NaN when unreadable."""
+    ip = pd.to_numeric(pd.Series(ip, dtype=object), errors="coerce").to_numpy(dtype=float)
+    whole = np.floor(ip)
+    return whole * 3 + np.round((ip - whole) * 10)
+
+
+def save_pitching(lines, path=PITCHER_LOG_FILE):
+    """Upsert pitching lines into the log: every game in ``lines`` replaces what the log had for it."""
+    new = pd.DataFrame(lines, columns=LOG_COLUMNS)
+    new = new[new["Game ID"].notna()].copy()
+    if new.empty:
+        return 0
+    new["Outs"] = innings_to_outs(new["IP"])
+    for stat in COUNT_STATS[1:]:
+        new[stat] = pd.to_numeric(new[stat], errors="coerce")
+
+    if os.path.exists(path):
+        log = pd.read_csv(path)
+        log = log[~log["Game ID"].isin(new["Game ID"].astype("int64"))]
+        combined = pd.concat([log, new], ignore_index=True)
+    else:
+        combined = new
+    for col in ["Game ID", "Team ID", "Pitcher ID"]:
+        combined[col] = combined[col].astype("int64")
+    combined = combined.sort_values(["Pitcher ID", "Game Date", "Game ID"])
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    combined.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return len(new)
+
+
+class PitcherLog:
+    def __init__(self, log):
+        pitcher = log["Pitcher ID"].to_numpy(dtype=np.int64)
+        day = np.asarray(pd.to_datetime(log["Game Date"]), dtype="datetime64[D]").astype(np.int64)
+        order = np.lexsort((log["Game ID"].to_numpy(dtype=np.int64), day, pitcher))
+
+        # Every appearance, for rest days; starts only, for the starter aggregates
+        self.keys = (pitcher * KEY_STRIDE + day)[order]
+        starter = log["Starter"].to_numpy(dtype=bool)[order]
+        self.start_keys = self.keys[starter]
+        self.prefix = {
+            stat: np.concatenate([[0.0], np.cumsum(np.nan_to_num(log[stat].to_numpy(dtype=float)[order][starter]))])
+            for stat in COUNT_STATS
+        }
+
+    @classmethod
+    def load(cls, path=PITCHER_LOG_FILE):
+        """The saved log, or an empty one (every feature NaN) before anything was scraped."""
+        if not os.path.exists(path):
+            return cls(pd.DataFrame(columns=LOG_COLUMNS))
+        return cls(pd.read_csv(path))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, pitcher_ids, dates, windows=STARTER_WINDOWS):
+        """Each pitcher's aggregates over the last ``w`` starts strictly before ``dates``, plus days
+        since the last appearance. Unknown / missing pitchers and first starts get NaN."""
+        pitcher = pd.to_numeric(pd.Series(pitcher_ids, dtype=object), errors="coerce").to_numpy(dtype=float)
+        known = ~np.isnan(pitcher)
+        pitcher = np.where(known, pitcher, 0).astype(np.int64)
+        day = np.asarray(pd.to_datetime(dates), dtype="datetime64[D]").astype(np.int64)
+        query = pitcher * KEY_STRIDE + day
+
+        hi = np.searchsorted(self.start_keys, query, side="left")           # starts before the date
+        first = np.searchsorted(self.start_keys, pitcher * KEY_STRIDE)      # the pitcher's first start
+
+        out = {}
+        for w in windows:
+            lo = np.maximum(hi - w, first)
+            starts = np.where(known, hi - lo, 0)
+            sums = {stat: self.prefix[stat][hi] - self.prefix[stat][lo] for stat in COUNT_STATS}
+            with np.errstate(invalid="ignore", divide="ignore"):
+                for rate, (stats, scale) in STARTER_RATES.items():
+                    out[f"SP_{rate}_L{w}"] = np.where(sums["Outs"] > 0, scale * sum(sums[s] for s in stats) / sums["Outs"], np.nan)
+                out[f"SP_Outs_L{w}"] = np.where(starts > 0, sums["Outs"] / starts, np.nan)
+
+        last = np.searchsorted(self.keys, query, side="left") - 1
+        previous = self.keys[np.maximum(last, 0)] if len(self.keys) else np.zeros(len(query), dtype=np.int64)
+        seen = known & (last >= 0) & (previous // KEY_STRIDE == pitcher)
+        out["SP_Rest_Days"] = np.where(seen, day - previous % KEY_STRIDE, np.nan)
+        return pd.DataFrame(out)
+
+
+def starter_features(log, dates, home_sp_ids, away_sp_ids, windows=STARTER_WINDOWS):
+    """Both starters' pre-game aggregates for every game (STARTER_COLUMNS with the default windows), from one lookup."""
+    n = len(dates)
+    both = log.lookup(np.concatenate([np.asarray(home_sp_ids, dtype=object), np.asarray(away_sp_ids, dtype=object)]),
+                      np.concatenate([np.asarray(pd.to_datetime(dates))] * 2), windows)
+    home = both.iloc[:n].reset_index(drop=True).add_prefix("Home_")
+    away = both.iloc[n:].reset_index(drop=True).add_prefix("Away_")
+    return pd.concat([home, away], axis=1)
@@ -1,105 +1,192 @@
-﻿import pandas as pd
-import joblib
-
-# === Load model and scaler ===
-model = joblib.load("models/rf_model_over_4_5.joblib")
-scaler = joblib.load("models/scaler_over_4_5.joblib")
-
-# === Load game data ===
-games = pd.read_csv("data/mlb_boxscores_full.csv")
-games.columns = games.columns.str.strip().str.replace(" ", "_")
-games["Game_Date"] = pd.to_datetime(games["Game_Date"])
-
-# === Map team names to 3-letter codes ===
-TEAM_NAME_MAP = {
-    "Athletics": "OAK", "Atlanta Braves": "ATL", "Baltimore Orioles": "BAL", "Boston Red Sox": "BOS",
-    "Chicago Cubs": "CHC", "Chicago White Sox": "CHW", "Cincinnati Reds": "CIN", "Cleveland Guardians": "CLE",
-    "Colorado Rockies": "COL", "Detroit Tigers": "DET", "Houston Astros": "HOU", "Kansas City Royals": "KCR",
-    "Los Angeles Angels": "LAA", "Los Angeles Dodgers": "LAD", "Miami Marlins": "MIA", "Milwaukee Brewers": "MIL",
-    "Minnesota Twins": "MIN", "New York Mets": "NYM", "New York Yankees": "NYY", "Oakland Athletics": "OAK",
-    "Philadelphia Phillies": "PHI", "Pittsburgh Pirates": "PIT", "San Diego Padres": "SDP", "San Francisco Giants": "SFG",
-    "Seattle Mariners": "SEA", "St. Louis Cardinals": "STL", "Tampa Bay Rays": "TBR", "Texas Rangers": "TEX",
-    "Toronto Blue Jays": "TOR", "Washington Nationals": "WSN"
-}
-
-games["Home_Team"] = games["Home_Team"].map(TEAM_NAME_MAP)
-games["Away_Team"] = games["Away_Team"].map(TEAM_NAME_MAP)
-
-# === Identify pending games
-innings_cols = [col for col in games.columns if any(s in col for s in ["1th", "2th", "3th", "4th", "5th"])]
-games["is_pending"] = games[innings_cols].apply(lambda row: row.astype(str).str.contains("Pending", case=False).any(), axis=1)
-
-# === Calculate 1-5 inning scores
-games["Runs_1_5_Away"] = games[[f"Away_{i}th" for i in range(1, 6)]].apply(pd.to_numeric, errors="coerce").sum(axis=1)
-games["Runs_1_5_Home"] = games[[f"Home_{i}th" for i in range(1, 6)]].apply(pd.to_numeric, errors="coerce").sum(axis=1)
-
-# === Rolling 7-game averages
-long_home = games[["Game_Date", "Home_Team", "Runs_1_5_Home"]].rename(columns={"Home_Team": "Team", "Runs_1_5_Home": "Runs_1_5"})
-long_away = games[["Game_Date", "Away_Team", "Runs_1_5_Away"]].rename(columns={"Away_Team": "Team", "Runs_1_5_Away": "Runs_1_5"})
-long_games = pd.concat([long_home, long_away]).dropna().sort_values(["Team", "Game_Date"])
-long_games["Avg_Runs_1_5_Last7"] = (
-    long_games.groupby("Team")["Runs_1_5"].transform(lambda x: x.shift().rolling(7, min_periods=1).mean())
-)
-
-games = games.merge(
-    long_games[["Game_Date", "Team", "Avg_Runs_1_5_Last7"]],
-    left_on=["Game_Date", "Home_Team"], right_on=["Game_Date", "Team"],
-    how="left"
-).rename(columns={"Avg_Runs_1_5_Last7": "Home_Last7_Runs_1_5"}).drop(columns=["Team"])
-
-games = games.merge(
-    long_games[["Game_Date", "Team", "Avg_Runs_1_5_Last7"]],
-    left_on=["Game_Date", "Away_Team"], right_on=["Game_Date", "Team"],
-    how="left"
-).rename(columns={"Avg_Runs_1_5_Last7": "Away_Last7_Runs_1_5"}).drop(columns=["Team"])
-
-# === Load team stats
-standard = pd.read_csv("downloads/team_standard.csv")
-advanced = pd.read_csv("downloads/team_advanced.csv")
-team_stats = pd.merge(standard, advanced, on="Tm", suffixes=("_std", "_adv")).rename(columns={"Tm": "Team"})
-
-# === Merge full-season stats
-home_merged = games.merge(team_stats, left_on="Home_Team", right_on="Team", how="left").add_prefix("home_")
-away_merged = games.merge(team_stats, left_on="Away_Team", right_on="Team", how="left").add_prefix("away_")
-
-games_pred = pd.concat([
-    games.reset_index(drop=True),
-    home_merged.drop(columns=["home_Home_Team"], errors="ignore").reset_index(drop=True),
-    away_merged.drop(columns=["away_Away_Team"], errors="ignore").reset_index(drop=True)
-], axis=1)
-
-# === Build features
-model_features = [col for col in games_pred.columns if any(stat in col for stat in [
-    "BB%", "K%", "ISO", "wRC+", "OBP", "SLG", "RBI", "AVG", "OPS"
-])]
-model_features += ["Home_Last7_Runs_1_5", "Away_Last7_Runs_1_5"]
-features = games_pred[model_features].fillna(0)
-
-# === Predict
-X_scaled = scaler.transform(features)
-predictions = model.predict(X_scaled)
-probs = model.predict_proba(X_scaled)
-
-games_pred["Predicted_Over_4_5"] = predictions
-games_pred["Confidence"] = probs.max(axis=1).round(4)
-games_pred["Model_Total"] = (probs[:, 1] * 6).round(2)
-games_pred["Actual_Over_4_5"] = None
-
-# === Add actuals for completed games
-games_pred.loc[~games_pred["is_pending"], "Runs_1_5"] = games_pred.loc[~games_pred["is_pending"], innings_cols].apply(pd.to_numeric, errors="coerce").sum(axis=1)
-games_pred.loc[~games_pred["is_pending"], "Actual_Over_4_5"] = (games_pred.loc[~games_pred["is_pending"], "Runs_1_5"] > 4.5).astype(int)
-
-# === Save
-games_pred[[
-    "Game_Date", "Home_Team", "Away_Team",
-    "Predicted_Over_4_5", "Actual_Over_4_5", "Runs_1_5",
-    "Confidence", "Model_Total", "is_pending"
-]].to_csv("data/mlb_predictions.csv", index=False)
-
-
-print("✅ Predictions saved to mlb_predictions.csv")
-
-# === Evaluate accuracy
-played = games_pred[~games_pred["is_pending"]].dropna(subset=["Actual_Over_4_5"])
-acc = (played["Predicted_Over_4_5"] == played["Actual_Over_4_5"]).mean()
-print(f"\n🎯 Accuracy on played games: {acc:.2%}")
+﻿import os
+import argparse
+import functools
+
+import numpy as np
+import pandas as pd
+
+from run_sim import RunSimulator, SLATE_PATHS, distribution_columns
+from features import load_games, load_team_stats, team_stat_features, rolling_form, FORM_COLUMNS, GAME_COLUMNS
+from pitchers import PitcherLog, starter_features
+from team_registry import team_codes
+from scope import Scope, add_scope_arguments, read_scoped, upsert_csv
+from profiling import profiled
+
+MODEL_FILE = "models/rf_model_over_4_5.joblib"
+SCALER_FILE = "models/scaler_over_4_5.joblib"
+DISTRIBUTIONS_FILE = "data/mlb_run_distributions.csv"
+
+@functools.lru_cache(maxsize=4)
+def _load_artifact(path, mtime_ns):
+    import joblib  # pulls in sklearn when the pickle is read
+    return joblib.load(path)
+
+def load_model():
+    """(model, scaler), unpickled once per process and again only when a file changes on disk."""
+    return tuple(_load_artifact(path, os.stat(path).st_mtime_ns) for path in (MODEL_FILE, SCALER_FILE))
+
+def game_keys(frame):
+    """Game_ID, or date + teams for rows stored before Game ID was tracked - numbered in file
+    order, so the two games of such a doubleheader stay apart."""
+    legacy = frame["Game_Date"].astype(str).str[:10] + "_" + frame["Home_Team"].astype(str) + "_" + frame["Away_Team"].astype(str)
+    keys = frame["Game_ID"].astype("Int64").astype(str).where(frame["Game_ID"].notna(), legacy)
+    return (keys + "#" + keys.groupby(keys).cumcount().astype(str)).to_numpy()
+
+def stored_distributions(path, scope, games, pending):
+    """The saved run distribution of every settled game in ``games`` whose Sim_Mean (its expected
+    runs) is unchanged; NaN rows for the rest, which need simulating."""
+    dist = pd.DataFrame(index=games.index, columns=distribution_columns(), dtype=float)
+    if not os.path.exists(path):
+        return dist
+    stored = read_scoped(path, scope, "Game_Date", "Game_ID")
+    if "Sim_Mean" not in stored.columns or not set(dist.columns) <= set(stored.columns):
+        return dist  # written with another simulator layout
+    stored.index = game_keys(stored)
+    saved = stored.reindex(game_keys(games))
+    same = np.isclose(saved["Sim_Mean"].to_numpy(dtype=float), games["Sim_Mean"].to_numpy(dtype=float), equal_nan=True)
+    keep = ~pending & saved.index.isin(stored.index) & same
+    dist.loc[keep] = saved.loc[keep, dist.columns].to_numpy(dtype=float)
+    return dist
+
+@profiled
+def main(argv=None):
+    """Predict the stored games in scope (every game by default) -> data/mlb_predictions.csv, plus
+    explanations and run distributions. The whole store feeds the pre-game features; only the
+    games in scope are predicted, explained and simulated, and written back as upserts."""
+    parser = argparse.ArgumentParser(description="Predict Over 4.5 runs in innings 1-5 for the stored games.")
+    add_scope_arguments(parser)
+    scope = Scope.from_args(parser.parse_args(argv))
+    from explain import TreePathExplainer  # scipy, only needed here
+    from ratings import pregame_ratings, RATINGS_STATE_FILE
+    from comparables import save_comparables, COMPARABLES_FILE
+    from drift import DriftMonitor
+
+    # === Load model and scaler ===
+    model, scaler = load_model()
+
+    # === Load game data (team IDs come from the shared registry) ===
+    games = load_games("data/mlb_boxscores_full.csv", GAME_COLUMNS)
+    games["Home_Team"] = team_codes(games["Home_Team_ID"])
+    games["Away_Team"] = team_codes(games["Away_Team_ID"])
+    innings_cols = [col for col in games.columns if any(s in col for s in ["1th", "2th", "3th", "4th", "5th"])]
+
+    # === Calculate 1-5 inning scores (NaN until all five innings are in)
+    games["Runs_1_5_Away"] = games[[f"Away_{i}th" for i in range(1, 6)]].apply(pd.to_numeric, errors="coerce").sum(axis=1, min_count=5)
+    games["Runs_1_5_Home"] = games[[f"Home_{i}th" for i in range(1, 6)]].apply(pd.to_numeric, errors="coerce").sum(axis=1, min_count=5)
+
+    # === Pre-game rolling form (every window; the model picks the columns it was trained on)
+    form = rolling_form(
+        games["Game_Date"], games["Home_Team_ID"], games["Away_Team_ID"], games["Runs_1_5_Home"], games["Runs_1_5_Away"]
+    )
+    games["Home_Last7_Runs_1_5"] = form["Home_Form_Scored_L7"]
+    games["Away_Last7_Runs_1_5"] = form["Away_Form_Scored_L7"]
+
+    # === Opponent-adjusted ratings before each game (resumes from the last run's solution)
+    ratings = pregame_ratings(
+        games["Game_Date"], games["Home_Team_ID"], games["Away_Team_ID"], games["Runs_1_5_Home"], games["Runs_1_5_Away"],
+        state_file=RATINGS_STATE_FILE,
+    )
+
+    # === Both starters' pre-game lines, one lookup in the pitcher log for every game
+    starters = starter_features(PitcherLog.load(), games["Game_Date"], games["Home_SP_ID"], games["Away_SP_ID"])
+
+    # === Full-season team stats, gathered by team ID
+    team_stats = load_team_stats("downloads/team_standard.csv", "downloads/team_advanced.csv")
+    stat_features = team_stat_features(games["Home_Team_ID"], games["Away_Team_ID"], team_stats)
+    games_pred = pd.concat([games.reset_index(drop=True), stat_features, form, ratings, starters], axis=1)
+
+    # === Only the games in scope from here on; the rest of the store just fed their features
+    in_scope = scope.mask(games_pred["Game_Date"], games_pred["Game_ID"])
+    games_pred = games_pred[in_scope].reset_index(drop=True)
+    if games_pred.empty:
+        print(f"⏭️ No stored games in scope ({scope})")
+        return
+    print(f"🎯 Predicting {len(games_pred)} game(s): {scope}")
+
+    # === Identify pending games
+    games_pred["is_pending"] = games_pred[innings_cols].apply(lambda row: row.astype(str).str.contains("Pending", case=False).any(), axis=1)
+
+    # === Build features
+    model_features = list(getattr(scaler, "feature_names_in_", list(stat_features.columns) + FORM_COLUMNS))
+    features = games_pred[model_features].fillna(0)
+
+    # === Predict
+    X_scaled = scaler.transform(features)
+    predictions = model.predict(X_scaled)
+    probs = model.predict_proba(X_scaled)
+
+    games_pred["Predicted_Over_4_5"] = predictions
+    games_pred["Confidence"] = probs.max(axis=1).round(4)
+    games_pred["Model_Total"] = (probs[:, 1] * 6).round(2)
+    games_pred["Actual_Over_4_5"] = None
+
+    # === Add actuals for completed games
+    games_pred.loc[~games_pred["is_pending"], "Runs_1_5"] = games_pred.loc[~games_pred["is_pending"], innings_cols].apply(pd.to_numeric, errors="coerce").sum(axis=1)
+    games_pred.loc[~games_pred["is_pending"], "Actual_Over_4_5"] = (games_pred.loc[~games_pred["is_pending"], "Runs_1_5"] > 4.5).astype(int)
+
+    # === Save
+    upsert_csv("data/mlb_predictions.csv", games_pred[[
+        "Game_ID", "Game_Date", "Home_Team", "Away_Team",
+        "Predicted_Over_4_5", "Actual_Over_4_5", "Runs_1_5",
+        "Confidence", "Model_Total", "is_pending"
+    ]], scope, "Game_Date", "Game_ID")
+
+    print("✅ Predictions saved to mlb_predictions.csv")
+
+    # === Per-game explanations: class-1 probability split into per-feature contributions
+    bias, contributions = TreePathExplainer(model).explain(X_scaled)
+    explanations = games_pred[["Game_ID", "Game_Date", "Home_Team", "Away_Team"]].copy()
+    explanations["Bias"] = round(bias, 5)
+    explanations[model_features] = contributions.round(5)
+    upsert_csv("data/mlb_prediction_explanations.csv", explanations, scope, "Game_Date", "Game_ID")
+    print("✅ Explanations saved to mlb_prediction_explanations.csv")
+
+    # === Simulated 1-5 run distributions, priced by app.py / serve_picks.py for any line
+    # (full paths for the upcoming slate; settled games only feed the history views, so fewer).
+    # A settled game keeps its stored distribution while its expected runs are unchanged, so
+    # only the slate and new / changed results are simulated.
+    simulator = RunSimulator.fit(games)
+    away_exp, home_exp = simulator.expected_runs(
+        games_pred["Home_Form_Scored_L30"], games_pred["Home_Form_Allowed_L30"],
+        games_pred["Away_Form_Scored_L30"], games_pred["Away_Form_Allowed_L30"],
+    )
+    distributions = games_pred[["Game_ID", "Game_Date", "Home_Team", "Away_Team"]].copy()
+    distributions["Sim_Mean"] = (away_exp + home_exp).round(3)
+    pending = games_pred["is_pending"].to_numpy(dtype=bool)
+    dist = stored_distributions(DISTRIBUTIONS_FILE, scope, distributions, pending)
+    reused = dist.notna().all(axis=1).to_numpy()
+    for mask, paths in [(pending, SLATE_PATHS), (~pending & ~reused, SLATE_PATHS // 10)]:
+        if mask.any():
+            dist.loc[mask] = simulator.simulate(away_exp[mask], home_exp[mask], paths=paths, seed=42)
+    distributions = pd.concat([distributions, dist.round(5)], axis=1)
+    upsert_csv(DISTRIBUTIONS_FILE, distributions, scope, "Game_Date", "Game_ID")
+    print(f"✅ Run distributions saved to mlb_run_distributions.csv ({(~reused).sum()} simulated, {reused.sum()} kept)")
+
+    # === Scaled feature vectors of every game; settled ones are the dashboard's nearest-neighbour pool
+    legacy_id = games_pred["Game_Date"].astype(str) + "_" + games_pred["Home_Team"].astype(str) + "_" + games_pred["Away_Team"].astype(str)
+    matchup_id = games_pred["Game_ID"].astype(str).where(games_pred["Game_ID"].notna(), legacy_id)
+    save_comparables(
+        COMPARABLES_FILE, X_scaled, matchup_id, games_pred["Game_Date"], games_pred["Home_Team"], games_pred["Away_Team"],
+        games_pred["Runs_1_5_Home"] + games_pred["Runs_1_5_Away"], model_features, scope=scope,
+    )
+    print("✅ Comparables index saved to mlb_comparables.npz")
+
+    # === Fold newly settled days into the drift monitor (gates train_model.py --if-needed)
+    monitor = DriftMonitor.load()
+    if monitor is None:
+        print("⏭️ Drift monitor: no training snapshot yet")
+    elif missing := [col for col in monitor.train.features if col not in games_pred.columns]:
+        print(f"⚠️ Drift monitor: snapshot features not built here, skipped: {missing[:5]}")
+    else:
+        folded = monitor.update(games_pred[monitor.train.features].fillna(0), games_pred["Game_Date"], games_pred["is_pending"])
+        monitor.save()
+        print(f"📡 Drift monitor: {folded} settled row(s) folded, {monitor.live.n} since training")
+
+    # === Evaluate accuracy
+    played = games_pred[~games_pred["is_pending"]].dropna(subset=["Actual_Over_4_5"])
+    acc = (played["Predicted_Over_4_5"] == played["Actual_Over_4_5"]).mean()
+    print(f"\n🎯 Accuracy on played games in scope: {acc:.2%}")
+
+
+if __name__ == "__main__":
+    main()
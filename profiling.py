@@ -0,0 +1,274 @@
+"""Built-in sampling profiler for the pipeline stages and the dashboard views.
+
+A background thread reads the profiled thread's Python stack every few milliseconds
+(``sys._current_frames``), so the code being measured runs unmodified: no tracing
+hook, just one stack walk per sample (a few percent at the default 5 ms; see
+benchmarks/bench_profiling.py). Each sample is charged the time since the previous
+one, so time inside C code that holds the GIL (parsing, unpickling the forest,
+pandas internals) lands on the Python line that called it.
+
+Every profiled run is filed under a label, one folder per label:
+
+  * ``logs/profiles/<label>/<name>.collapsed`` - one ``frame;frame;...;leaf microseconds``
+    line per distinct stack, ready for flamegraph.pl, speedscope or inferno;
+  * ``logs/profiles/<label>/<name>.top.txt`` - the hottest functions by self and total time,
+    with the run's argv, wall time, git commit and the sizes of the data files it read.
+
+Profile the same dataset under two labels and compare them:
+
+    python run_pipeline_and_push.py --profile before --no-push    # every stage
+    python predict_over_4_5.py --profile after                    # one stage
+    streamlit run app.py        # then open http://localhost:8501/?profile=after
+    python profiling.py before after                              # what moved
+"""
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+import functools
+import threading
+import subprocess
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_DIR = "logs/profiles"
+STDLIB_DIR = os.path.dirname(os.__file__)
+INTERVAL = 0.005  # seconds between samples
+TOP_N = 30
+
+
+def short_path(filename):
+    """A frame's file as it reads best in a stack: package-, stdlib- or repo-relative, or as is."""
+    for marker in ("site-packages", "dist-packages"):
+        head, sep, tail = filename.partition(marker + os.sep)
+        if sep:
+            return tail
+    for root in (STDLIB_DIR, os.getcwd()):
+        try:
+            relative = os.path.relpath(filename, root)
+        except ValueError:  # another drive (Windows)
+            continue
+        if not relative.startswith(".."):
+            return relative
+    return filename
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack every ``interval`` seconds from a background thread."""
+
+    def __init__(self, interval=INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()  # stack (root first) -> seconds
+        self.samples = 0
+        self.wall = 0.0
+        self._labels = {}
+        self._thread = None
+        self._done = threading.Event()
+
+    def frame_label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self._labels[code] = f"{name} ({short_path(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def start(self, thread_id=None):
+        """Start sampling ``thread_id`` (the calling thread by default)."""
+        self.target = threading.get_ident() if thread_id is None else thread_id
+        self._done.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return self
+        self._done.set()
+        self._thread.join()
+        self._thread = None
+        self.wall = time.perf_counter() - self._started
+        return self
+
+    def _sample(self):
+        last = self._started
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            now = time.perf_counter()
+            if frame is None:  # the thread is gone
+                break
+            stack = []
+            while frame is not None:
+                stack.append(self.frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += now - last
+            self.samples += 1
+            last = now
+
+    def collapsed(self):
+        """``{stack: microseconds}``, the collapsed-stack form of the samples."""
+        return {stack: round(seconds * 1e6) for stack, seconds in self.stacks.items() if seconds > 0}
+
+
+def read_collapsed(path):
+    stacks = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            stack, _, us = line.rstrip("\n").rpartition(" ")
+            if stack:
+                stacks[tuple(stack.split(";"))] = int(us)
+    return stacks
+
+
+def write_collapsed(path, stacks):
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, us in sorted(stacks.items(), key=lambda item: -item[1]):
+            f.write(f"{';'.join(stack)} {us}\n")
+
+
+def function_times(stacks):
+    """(self, total) microseconds per function: the leaf of a stack, and anywhere in it (once per stack)."""
+    own, total = defaultdict(int), defaultdict(int)
+    for stack, us in stacks.items():
+        own[stack[-1]] += us
+        for function in set(stack):
+            total[function] += us
+    return own, total
+
+
+def top_table(stacks, n=TOP_N):
+    """The ``n`` hottest functions by self time, as text."""
+    own, total = function_times(stacks)
+    wall = max(sum(stacks.values()), 1)
+    lines = [f"{'self ms':>10} {'self %':>7} {'total ms':>10} {'total %':>8}  function"]
+    for function, us in sorted(own.items(), key=lambda item: -item[1])[:n]:
+        lines.append(f"{us / 1000:>10.1f} {100 * us / wall:>7.1f} {total[function] / 1000:>10.1f} "
+                     f"{100 * total[function] / wall:>8.1f}  {function}")
+    return "\n".join(lines)
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+    return result.stdout.strip() or "unknown"
+
+
+def write_profile(profiler, label, name, argv=(), root=PROFILE_DIR, n=TOP_N):
+    """Write ``<name>.collapsed`` and ``<name>.top.txt`` under ``root/label``; returns the folder."""
+    folder = os.path.join(root, label)
+    os.makedirs(folder, exist_ok=True)
+    stacks = profiler.collapsed()
+    write_collapsed(os.path.join(folder, f"{name}.collapsed"), stacks)
+
+    data = ", ".join(f"{path.replace(os.sep, '/')} {os.path.getsize(path):,} B" for path in sorted(glob.glob("data/*.csv")))
+    header = [
+        f"# profile {label} / {name}",
+        f"# argv: {' '.join(argv) or '-'}",
+        f"# {datetime.now().isoformat(timespec='seconds')}: wall {profiler.wall:.2f} s, {profiler.samples} samples "
+        f"every {profiler.interval * 1000:g} ms, git {git_commit()}",
+        f"# data: {data or '-'}",
+    ]
+    with open(os.path.join(folder, f"{name}.top.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(header) + "\n\n" + top_table(stacks, n) + "\n")
+    return folder
+
+
+def slug(text):
+    """``text`` as a file name: lower case, runs of anything but letters and digits as one underscore."""
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+def default_label():
+    return datetime.now().strftime("%Y%m%d-%H%M%S")
+
+
+@contextmanager
+def profile_run(label, name, argv=(), interval=INTERVAL):
+    """Sample the block and file it as ``name`` under ``label``; with no label it does nothing."""
+    if not label:
+        yield None
+        return
+    profiler = SamplingProfiler(interval).start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        folder = write_profile(profiler, label, name, argv)
+        print(f"🔬 Profile of {name}: {profiler.wall:.2f} s, {profiler.samples} samples -> {folder}/{name}.*")
+
+
+def pop_profile_argument(argv):
+    """(label or None, argv without ``--profile [LABEL]``); a bare ``--profile`` gets a timestamp label."""
+    argv = list(argv)
+    for i, arg in enumerate(argv):
+        if arg.startswith("--profile="):
+            return arg.split("=", 1)[1] or default_label(), argv[:i] + argv[i + 1:]
+        if arg == "--profile":
+            if i + 1 < len(argv) and not argv[i + 1].startswith("-"):
+                return argv[i + 1], argv[:i] + argv[i + 2:]
+            return default_label(), argv[:i] + argv[i + 1:]
+    return None, argv
+
+
+def profiled(main):
+    """Give a stage's ``main(argv=None)`` a ``--profile [LABEL]`` option: the call is sampled and
+    filed under LABEL as the stage's module name. The stage's own parser never sees the option."""
+    name = os.path.splitext(os.path.basename(main.__code__.co_filename))[0]
+
+    @functools.wraps(main)
+    def wrapper(argv=None):
+        label, argv = pop_profile_argument(sys.argv[1:] if argv is None else argv)
+        with profile_run(label, name, argv):
+            return main(argv)
+    return wrapper
+
+
+def main(argv=None):
+    """List the labels, show one label's runs, or compare two labels run by run."""
+    parser = argparse.ArgumentParser(description="Show or compare the profiles written with --profile.")
+    parser.add_argument("labels", nargs="*", help="one label to show, two to compare (before after)")
+    parser.add_argument("--top", type=int, default=10, help="functions per run")
+    parser.add_argument("--root", default=PROFILE_DIR)
+    args = parser.parse_args(argv)
+
+    def runs(label):
+        pattern = os.path.join(args.root, label, "*.collapsed")
+        return {os.path.basename(path)[:-len(".collapsed")]: read_collapsed(path) for path in sorted(glob.glob(pattern))}
+
+    if not args.labels:
+        labels = sorted(os.listdir(args.root)) if os.path.isdir(args.root) else []
+        for label in labels:
+            print(f"{label}: {', '.join(runs(label)) or '-'}")
+        if not labels:
+            print(f"⏭️ No profiles under {args.root}: run a stage with --profile LABEL")
+        return
+
+    if len(args.labels) == 1:
+        for name, stacks in runs(args.labels[0]).items():
+            print(f"\n== {name}: {sum(stacks.values()) / 1e6:.2f} s")
+            print(top_table(stacks, args.top))
+        return
+
+    before_label, after_label = args.labels[:2]
+    before, after = runs(before_label), runs(after_label)
+    for name in sorted(set(before) & set(after)):
+        old_self, _ = function_times(before[name])
+        new_self, _ = function_times(after[name])
+        old_wall, new_wall = sum(before[name].values()) / 1e6, sum(after[name].values()) / 1e6
+        print(f"\n== {name}: {old_wall:.2f} s -> {new_wall:.2f} s ({new_wall - old_wall:+.2f} s)")
+        print(f"{before_label + ' ms':>12} {after_label + ' ms':>12} {'delta ms':>10}  function")
+        moved = sorted(set(old_self) | set(new_self), key=lambda f: -abs(new_self.get(f, 0) - old_self.get(f, 0)))
+        for function in moved[:args.top]:
+            old, new = old_self.get(function, 0) / 1000, new_self.get(function, 0) / 1000
+            print(f"{old:>12.1f} {new:>12.1f} {new - old:>+10.1f}  {function}")
+    for name in sorted(set(before) ^ set(after)):
+        print(f"\n⏭️ {name}: only profiled under {before_label if name in before else after_label}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Publish the pipeline's outputs as per-date partitions, so a push carries only new days.
+
+The stages keep rewriting whole-season working files under data/. This stage splits
+each of them by game date into
+
+    published/<dataset>/<season>/<date>.csv
+    published/<dataset>/manifest.json        # rows + content hash per date
+
+and only writes the days whose content changed. A day's partition freezes once its
+content has been settled (every game final) and unchanged for ``FREEZE_DAYS`` days of
+publishing, so late boxscore corrections and a first publish of old days still get
+rewritten; from then on it is never rewritten, even when a later model re-predicts
+that day in the working file. A daily run therefore adds today's files and touches the
+last few open days - the push and the repo grow with new data, not with the history. The dashboard reads the manifests when the working files
+aren't there (a clone of the repo), and ``--restore`` rebuilds them from the
+partitions for a fresh clone or CI.
+
+    python publish.py                  # publish changed days
+    python publish.py --restore        # data/*.csv from the published partitions
+    python publish.py --refreeze       # also republish frozen days that changed (e.g. a schema change)
+    python publish.py --start 2025-06-01 --end 2025-06-01   # only the days in scope
+"""
+import io
+import os
+import json
+import hashlib
+import argparse
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from scope import Scope, add_scope_arguments, key_columns, read_rows
+from profiling import profiled
+
+PUBLISH_DIR = "published"
+FREEZE_DAYS = 3
+
+# dataset -> (working file, game date column)
+DATASETS = {
+    "boxscores": ("data/mlb_boxscores_full.csv", "Game Date"),
+    "pitchers": ("data/mlb_pitcher_log.csv", "Game Date"),
+    "predictions": ("data/mlb_predictions_merged.csv", "Game_Date"),
+    "backfilled": ("data/mlb_backfilled_predictions.csv", "Game_Date"),
+    "explanations": ("data/mlb_prediction_explanations.csv", "Game_Date"),
+    "distributions": ("data/mlb_run_distributions.csv", "Game_Date"),
+}
+# game date column -> the Game ID column written alongside it
+ID_COLUMNS = {"Game Date": "Game ID", "Game_Date": "Game_ID"}
+# dataset -> (columns, values): a row holding one of the values in one of the columns isn't final yet
+PENDING_MARKS = {
+    "boxscores": (r"^(Away|Home) \dth$", {"Pending"}),
+    "predictions": (r"^is_pending$", {"True"}),
+    "backfilled": (r"^Runs_1_5$", {""}),
+}
+# datasets without a result of their own settle with the same day of another (published before them)
+SETTLED_WITH = {"pitchers": "boxscores", "explanations": "predictions", "distributions": "predictions"}
+
+
+def manifest_path(dataset, root=PUBLISH_DIR):
+    return os.path.join(root, dataset, "manifest.json")
+
+
+def partition_path(dataset, day, root=PUBLISH_DIR):
+    return os.path.join(root, dataset, day[:4], f"{day}.csv")
+
+
+def load_manifest(dataset, root=PUBLISH_DIR):
+    path = manifest_path(dataset, root)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def dump_manifest(manifest):
+    """JSON with one line per partition, so a day's change is a one-line diff."""
+    head = json.dumps({key: value for key, value in manifest.items() if key != "partitions"})
+    lines = [f"  {json.dumps(day)}: {json.dumps(entry)}" for day, entry in manifest["partitions"].items()]
+    return f'{head[:-1]}, "partitions": {{\n' + ",\n".join(lines) + "\n}}\n"
+
+
+def frozen(entry, today):
+    """A partition is immutable once its content has been settled for FREEZE_DAYS or more."""
+    settled = entry.get("settled")
+    return settled is not None and today - datetime.strptime(settled, "%Y-%m-%d").date() >= timedelta(days=FREEZE_DAYS)
+
+
+def settled_days(dataset, frame, days, root=PUBLISH_DIR):
+    """The days on which every game of ``dataset`` is final."""
+    if dataset in SETTLED_WITH:
+        other = load_manifest(SETTLED_WITH[dataset], root)
+        return {day for day, entry in (other["partitions"] if other else {}).items() if entry.get("settled")}
+    pattern, values = PENDING_MARKS[dataset]
+    marks = frame.filter(regex=pattern)
+    if marks.empty:
+        return set()  # can't tell, so never frozen
+    pending = marks.apply(lambda column: column.str.strip().isin(values)).any(axis=1)
+    return set(days.unique()) - set(days[pending])
+
+
+def split_by_day(path, date_column, scope=None):
+    """(columns, {date: CSV bytes}, frame, dates) of a working file, every value kept exactly as
+    written. With a partial ``scope`` only the days holding a game in it are read (whole days:
+    a partition is a day)."""
+    read = dict(dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    if scope is None or scope.full:
+        frame = pd.read_csv(path, **read)
+    else:
+        keys = key_columns(path, [date_column, ID_COLUMNS.get(date_column)])
+        id_column = ID_COLUMNS.get(date_column)
+        in_scope = scope.mask(keys[date_column], keys[id_column] if id_column in keys.columns else None)
+        key_days = pd.to_datetime(keys[date_column], errors="coerce")
+        frame = read_rows(path, key_days.isin(key_days[in_scope]).to_numpy() & key_days.notna().to_numpy(), **read)
+    frame.columns = frame.columns.str.strip()
+    days = pd.to_datetime(frame[date_column], errors="coerce").dt.strftime("%Y-%m-%d")
+    if days.isna().any():
+        print(f"⚠️ {path}: {days.isna().sum()} row(s) without a readable {date_column} left out")
+    frame, days = frame[days.notna()], days[days.notna()]
+    return list(frame.columns), {
+        day: part.to_csv(index=False, lineterminator="\n").encode()
+        for day, part in frame.groupby(days, sort=True)
+    }, frame, days
+
+
+def publish_dataset(dataset, today, root=PUBLISH_DIR, refreeze=False, scope=None):
+    """Write the changed days of one dataset and its manifest; returns (written, removed, frozen_changed),
+    or None when the working file isn't there. A partial ``scope`` limits both to its days."""
+    path, date_column = DATASETS[dataset]
+    if not os.path.exists(path):
+        return None
+
+    columns, parts, frame, days = split_by_day(path, date_column, scope)
+    settled = settled_days(dataset, frame, days, root)
+    manifest = load_manifest(dataset, root)
+    entries = manifest["partitions"] if manifest else {}
+    today_str = today.isoformat()
+    written = removed = frozen_changed = 0
+
+    for day, data in parts.items():
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        entry = entries.get(day)
+        if entry is not None and frozen(entry, today) and not refreeze:
+            frozen_changed += entry["sha256"] != digest
+            continue
+        if entry is None or entry["sha256"] != digest:
+            write_atomic(partition_path(dataset, day, root), data)
+            written += 1
+            entry = {"rows": data.count(b"\n") - 1, "sha256": digest, "as_of": today_str}
+        # The freeze clock starts on the first run that finds this exact content settled
+        entry["settled"] = (entry.get("settled") or today_str) if day in settled else None
+        entries[day] = entry
+
+    # A day dropped from the working file goes too, unless it is already frozen (or outside the scope)
+    in_window = (lambda d: True) if scope is None or scope.full else (lambda d: bool(scope.mask([d])[0]))
+    for day in [d for d in entries if d not in parts and not frozen(entries[d], today) and in_window(d)]:
+        part = partition_path(dataset, day, root)
+        if os.path.exists(part):
+            os.remove(part)
+        del entries[day]
+        removed += 1
+
+    manifest = {"source": path, "date_column": date_column, "columns": columns, "partitions": dict(sorted(entries.items()))}
+    write_atomic(manifest_path(dataset, root), dump_manifest(manifest).encode())
+    return written, removed, frozen_changed
+
+
+def read_dataset(dataset, root=PUBLISH_DIR, **read_csv_kwargs):
+    """Every published day of a dataset as one DataFrame, in date order (None if never published).
+
+    Partitions sharing a header are joined as text and parsed once; a header change
+    (a column added after some days froze) is parsed per header and concatenated.
+    """
+    manifest = load_manifest(dataset, root)
+    if manifest is None:
+        return None
+    bodies = {}
+    for day in manifest["partitions"]:
+        with open(partition_path(dataset, day, root), "rb") as f:
+            header, _, body = f.read().partition(b"\n")
+        bodies.setdefault(header, []).append(body)
+    if not bodies:
+        return pd.DataFrame(columns=manifest.get("columns", []))
+    frames = [pd.read_csv(io.BytesIO(header + b"\n" + b"".join(parts)), **read_csv_kwargs) for header, parts in bodies.items()]
+    frame = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    if len(frames) > 1:
+        date_column = manifest["date_column"]
+        frame = frame.iloc[pd.to_datetime(frame[date_column]).argsort(kind="stable")].reset_index(drop=True)
+    return frame
+
+
+def restore(dataset, root=PUBLISH_DIR):
+    """Rebuild a dataset's working file from its partitions; False if it was never published."""
+    frame = read_dataset(dataset, root, dtype=str, keep_default_na=False)
+    if frame is None:
+        return False
+    write_atomic(DATASETS[dataset][0], frame.to_csv(index=False, lineterminator="\n").encode())
+    return True
+
+
+@profiled
+def main(argv=None):
+    """Publish the changed days of every dataset, or restore the working files from them."""
+    parser = argparse.ArgumentParser(description="Publish the pipeline's outputs as per-date partitions.")
+    parser.add_argument("--restore", action="store_true", help="rebuild data/*.csv from the published partitions")
+    parser.add_argument("--refreeze", action="store_true", help="also republish frozen days that changed, e.g. once after a schema change")
+    parser.add_argument("--date", help="run date YYYY-MM-DD (default: today); starts and checks the freeze clocks")
+    parser.add_argument("--root", default=PUBLISH_DIR)
+    add_scope_arguments(parser)
+    args = parser.parse_args(argv)
+    scope = Scope.from_args(args)
+
+    if args.restore:
+        for dataset, (path, _) in DATASETS.items():
+            if restore(dataset, args.root):
+                print(f"✅ Restored {path} from {args.root}/{dataset}")
+            else:
+                print(f"⏭️ {dataset}: nothing published")
+        return
+
+    today = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else datetime.now().date()
+    for dataset in DATASETS:
+        result = publish_dataset(dataset, today, args.root, args.refreeze, scope)
+        if result is None:
+            print(f"⏭️ {dataset}: {DATASETS[dataset][0]} not found, skipped")
+            continue
+        written, removed, frozen_changed = result
+        print(f"📦 {dataset}: {written} day(s) written, {removed} removed")
+        if frozen_changed:
+            print(f"📌 {dataset}: {frozen_changed} frozen day(s) differ from the working file (kept; --refreeze to republish)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Opponent-adjusted offensive / defensive 1-5 inning run ratings.
+
+Every completed game gives two observations, one per batting side:
+
+    runs = mu + home * [batting at home] + off[batting team] - def[fielding team]
+
+``off`` is runs scored above average and ``def`` runs prevented, both after adjusting
+for who a team played. The ratings are the ridge-regularized weighted least-squares fit
+over every game, with older games decayed by ``halflife_days``. Each observation loads
+on four coefficients only, so a day's games are folded into the normal equations by
+scattering their 4 x 4 outer products (one bincount), and the small (2 + 2 * teams)
+system is re-solved directly with np.linalg.solve (an LU factorization).
+
+``pregame_ratings`` walks a history day by day, giving every game the ratings as they
+stood before its date; with ``state_file`` the walk resumes from the last completed day
+of the previous run instead of starting over.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from team_registry import N_TEAMS, TEAM_CODES
+
+RATINGS_STATE_FILE = "models/team_ratings_state.npz"
+RIDGE_ALPHA = 10.0      # prior strength, in (decayed) games
+HALFLIFE_DAYS = 90.0    # a game's weight halves every 90 days
+SIDES = ["Home", "Away"]
+RATING_COLUMNS = [f"{side}_{name}" for side in SIDES for name in ["Off_Rating", "Def_Rating", "Adj_Runs"]]
+
+
+class TeamRatings:
+    def __init__(self, n_teams=N_TEAMS, alpha=RIDGE_ALPHA, halflife_days=HALFLIFE_DAYS):
+        self.n_teams = n_teams
+        self.alpha = float(alpha)
+        self.halflife_days = float(halflife_days)
+        self.size = 2 + 2 * n_teams  # mu, home, off[0..n), def[0..n)
+        # mu and home are (almost) unpenalized; the ratings shrink toward 0 = league average
+        self.penalty = np.full(self.size, self.alpha)
+        self.penalty[:2] = 1e-6
+        self.A = np.zeros((self.size, self.size))
+        self.b = np.zeros(self.size)
+        self.x = np.zeros(self.size)
+        self.as_of = None  # day number (days since epoch) of the last games folded in
+
+    @property
+    def offense(self):
+        return self.x[2:2 + self.n_teams]
+
+    @property
+    def defense(self):
+        return self.x[2 + self.n_teams:]
+
+    def design(self, home_ids, away_ids):
+        """The design matrix's non-zeros: for each observation (home batting, then away batting)
+        the four columns it loads on and their values, as two (2 * games, 4) arrays."""
+        g = len(home_ids)
+        cols = np.empty((2 * g, 4), dtype=np.int64)
+        data = np.tile([1.0, 1.0, 1.0, -1.0], (2 * g, 1))
+        cols[:, 0] = 0
+        cols[:, 1] = 1
+        data[g:, 1] = 0.0  # the away side gets no home term
+        cols[:, 2] = 2 + np.concatenate([home_ids, away_ids])
+        cols[:, 3] = 2 + self.n_teams + np.concatenate([away_ids, home_ids])
+        return cols, data
+
+    def add_games(self, day, home_ids, away_ids, home_runs, away_runs):
+        """Decay what is stored to ``day`` and fold in that day's completed games."""
+        if self.as_of is not None and day > self.as_of:
+            decay = 0.5 ** ((day - self.as_of) / self.halflife_days)
+            self.A *= decay
+            self.b *= decay
+        self.as_of = day if self.as_of is None else max(self.as_of, day)
+
+        cols, data = self.design(np.asarray(home_ids, dtype=np.int64), np.asarray(away_ids, dtype=np.int64))
+        y = np.concatenate([home_runs, away_runs]).astype(np.float64)
+        # X'X and X'y straight from the non-zeros: every observation adds its 4 x 4 outer product
+        cells = (cols[:, :, None] * self.size + cols[:, None, :]).ravel()
+        self.A += np.bincount(cells, weights=(data[:, :, None] * data[:, None, :]).ravel(),
+                              minlength=self.size * self.size).reshape(self.size, self.size)
+        self.b += np.bincount(cols.ravel(), weights=(data * y[:, None]).ravel(), minlength=self.size)
+
+    def solve(self):
+        """Re-solve (A + alpha I) x = b; the system is small and positive definite, so directly."""
+        self.x = np.linalg.solve(self.A + np.diag(self.penalty), self.b)
+        return self.x
+
+    def table(self):
+        """Current ratings per team, best offense first."""
+        return pd.DataFrame({
+            "Team": TEAM_CODES[:self.n_teams], "Off_Rating": self.offense, "Def_Rating": self.defense,
+        }).sort_values("Off_Rating", ascending=False).reset_index(drop=True)
+
+    # === Persistence, for resuming a walk across runs
+    def save(self, path, days, checks, history):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, A=self.A, b=self.b, x=self.x, as_of=np.int64(self.as_of if self.as_of is not None else -1),
+                 params=np.array([self.n_teams, self.alpha, self.halflife_days]),
+                 days=days, checks=checks, history=history)
+        os.replace(tmp_path, path)
+
+    def resume(self, path, days, checks):
+        """Load a saved walk if it matches the start of this one and return its per-day
+        history; None (start over) when there is none or an already-walked day changed."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as saved:
+            m = len(saved["days"])
+            same_params = np.array_equal(saved["params"], [self.n_teams, self.alpha, self.halflife_days])
+            # Rescrapes and backfills of already-walked days show up as changed checks
+            if not same_params or m > len(days) or not np.array_equal(saved["days"], days[:m]) \
+                    or not np.allclose(saved["checks"], checks[:m]):
+                return None
+            self.A, self.b, self.x = saved["A"], saved["b"], saved["x"]
+            self.as_of = int(saved["as_of"]) if saved["as_of"] >= 0 else None
+            return saved["history"]
+
+
+def pregame_ratings(dates, home_ids, away_ids, home_runs, away_runs, state_file=None, **kwargs):
+    """Ratings as they stood before each game's date (same-day games don't see each other).
+
+    Returns a DataFrame with RATING_COLUMNS in input row order: each side's offensive and
+    defensive rating and its opponent-adjusted expected 1-5 runs. Games before any data
+    get NaN. Rows with NaN runs get ratings but never feed them. With ``state_file`` the
+    fitted state after the last fully completed day is saved and the next call resumes
+    from it, so a daily run only solves for the new days.
+    """
+    n = len(home_ids)
+    home_ids = np.asarray(home_ids, dtype=np.int64)
+    away_ids = np.asarray(away_ids, dtype=np.int64)
+    home_runs = np.asarray(home_runs, dtype=np.float64)
+    away_runs = np.asarray(away_runs, dtype=np.float64)
+    played = ~(np.isnan(home_runs) | np.isnan(away_runs))
+
+    day = np.asarray(pd.to_datetime(dates), dtype="datetime64[D]").astype(np.int64)
+    days, inverse = np.unique(day, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.searchsorted(inverse[order], np.arange(len(days) + 1))
+    runs = np.where(played, home_runs + away_runs, 0.0)
+    checks = np.stack([np.bincount(inverse, weights=played, minlength=len(days)),
+                       np.bincount(inverse, weights=runs, minlength=len(days))], axis=1)
+    # Days before the latest day with results are complete; the latest and later may still change
+    closed = days < (day[played].max() if played.any() else days.min())
+
+    model = TeamRatings(**kwargs)
+    history = np.full((len(days), model.size), np.nan)
+    resumed = model.resume(state_file, days, checks) if state_file else None
+    start = 0 if resumed is None else len(resumed)
+    if start:
+        history[:start] = resumed
+
+    saved_through = start
+    for k in range(start, len(days)):
+        if model.as_of is not None:
+            history[k] = model.x
+        rows = order[bounds[k]:bounds[k + 1]]
+        rows = rows[played[rows]]
+        if len(rows):
+            model.add_games(days[k], home_ids[rows], away_ids[rows], home_runs[rows], away_runs[rows])
+            model.solve()
+        if state_file and closed[k] and (k + 1 == len(days) or not closed[k + 1]):
+            model.save(state_file, days[:k + 1], checks[:k + 1], history[:k + 1])
+            saved_through = k + 1
+
+    x = history[inverse]
+    idx = np.arange(n)
+    mu, home = x[:, 0], x[:, 1]
+    home_off, away_off = x[idx, 2 + home_ids], x[idx, 2 + away_ids]
+    home_def, away_def = x[idx, 2 + model.n_teams + home_ids], x[idx, 2 + model.n_teams + away_ids]
+    frame = pd.DataFrame({
+        "Home_Off_Rating": home_off, "Home_Def_Rating": home_def, "Home_Adj_Runs": mu + home + home_off - away_def,
+        "Away_Off_Rating": away_off, "Away_Def_Rating": away_def, "Away_Adj_Runs": mu + away_off - home_def,
+    })
+    frame.attrs["days_solved"] = len(days) - start
+    frame.attrs["saved_through"] = saved_through
+    return frame
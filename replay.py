@@ -0,0 +1,232 @@
+"""Record ESPN / FanGraphs responses to fixture files and replay them from a local server.
+
+Record real traffic while scraping:
+
+    python get_scores_full.py --backfill --start 2025-06-01 --end 2025-06-07 --record fixtures/
+    python Scrape_Fan_Graph.py --record fixtures/
+
+Replay it with no network, optionally slowed down or failing:
+
+    python replay.py --fixtures fixtures/ --port 8800 --latency-ms 80 --error-rate 0.05
+    python get_scores_full.py --backfill --start 2025-06-01 --end 2025-06-07 --base-url http://127.0.0.1:8800
+    python Scrape_Fan_Graph.py --base-url http://127.0.0.1:8800
+
+Fixtures are keyed on request path + query only, so one server stands in for
+site.api.espn.com, www.espn.com, www.fangraphs.com and blogs.fangraphs.com at once. Replay
+has to use the same requests as the recording (same dates and --chunk-days). Recorded
+ETag / Last-Modified headers are replayed and If-None-Match is answered with 304, so
+conditional-GET savings show up in the numbers. FanGraphs exports are stored as the CSV
+file; the server wraps each one in a page whose "Export Data" link downloads it, plus a
+stand-in login form, so the Selenium flow runs unchanged.
+"""
+import os
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+REPLAYED_HEADERS = ["Content-Type", "ETag", "Last-Modified"]
+DOWNLOAD_PREFIX = "/__download__/"
+EXPORT_FILENAME = "FanGraphs Leaderboard.csv"  # Scrape_Fan_Graph.export_csv looks for "Leader"
+
+LOGIN_PAGE = b"""<html><body><form method="post" action="/wp-login.php">
+<input id="user_login" name="log"><input id="user_pass" name="pwd" type="password">
+<input id="wp-submit" type="submit" value="Log In"></form></body></html>"""
+
+EXPORT_PAGE = """<html><body><h1>Splits Leaderboards (replay)</h1>
+<a href="{href}" download="{filename}">Export Data</a></body></html>"""
+
+
+def fixture_key(url):
+    """Host-independent key for a URL: hash of its path + query."""
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    return hashlib.sha1(target.encode("utf-8")).hexdigest()[:20]
+
+
+def save_fixture(fixture_dir, url, status, headers, body, kind="response"):
+    """Write one fixture: ``<key>.json`` (URL, status, headers, kind) next to ``<key>.body``."""
+    os.makedirs(fixture_dir, exist_ok=True)
+    key = fixture_key(url)
+    with open(os.path.join(fixture_dir, f"{key}.body"), "wb") as f:
+        f.write(body)
+    meta = {
+        "url": url,
+        "status": status,
+        "kind": kind,
+        "headers": {h: headers[h] for h in REPLAYED_HEADERS if headers.get(h)},
+        "recorded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    tmp_path = os.path.join(fixture_dir, f"{key}.json.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, os.path.join(fixture_dir, f"{key}.json"))
+    return key
+
+
+def save_download_fixture(fixture_dir, page_url, path):
+    """Record a FanGraphs export CSV under the leaderboard page URL it was exported from."""
+    with open(path, "rb") as f:
+        return save_fixture(fixture_dir, page_url, 200, {"Content-Type": "text/csv"}, f.read(), kind="download")
+
+
+class RecordingSession:
+    """Wraps a requests session and saves every 200 response it returns as a fixture."""
+
+    def __init__(self, session, fixture_dir):
+        self.session = session
+        self.fixture_dir = fixture_dir
+
+    def get(self, url, **kwargs):
+        r = self.session.get(url, **kwargs)
+        if r.status_code == 200:
+            save_fixture(self.fixture_dir, url, r.status_code, r.headers, r.content)
+        return r
+
+
+def load_fixtures(fixture_dir):
+    fixtures = {}
+    for name in os.listdir(fixture_dir):
+        if not name.endswith(".json"):
+            continue
+        key = name[:-len(".json")]
+        with open(os.path.join(fixture_dir, name)) as f:
+            meta = json.load(f)
+        with open(os.path.join(fixture_dir, f"{key}.body"), "rb") as f:
+            meta["body"] = f.read()
+        fixtures[key] = meta
+    return fixtures
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    fixtures = {}
+    latency_ms = 0.0
+    jitter_ms = 0.0
+    error_rate = 0.0
+    error_status = 503
+    stats = None
+    stats_lock = threading.Lock()
+
+    def count(self, name):
+        with self.stats_lock:
+            self.stats[name] = self.stats.get(name, 0) + 1
+
+    def send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        # The stand-in login form posts here; any credentials are accepted
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send(302, headers={"Location": "/"})
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/__stats__":
+            with self.stats_lock:
+                body = json.dumps(self.stats).encode("utf-8")
+            self.send(200, body, {"Content-Type": "application/json"})
+            return
+        if path == "/__reset__":
+            with self.stats_lock:
+                self.stats.clear()
+            self.send(204)
+            return
+
+        self.count("requests")
+        if self.latency_ms or self.jitter_ms:
+            time.sleep((self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000)
+        if self.error_rate and random.random() < self.error_rate:
+            self.count(f"injected_{self.error_status}")
+            self.send(self.error_status, b"injected error", {"Content-Type": "text/plain"})
+            return
+
+        if path in ("/", "/wp-login.php"):
+            self.count("login_pages")
+            self.send(200, LOGIN_PAGE, {"Content-Type": "text/html"})
+            return
+
+        if path.startswith(DOWNLOAD_PREFIX):
+            fixture = self.fixtures.get(path[len(DOWNLOAD_PREFIX):])
+            if fixture is None:
+                self.count("misses")
+                self.send(404, b"no such export")
+                return
+            self.count("downloads")
+            self.send(200, fixture["body"], {
+                "Content-Type": "text/csv",
+                "Content-Disposition": f'attachment; filename="{EXPORT_FILENAME}"',
+            })
+            return
+
+        key = fixture_key(self.path)
+        fixture = self.fixtures.get(key)
+        if fixture is None:
+            self.count("misses")
+            self.send(404, json.dumps({"error": f"no fixture for {self.path}"}).encode("utf-8"), {"Content-Type": "application/json"})
+            return
+
+        if fixture["kind"] == "download":
+            self.count("export_pages")
+            page = EXPORT_PAGE.format(href=DOWNLOAD_PREFIX + key, filename=EXPORT_FILENAME).encode("utf-8")
+            self.send(200, page, {"Content-Type": "text/html"})
+            return
+
+        etag = fixture["headers"].get("ETag")
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.count("not_modified")
+            self.send(304, headers={"ETag": etag})
+            return
+
+        self.count("hits")
+        self.send(fixture["status"], fixture["body"], fixture["headers"])
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(fixture_dir, host="127.0.0.1", port=8800, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_status=503):
+    """A ThreadingHTTPServer replaying ``fixture_dir``; the caller runs serve_forever()."""
+    handler = type("BoundReplayHandler", (ReplayHandler,), {
+        "fixtures": load_fixtures(fixture_dir),
+        "latency_ms": latency_ms,
+        "jitter_ms": jitter_ms,
+        "error_rate": error_rate,
+        "error_status": error_status,
+        "stats": {},
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded ESPN / FanGraphs fixtures over local HTTP.")
+    parser.add_argument("--fixtures", default="fixtures", help="directory written by --record")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra uniform random delay per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    server = make_server(args.fixtures, args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.error_status)
+    print(f"🎞️ Replaying {len(server.RequestHandlerClass.fixtures)} fixtures on http://{args.host}:{args.port} "
+          f"(latency {args.latency_ms}+{args.jitter_ms} ms, errors {args.error_rate:.0%} -> {args.error_status})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
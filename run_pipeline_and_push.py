@@ -1,41 +1,103 @@
 ﻿import subprocess
 import sys
+import argparse
+import importlib
+import traceback
 from datetime import datetime
 
-def run(script, optional=False):
-    print(f"\n[RUN] {script}")
+from scope import Scope, add_scope_arguments
+from profiling import profile_run, default_label
+
+# module, CLI args, optional, takes --start/--end/--games
+STAGES = [
+    ("Scrape_Fan_Graph", [], False, False),
+    ("get_scores_full", [], False, True),
+    ("predict_over_4_5", [], False, True),
+    ("merge_predictions", [], False, True),
+    ("train_model", ["--if-needed"], True, False),  # only on drift / enough new labels (drift.py)
+    ("backfill_predict_over_4_5", [], True, True),
+    ("publish", [], False, True),
+]
+
+# What a push carries: the published partitions (data/ is the local working copy), the
+# FanGraphs archive and the model
+PUSH_PATHS = ["published", "downloads", "models"]
+
+def call_stage(module, argv=None):
+    """Import a stage module and run its main() in this interpreter. A stage that stops early on
+    purpose (``sys.exit()`` / ``sys.exit(0)``) has finished; any other exit is raised."""
+    main = importlib.import_module(module).main
     try:
-        subprocess.run([sys.executable, script], check=True)
-        print(f"[OK] Finished: {script}")
-    except subprocess.CalledProcessError:
+        if argv is None:
+            main()
+        else:
+            main(argv)
+    except SystemExit as e:
+        if e.code not in (0, None):
+            raise
+
+def run(module, argv=None, optional=False, isolated=False, profile=None):
+    """Run one stage. By default its main() runs in this interpreter, so pandas, numpy and the
+    model are imported / loaded once for the whole pipeline; ``isolated`` starts a fresh one.
+    With a ``profile`` label the stage is sampled and its profile filed under it (profiling.py)."""
+    print(f"\n[RUN] {module}.py")
+    try:
+        if isolated:
+            profile_argv = ["--profile", profile] if profile else []
+            subprocess.run([sys.executable, f"{module}.py"] + (argv or []) + profile_argv, check=True)
+        else:
+            # Sampled from the import on, so a stage's first import of pandas & co. is in its profile
+            with profile_run(profile, module, argv or []):
+                call_stage(module, argv)
+        print(f"[OK] Finished: {module}.py")
+    except (Exception, SystemExit) as e:
+        if isinstance(e, SystemExit):
+            print(f"[EXIT] {module}.py exited with {e.code}")  # sys.exit("message") only prints at interpreter exit
+        elif not isinstance(e, subprocess.CalledProcessError):
+            traceback.print_exc()
         if optional:
-            print(f"[WARN] Optional script failed or skipped: {script}")
+            print(f"[WARN] Optional script failed or skipped: {module}.py")
         else:
-            print(f"[ERROR] Script failed: {script}")
+            print(f"[ERROR] Script failed: {module}.py")
             sys.exit(1)
 
-def git_push():
-    print("\n[INFO] Pushing to GitHub (force)...")
+def git_push(paths=PUSH_PATHS):
+    print("\n[INFO] Pushing published data to GitHub...")
     commit_msg = f"Auto-update: predictions as of {datetime.now().strftime('%Y-%m-%d %H:%M')}"
     try:
-        subprocess.run(["git", "add", "."], check=True)
+        # -A stages removed partitions too
+        subprocess.run(["git", "add", "-A", "--"] + paths, check=True)
+        if subprocess.run(["git", "diff", "--cached", "--quiet"]).returncode == 0:
+            print("[OK] Nothing new to push.")
+            return
         subprocess.run(["git", "commit", "-m", commit_msg], check=True)
-        subprocess.run(["git", "push", "--force", "origin", "main"], check=True)
-        print("[OK] Force push complete.")
+        # No force push: a commit pushed in between (the CI workflow) is rebased onto, not overwritten
+        subprocess.run(["git", "pull", "--rebase", "--autostash", "origin", "main"], check=True)
+        subprocess.run(["git", "push", "origin", "main"], check=True)
+        print("[OK] Push complete.")
     except subprocess.CalledProcessError:
         print("[❌] Git push failed. Manual fix may be required.")
 
 
 if __name__ == "__main__":
-    print("[START] Full boosted innings pipeline...\n")
+    parser = argparse.ArgumentParser(description="Run every pipeline stage, then commit and push the outputs.")
+    parser.add_argument("--isolated", action="store_true", help="run each stage in its own interpreter")
+    parser.add_argument("--no-push", action="store_true", help="update the outputs without committing / pushing")
+    parser.add_argument("--profile", nargs="?", const="", metavar="LABEL",
+                        help="sample every stage, profiles in logs/profiles/LABEL (default label: a timestamp)")
+    add_scope_arguments(parser)  # reprocess only these games: boxscores refetched, outputs upserted
+    args = parser.parse_args()
+    scope = Scope.from_args(args)
+    profile = (args.profile or default_label()) if args.profile is not None else None
 
-    run("Scrape_Fan_Graph.py")
-    run("get_scores_full.py")
-    run("predict_over_4_5.py")
-    run("merge_predictions.py")
-    run("train_model.py", optional=True)
-    run("backfill_predict_over_4_5.py", optional=True)
+    print(f"[START] Full boosted innings pipeline ({scope})...\n")
 
-    git_push()
-    print("\n[COMPLETE] All tasks finished.")
+    for module, argv, optional, scoped in STAGES:
+        if not scope.full and not scoped:
+            print(f"\n[SKIP] {module}.py: not per game, skipped for a scoped run")
+            continue
+        run(module, argv + scope.argv(), optional=optional, isolated=args.isolated, profile=profile)
 
+    if not args.no_push:
+        git_push()
+    print("\n[COMPLETE] All tasks finished.")
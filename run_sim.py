@@ -0,0 +1,108 @@
+"""Monte Carlo distribution of 1-5 inning run totals.
+
+Every half-inning's runs follow a negative binomial whose mean is the league average for
+that inning and side (fitted from the boxscore store), scaled by the batting team's
+scoring form and the fielding team's runs-allowed form. ``simulate`` draws all paths for
+all games at once and returns each game's full discrete distribution of total runs, so
+pricing any line - including the push on whole-number lines - is a sum over that row:
+
+    p_over, p_under, p_push = line_probabilities(dist, 4.5)
+"""
+import numpy as np
+import pandas as pd
+
+MAX_RUNS = 30          # last bucket of a distribution holds every total >= MAX_RUNS
+SLATE_PATHS = 100_000
+SIDES = ["Away", "Home"]  # top of the inning, bottom of the inning
+INNINGS = range(1, 6)
+
+
+def negbin_pmf(mean, dispersion, max_runs=MAX_RUNS):
+    """P(0..max_runs) for negative binomials with the given means (any shape); the last bucket is the tail."""
+    mean = np.asarray(mean, dtype=np.float64)[..., None]
+    p = dispersion / (dispersion + mean)
+    k = np.arange(max_runs)
+    # p_0 = p^r, p_{k+1} = p_k * (k + r) / (k + 1) * (1 - p)
+    ratios = (k + dispersion) / (k + 1) * (1 - p)
+    pmf = p ** dispersion * np.cumprod(np.concatenate([np.ones_like(ratios[..., :1]), ratios], axis=-1), axis=-1)
+    pmf[..., -1] = np.clip(1 - pmf[..., :-1].sum(axis=-1), 0, None)
+    return pmf
+
+
+def line_probabilities(dist, line):
+    """(p_over, p_under, p_push) of a line for every row of a (n_games, MAX_RUNS + 1) distribution."""
+    runs = np.arange(dist.shape[1])
+    return dist[:, runs > line].sum(axis=1), dist[:, runs < line].sum(axis=1), dist[:, runs == line].sum(axis=1)
+
+
+class RunSimulator:
+    def __init__(self, inning_means, dispersion, shrink=0.5):
+        # inning_means[side, inning - 1]: league runs per half-inning; side 0 = away batting
+        self.inning_means = np.asarray(inning_means, dtype=np.float64)
+        self.dispersion = float(dispersion)
+        self.shrink = shrink
+        self.team_mean = self.inning_means.sum(axis=1).mean()  # league 1-5 runs per team-game
+
+    @classmethod
+    def fit(cls, games, **kwargs):
+        """League per-inning means and a pooled dispersion (method of moments) from completed games.
+
+        ``games`` is the boxscore store as returned by features.load_games.
+        """
+        cols = [f"{side}_{i}th" for side in SIDES for i in INNINGS]
+        half_innings = games[cols].apply(pd.to_numeric, errors="coerce").dropna()
+        mean = half_innings.mean().to_numpy()
+        excess = half_innings.var().to_numpy() - mean  # var = m + m^2 / r
+        dispersion = (mean ** 2).sum() / max(excess.sum(), 1e-9)
+        return cls(mean.reshape(len(SIDES), len(INNINGS)), dispersion, **kwargs)
+
+    def expected_runs(self, home_scored, home_allowed, away_scored, away_allowed):
+        """Expected 1-5 runs for (away, home) batting, from each team's per-game scored/allowed form.
+
+        Attack and defence enter as ratios to the league mean, regressed ``shrink`` of the way
+        back to 1; missing form (no games yet) counts as league average.
+        """
+        def factor(rate):
+            ratio = np.nan_to_num(np.asarray(rate, dtype=np.float64) / self.team_mean, nan=1.0)
+            return 1 + (1 - self.shrink) * (ratio - 1)
+
+        league = self.inning_means.sum(axis=1)
+        away = league[0] * factor(away_scored) * factor(home_allowed)
+        home = league[1] * factor(home_scored) * factor(away_allowed)
+        return away, home
+
+    def simulate(self, away_runs, home_runs, paths=SLATE_PATHS, seed=None, chunk_games=64):
+        """(n_games, MAX_RUNS + 1) distribution of total 1-5 runs from ``paths`` simulated games each.
+
+        Half-innings are drawn by inverse CDF: each game's CDF is shifted by its row number so a
+        single searchsorted maps every uniform draw of a half-inning to runs for all games.
+        """
+        away_runs = np.asarray(away_runs, dtype=np.float64)
+        home_runs = np.asarray(home_runs, dtype=np.float64)
+        league = self.inning_means.sum(axis=1, keepdims=True)
+        rng = np.random.default_rng(seed)
+
+        dist = np.empty((len(away_runs), MAX_RUNS + 1))
+        for start in range(0, len(away_runs), chunk_games):
+            stop = min(start + chunk_games, len(away_runs))
+            n = stop - start
+            scale = np.stack([away_runs[start:stop], home_runs[start:stop]], axis=1)[:, :, None] / league
+            cdf = np.cumsum(negbin_pmf(self.inning_means * scale, self.dispersion), axis=-1)
+            cdf[..., -1] = 1.0
+            offset = np.arange(n)[:, None]
+
+            totals = np.zeros((n, paths), dtype=np.int64)
+            for side in range(len(SIDES)):
+                for inning in range(len(INNINGS)):
+                    shifted = (cdf[:, side, inning, :] + offset).ravel()
+                    draws = rng.random((n, paths)) + offset
+                    totals += np.searchsorted(shifted, draws, side="right").reshape(n, paths) - offset * (MAX_RUNS + 1)
+
+            np.minimum(totals, MAX_RUNS, out=totals)
+            flat = (totals + offset * (MAX_RUNS + 1)).ravel()
+            dist[start:stop] = np.bincount(flat, minlength=n * (MAX_RUNS + 1)).reshape(n, -1) / paths
+        return dist
+
+
+def distribution_columns():
+    return [f"P_{k}" for k in range(MAX_RUNS)] + [f"P_{MAX_RUNS}+"]
@@ -0,0 +1,311 @@
+"""Schedule-aware pipeline daemon: plans each day's runs around the slate's first pitches.
+
+Instead of one fixed daily run, every slate is planned from ESPN's scoreboard:
+
+  * no games -> nothing is scraped, predicted or pushed that day;
+  * ``--lead-minutes`` before the first pitch: FanGraphs stats (once a day), boxscores,
+    predictions and the merged file are refreshed and pushed;
+  * later waves (first pitches ``--wave-gap-hours`` after the previous wave) get a
+    prediction refresh of their own, skipped when none of its inputs changed;
+  * each game is settled from ``--settle-minutes`` after its first pitch (about the end of
+    the 5th): the scoreboard is polled, only games past the 5th whose status moved are
+    fetched, and the merged file is rebuilt and pushed at most every ``--push-minutes``;
+  * once the slate is final the model is retrained (if drift.py calls for it) and the history backfilled.
+
+Stages run in this process, so libraries are imported once for the life of the daemon.
+A stage whose input files are unchanged since its last successful run is skipped;
+fingerprints live in logs/scheduler_state.json.
+
+    python scheduler.py                       # run forever
+    python scheduler.py --once                # today's slate, then exit
+    python scheduler.py --dry-run             # print today's plan
+    python scheduler.py --base-url http://127.0.0.1:8800 --no-push   # against replay.py
+"""
+import os
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+
+import get_scores_full
+from get_scores_full import SlateWatcher, SLATE_TZ, make_session
+from run_pipeline_and_push import call_stage, git_push
+from publish import DATASETS
+from pitchers import PITCHER_LOG_FILE
+from drift import DRIFT_SNAPSHOT_FILE, DRIFT_STATE_FILE
+
+STATE_FILE = "logs/scheduler_state.json"
+BOXSCORES = "data/mlb_boxscores_full.csv"
+
+# module, CLI args, input files (None = always run: the inputs are remote)
+STAGES = {
+    "stats": ("Scrape_Fan_Graph", [], None),
+    "scores": ("get_scores_full", [], None),
+    "predict": ("predict_over_4_5", [], [
+        BOXSCORES, PITCHER_LOG_FILE, "downloads/team_standard.csv", "downloads/team_advanced.csv",
+        "models/rf_model_over_4_5.joblib", "models/scaler_over_4_5.joblib",
+    ]),
+    "merge": ("merge_predictions", [], [BOXSCORES, "data/mlb_predictions.csv"]),
+    "train": ("train_model", ["--if-needed"], [
+        BOXSCORES, PITCHER_LOG_FILE, "downloads/team_standard.csv", "downloads/team_advanced.csv",
+        DRIFT_SNAPSHOT_FILE, DRIFT_STATE_FILE,
+    ]),
+    "backfill": ("backfill_predict_over_4_5", [], [
+        BOXSCORES, PITCHER_LOG_FILE, "models/rf_model_over_4_5.joblib", "models/scaler_over_4_5.joblib",
+    ]),
+    "publish": ("publish", [], [path for path, _ in DATASETS.values()]),
+}
+OPTIONAL_STAGES = {"train", "backfill"}
+
+
+def first_pitch(game):
+    """Scoreboard start time (ISO 8601, UTC) as an Eastern datetime; None when ESPN has none."""
+    if not game.get("start"):
+        return None
+    return datetime.fromisoformat(game["start"].replace("Z", "+00:00")).astimezone(SLATE_TZ)
+
+
+def fingerprint(paths):
+    """(mtime, size) of every input; a missing file fingerprints as None."""
+    out = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            out[path] = [st.st_mtime_ns, st.st_size]
+        except FileNotFoundError:
+            out[path] = None
+    return out
+
+
+def plan_waves(games, gap_hours=3):
+    """Split a slate into waves of first pitches: a start more than ``gap_hours`` after the
+    previous wave's first pitch opens a new wave. Returns [(first pitch, [games])]."""
+    timed = sorted(((first_pitch(g), g) for g in games if first_pitch(g) is not None), key=lambda t: t[0])
+    waves = []
+    for start, game in timed:
+        if waves and start - waves[-1][0] <= timedelta(hours=gap_hours):
+            waves[-1][1].append(game)
+        else:
+            waves.append((start, [game]))
+    return waves
+
+
+class PipelineScheduler:
+    def __init__(self, lead_minutes=60, settle_minutes=80, final_minutes=180, wave_gap_hours=3,
+                 poll_seconds=120, push_minutes=30, plan_hour=9, push=True, dry_run=False,
+                 state_file=STATE_FILE, session=None, now=None, sleep=time.sleep):
+        self.lead = timedelta(minutes=lead_minutes)
+        self.settle = timedelta(minutes=settle_minutes)
+        self.final = timedelta(minutes=final_minutes)
+        self.wave_gap_hours = wave_gap_hours
+        self.poll = timedelta(seconds=poll_seconds)
+        self.push_every = timedelta(minutes=push_minutes)
+        self.plan_hour = plan_hour
+        self.push = push
+        self.dry_run = dry_run
+        self.state_file = state_file
+        self.session = session or make_session()
+        self.now = now or (lambda: datetime.now(SLATE_TZ))
+        self.sleep = sleep
+        self.state = self.load_state()
+        self.dirty = False
+        self.ran = []  # stage names run this process, in order
+
+    # === State
+    def load_state(self):
+        if os.path.exists(self.state_file):
+            with open(self.state_file) as f:
+                return json.load(f)
+        return {"fingerprints": {}, "stats_date": None}
+
+    def save_state(self):
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_file)
+
+    # === Stages
+    def run_stage(self, name):
+        """Run one stage unless its inputs are unchanged since it last succeeded; True if it ran cleanly."""
+        module, argv, inputs = STAGES[name]
+        script = f"{module}.py"
+        prints = fingerprint(inputs) if inputs is not None else None
+        if prints is not None and self.state["fingerprints"].get(name) == prints:
+            print(f"⏭️ {script}: inputs unchanged, skipped")
+            return False
+
+        print(f"\n[RUN] {script}")
+        self.ran.append(name)
+        if self.dry_run:
+            return True
+        # In-process: the daemon imports pandas, sklearn & co. once, not once per stage
+        try:
+            call_stage(module, argv)
+        except (Exception, SystemExit) as e:
+            level = "WARN" if name in OPTIONAL_STAGES else "ERROR"
+            print(f"[{level}] Script failed: {script} ({e!r})")
+            return False
+
+        print(f"[OK] Finished: {script}")
+        if prints is not None:
+            self.state["fingerprints"][name] = prints
+            self.save_state()
+        self.dirty = True
+        return True
+
+    def publish(self):
+        if not self.dirty:
+            return
+        self.run_stage("publish")  # per-date partitions of whatever changed
+        self.dirty = False
+        self.last_push = self.now()
+        if not self.push:
+            print("📌 Outputs updated (push disabled)")
+            return
+        self.ran.append("push")
+        if not self.dry_run:
+            git_push()
+
+    def refresh(self, slate_date, first_wave):
+        """Pre-game refresh: stats once a day, then boxscores, predictions and the merged file.
+
+        The day's stats count as fetched only when the export succeeded, so a failed one is
+        retried before the next wave.
+        """
+        if self.state.get("stats_date") != slate_date.isoformat() and self.run_stage("stats"):
+            self.state["stats_date"] = slate_date.isoformat()
+            self.save_state()
+        if first_wave:
+            self.run_stage("scores")
+        self.run_stage("predict")
+        self.run_stage("merge")
+        self.publish()
+
+    # === Clock
+    def sleep_until(self, when):
+        # Short naps, so a suspended laptop or a changed clock can't oversleep a first pitch
+        while (remaining := (when - self.now()).total_seconds()) > 0:
+            self.sleep(min(remaining, 900))
+
+    # === One slate
+    def run_day(self, slate_date):
+        """Plan and run one Eastern slate date; returns once every game on it is final."""
+        day = datetime.combine(slate_date, datetime.min.time())
+        games = get_scores_full.fetch_with_retry(lambda: get_scores_full.get_game_ids(day, self.session))
+        waves = plan_waves(games, self.wave_gap_hours)
+        if not waves:
+            print(f"💤 No games on {slate_date}: nothing to scrape, predict or push.")
+            return
+
+        print(f"📅 {slate_date}: {len(games)} games in {len(waves)} wave(s)")
+        for start, wave in waves:
+            print(f"   {start:%H:%M} ET  {len(wave)} games  -> refresh at {start - self.lead:%H:%M}")
+        if self.dry_run:
+            last = max(first_pitch(g) for g in games if first_pitch(g))
+            print(f"   settle from {waves[0][0] + self.settle:%H:%M}, slate final around {last + self.final:%H:%M}")
+            return
+
+        start_of = {g["gameId"]: first_pitch(g) for g in games}
+        watcher = SlateWatcher(session=self.session)
+        self.last_push = None
+        wave_index = 0
+
+        while True:
+            now = self.now()
+
+            # Every wave whose refresh time has passed collapses into one refresh
+            due = [i for i in range(wave_index, len(waves)) if waves[i][0] - self.lead <= now]
+            if due:
+                self.refresh(slate_date, first_wave=wave_index == 0)
+                wave_index = due[-1] + 1
+                continue
+
+            # Settle: one scoreboard request covers the slate; only changed games past the 5th are fetched
+            if any(start_of[g] and start_of[g] + self.settle <= now for g in start_of if g not in watcher.settled):
+                try:
+                    games, updated = watcher.poll(day)
+                except Exception as e:
+                    print(f"❌ Scoreboard poll failed: {e}")
+                    games, updated = None, 0
+                if updated:
+                    self.run_stage("merge")
+                if games:
+                    start_of.update({g["gameId"]: first_pitch(g) for g in games})  # delays move first pitch
+                    if watcher.done(games):  # final and written; a failing fetch is retried first
+                        break
+                if self.dirty and (self.last_push is None or now - self.last_push >= self.push_every):
+                    self.publish()
+
+            self.sleep_until(self.next_wake(now, waves[wave_index:], start_of, watcher))
+
+        print(f"🏁 {slate_date}: slate final.")
+        self.run_stage("merge")
+        self.run_stage("train")
+        self.run_stage("backfill")
+        self.publish()
+
+    def next_wake(self, now, waves, start_of, watcher):
+        """Earliest of: the next wave's refresh, the next game reaching the 5th, or the next
+        poll of a game that is due but unsettled (live, delayed, or final pending a fetch)."""
+        times = [start - self.lead for start, _ in waves[:1]]
+        for game_id, start in start_of.items():
+            if game_id in watcher.settled or start is None:
+                continue
+            state = watcher.last_seen.get(game_id, ("pre",))[0]
+            if start + self.settle > now:
+                times.append(start + self.settle)
+            elif state == "in" and start + self.final > now:
+                # Past the 5th and fetched; nothing new until the game ends
+                times.append(start + self.final)
+            else:
+                times.append(now + self.poll)
+        return min(times) if times else now + self.poll
+
+    # === Daemon
+    def run_forever(self):
+        slate_date = self.now().date()
+        while True:
+            try:
+                self.run_day(slate_date)
+            except Exception as e:
+                # Don't give up on the slate: replan it after a pause
+                print(f"❌ Slate {slate_date} failed: {e}")
+                self.sleep_until(self.now() + self.poll)
+                continue
+            slate_date += timedelta(days=1)
+            wake = datetime.combine(slate_date, datetime.min.time(), SLATE_TZ) + timedelta(hours=self.plan_hour)
+            print(f"😴 Next slate plan at {wake:%Y-%m-%d %H:%M} ET")
+            self.sleep_until(wake)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the pipeline around each day's MLB schedule.")
+    parser.add_argument("--once", action="store_true", help="run today's slate (or --date) and exit")
+    parser.add_argument("--date", help="slate date for --once / --dry-run (YYYY-MM-DD, default today ET)")
+    parser.add_argument("--dry-run", action="store_true", help="print the plan without running anything")
+    parser.add_argument("--lead-minutes", type=int, default=60, help="refresh this long before each wave's first pitch")
+    parser.add_argument("--settle-minutes", type=int, default=80, help="first poll for a game this long after first pitch")
+    parser.add_argument("--final-minutes", type=int, default=180, help="expected game length after first pitch")
+    parser.add_argument("--wave-gap-hours", type=float, default=3, help="first pitches this far apart get separate refreshes")
+    parser.add_argument("--poll", type=int, default=120, help="seconds between polls while a due game is unsettled")
+    parser.add_argument("--push-minutes", type=int, default=30, help="minimum time between pushes while settling")
+    parser.add_argument("--plan-hour", type=int, default=9, help="Eastern hour at which the next slate is planned")
+    parser.add_argument("--no-push", action="store_true", help="update outputs locally without committing / pushing")
+    parser.add_argument("--base-url", help="send ESPN requests here, e.g. a replay.py server (also passed to every stage)")
+    args = parser.parse_args()
+
+    if args.base_url:
+        os.environ["ESPN_BASE_URL"] = args.base_url
+        get_scores_full.set_base_url(args.base_url)
+
+    scheduler = PipelineScheduler(
+        lead_minutes=args.lead_minutes, settle_minutes=args.settle_minutes, final_minutes=args.final_minutes,
+        wave_gap_hours=args.wave_gap_hours, poll_seconds=args.poll, push_minutes=args.push_minutes,
+        plan_hour=args.plan_hour, push=not args.no_push, dry_run=args.dry_run,
+    )
+    slate_date = datetime.strptime(args.date, "%Y-%m-%d").date() if args.date else scheduler.now().date()
+    if args.once or args.dry_run:
+        scheduler.run_day(slate_date)
+    else:
+        scheduler.run_forever()
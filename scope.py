@@ -0,0 +1,140 @@
+"""Date-window / game-ID scoping shared by the per-game stages.
+
+Every stage that works game by game takes the same options, and the pipeline passes
+them through to each of them:
+
+    python predict_over_4_5.py --start 2025-06-01 --end 2025-06-01
+    python merge_predictions.py --games 401695123,401695124
+    python run_pipeline_and_push.py --start 2025-06-01 --end 2025-06-01 --no-push
+
+A game is in scope when its date is inside [--start, --end] (either side may be left
+open) and, with --games, its Game ID is listed. The working files are CSVs, so the
+predicate is pushed down in two passes: the key columns (date, Game ID) are read on
+their own, and the full read then skips every row out of scope and stops after the last
+one in it - only the rows in scope are parsed. Outputs are upserts: the rows outside the
+scope are kept exactly as written and the scope's slice is replaced by the new rows.
+With no options the scope is everything, and every stage behaves as it always did.
+"""
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class Scope:
+    def __init__(self, start=None, end=None, game_ids=None):
+        self.start = pd.Timestamp(start).normalize() if start else None
+        self.end = pd.Timestamp(end).normalize() if end else None
+        self.game_ids = None if game_ids is None else sorted({int(g) for g in game_ids})
+
+    @classmethod
+    def from_args(cls, args):
+        games = [g for g in args.games.split(",") if g.strip()] if args.games else None
+        return cls(args.start, args.end, games)
+
+    @property
+    def full(self):
+        return self.start is None and self.end is None and self.game_ids is None
+
+    def argv(self):
+        """The options that select this scope, for passing it on to a stage."""
+        argv = []
+        if self.start is not None:
+            argv += ["--start", self.start.strftime("%Y-%m-%d")]
+        if self.end is not None:
+            argv += ["--end", self.end.strftime("%Y-%m-%d")]
+        if self.game_ids is not None:
+            argv += ["--games", ",".join(map(str, self.game_ids))]
+        return argv
+
+    def __str__(self):
+        if self.full:
+            return "every game"
+        parts = []
+        if self.start is not None or self.end is not None:
+            start = self.start.strftime("%Y-%m-%d") if self.start is not None else "..."
+            end = self.end.strftime("%Y-%m-%d") if self.end is not None else "..."
+            parts.append(start if start == end else f"{start} to {end}")
+        if self.game_ids is not None:
+            parts.append(f"{len(self.game_ids)} game ID(s)")
+        return ", ".join(parts)
+
+    def mask(self, dates, game_ids=None):
+        """Boolean array: which rows are in scope. Unreadable dates are out of any date window;
+        without ``game_ids`` no row matches a --games scope."""
+        day = pd.to_datetime(pd.Series(np.asarray(dates)), errors="coerce").dt.normalize()
+        keep = np.ones(len(day), dtype=bool)
+        if self.start is not None:
+            keep &= (day >= self.start).to_numpy()
+        if self.end is not None:
+            keep &= (day <= self.end).to_numpy()
+        if self.game_ids is not None:
+            if game_ids is None:
+                return np.zeros(len(day), dtype=bool)
+            ids = pd.to_numeric(pd.Series(np.asarray(game_ids)), errors="coerce")
+            keep &= ids.isin(self.game_ids).to_numpy()
+        return keep
+
+
+def add_scope_arguments(parser):
+    parser.add_argument("--start", help="first game date in scope (YYYY-MM-DD)")
+    parser.add_argument("--end", help="last game date in scope (YYYY-MM-DD)")
+    parser.add_argument("--games", help="comma-separated ESPN game IDs in scope")
+
+
+def key_columns(path, columns):
+    """Only the named columns of a CSV (those that exist), as written."""
+    wanted = {c for c in columns if c}
+    keys = pd.read_csv(path, usecols=lambda c: c.strip() in wanted, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    keys.columns = keys.columns.str.strip()
+    return keys
+
+
+def scope_rows(path, scope, date_column, id_column=None):
+    """Boolean array over a CSV's rows: which are in ``scope``, from its key columns alone."""
+    keys = key_columns(path, [date_column, id_column])
+    return scope.mask(keys[date_column], keys[id_column] if id_column in keys.columns else None)
+
+
+def read_rows(path, keep, **read_csv_kwargs):
+    """Parse only the rows where ``keep`` is True; the read stops after the last of them."""
+    rows = np.flatnonzero(keep)
+    if not len(rows):
+        return pd.read_csv(path, nrows=0, **read_csv_kwargs)
+    skip = np.flatnonzero(~keep[:rows[-1]]) + 1  # file line 0 is the header
+    return pd.read_csv(path, skiprows=set(skip.tolist()), nrows=len(rows), **read_csv_kwargs)
+
+
+def read_scoped(path, scope, date_column, id_column=None, **read_csv_kwargs):
+    """A CSV's rows in ``scope`` (all of them for a full scope)."""
+    if scope is None or scope.full:
+        return pd.read_csv(path, **read_csv_kwargs)
+    return read_rows(path, scope_rows(path, scope, date_column, id_column), **read_csv_kwargs)
+
+
+def upsert_csv(path, new, scope, date_column, id_column=None):
+    """Write ``new`` as the scope's slice of ``path``: rows outside the scope are kept as written,
+    rows in it (or with a Game ID that ``new`` has) are replaced, and the file stays in date order.
+    A full scope (or no file yet) simply writes ``new``. Returns the rows written."""
+    tmp_path = f"{path}.tmp"
+    if scope is None or scope.full or not os.path.exists(path):
+        new.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        return len(new)
+
+    old = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    old.columns = old.columns.str.strip()
+    old_ids = old[id_column] if id_column in old.columns else None
+    drop = scope.mask(old[date_column], old_ids)
+    if old_ids is not None and id_column in new.columns:
+        drop |= pd.to_numeric(old_ids, errors="coerce").isin(pd.to_numeric(new[id_column], errors="coerce").dropna()).to_numpy()
+
+    # The new rows as a full write would format them (dates, floats, nullable ints)
+    text = pd.read_csv(io.StringIO(new.to_csv(index=False)), dtype=str, keep_default_na=False) if len(new.columns) else new
+    combined = pd.concat([old[~drop], text], ignore_index=True)
+    day = pd.to_datetime(combined[date_column], errors="coerce").to_numpy()
+    combined = combined.iloc[np.argsort(day, kind="stable")]
+    combined.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return len(new)
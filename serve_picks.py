@@ -0,0 +1,269 @@
+﻿import os
+import json
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+import pandas as pd
+
+from run_sim import line_probabilities, distribution_columns
+
+DATA_FILE = "data/mlb_predictions_merged.csv"
+DIST_FILE = "data/mlb_run_distributions.csv"
+DEFAULT_LINE = 4.5
+MODEL_LINE = 4.5  # the line the stored Predicted_Over_4_5 / Confidence were made for
+DEFAULT_MIN_CONF = 0.55
+MAX_CACHED_RESPONSES = 4096
+
+
+def fireballs(p):
+    if p >= 0.90: return "🔥🔥🔥🔥🔥"
+    elif p >= 0.80: return "🔥🔥🔥🔥"
+    elif p >= 0.70: return "🔥🔥🔥"
+    elif p >= 0.60: return "🔥🔥"
+    else: return "🔥"
+
+
+def price(dist, line, model_over, model_conf):
+    """Bet side and win probability at ``line`` from simulated run distributions, as app.py prices it.
+
+    Rows without a distribution fall back to the model's own pick and confidence at the 4.5 line;
+    at any other line they come back with NaN confidence, so no confidence floor selects them.
+    """
+    p_over, p_under, _ = line_probabilities(dist, line)
+    over = p_over > p_under
+    conf = np.where(over, p_over, p_under)
+    if line == MODEL_LINE:
+        fallback = np.isnan(conf)
+        over = np.where(fallback, model_over == 1, over)
+        conf = np.where(fallback, model_conf, conf)
+    return over, conf
+
+
+class PicksIndex:
+    """Prediction rows held as NumPy columns, sorted by date, with a per-date slice table."""
+
+    def __init__(self, path=DATA_FILE, dist_path=DIST_FILE):
+        self.path = path
+        self.dist_path = dist_path
+        self.version = None
+        self.cols = None
+        self.lock = threading.Lock()
+        self.responses = {}
+        self.reload_if_changed()
+
+    def reload_if_changed(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        version = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+        if os.path.exists(self.dist_path):
+            dist_st = os.stat(self.dist_path)
+            version += f"-{dist_st.st_mtime_ns:x}-{dist_st.st_size:x}"
+        if version == self.version:
+            return False
+
+        with self.lock:
+            if version == self.version:
+                return False
+            self.cols = self._build()
+            self.version = version
+            self.responses = {}
+        print(f"📄 Loaded {len(self.cols['dates'])} picks from {self.path} (version {version})")
+        return True
+
+    def _build(self):
+        df = pd.read_csv(self.path)
+        df.columns = df.columns.str.strip()
+        df = df.dropna(subset=["Home_Team", "Away_Team"])
+        df["Game_Date"] = pd.to_datetime(df["Game_Date"])
+        df["Runs_1_5"] = pd.to_numeric(df.get("Runs_1_5"), errors="coerce")
+
+        # One row per game, keeping the most confident duplicate (as the dashboard does). Game_ID keeps
+        # doubleheaders apart; rows without one fall back to date + teams.
+        if "Game_ID" not in df.columns:
+            df["Game_ID"] = pd.NA
+        df["Game_ID"] = df["Game_ID"].astype("Int64")
+        legacy_id = df["Game_Date"].astype(str) + "_" + df["Home_Team"].astype(str) + "_" + df["Away_Team"].astype(str)
+        df["Matchup_ID"] = df["Game_ID"].astype(str).where(df["Game_ID"].notna(), legacy_id)
+        df = df.sort_values("Confidence", ascending=False).drop_duplicates("Matchup_ID")
+        df = df.sort_values(["Game_Date", "Home_Team"]).reset_index(drop=True)
+
+        dist_cols = distribution_columns()
+        if os.path.exists(self.dist_path):
+            dist = pd.read_csv(self.dist_path)
+            dist["Game_ID"] = dist["Game_ID"].astype("Int64")
+            dist_legacy = dist["Game_Date"].astype(str) + "_" + dist["Home_Team"].astype(str) + "_" + dist["Away_Team"].astype(str)
+            dist.index = dist["Game_ID"].astype(str).where(dist["Game_ID"].notna(), dist_legacy)
+            dist = dist[~dist.index.duplicated(keep="last")].reindex(df["Matchup_ID"])[dist_cols]
+        else:
+            dist = pd.DataFrame(np.nan, index=df.index, columns=dist_cols)
+        unpriced = dist.isna().any(axis=1).to_numpy()
+        if unpriced.any():
+            print(f"⚠️ {unpriced.sum()} of {len(df)} games have no run distribution in {self.dist_path}: priced from the "
+                  f"model's own {MODEL_LINE} confidence, never picked at other lines, "
+                  f"e.g. {', '.join(df.loc[unpriced, 'Matchup_ID'].head(3))}")
+
+        dates = df["Game_Date"].values.astype("datetime64[D]")
+        unique_dates, starts = np.unique(dates, return_index=True)
+        ends = np.append(starts[1:], len(dates))
+
+        # Swapped in as one object so requests never see half of a reload
+        return {
+            "dates": dates,
+            "game_id": df["Game_ID"].to_numpy(dtype="float64", na_value=np.nan),
+            "home": df["Home_Team"].astype(str).to_numpy(),
+            "away": df["Away_Team"].astype(str).to_numpy(),
+            "model_total": df["Model_Total"].to_numpy(dtype=float),
+            "dist": dist.to_numpy(dtype=float),
+            "model_over": pd.to_numeric(df["Predicted_Over_4_5"], errors="coerce").to_numpy(dtype=float),
+            "model_conf": pd.to_numeric(df["Confidence"], errors="coerce").to_numpy(dtype=float),
+            "runs": df["Runs_1_5"].to_numpy(dtype=float),
+            "by_date": {str(d): (s, e) for d, s, e in zip(unique_dates, starts, ends)},
+        }
+
+    def picks(self, date_str, line, min_conf):
+        cols = self.cols
+        start, end = cols["by_date"].get(date_str, (0, 0))
+        totals = cols["model_total"][start:end]
+        runs = cols["runs"][start:end]
+        home = cols["home"][start:end]
+        game_ids = cols["game_id"][start:end]
+        away = cols["away"][start:end]
+        over, conf = price(cols["dist"][start:end], line, cols["model_over"][start:end], cols["model_conf"][start:end])
+
+        picks = []
+        for i in np.flatnonzero(conf >= min_conf):
+            actual = None if np.isnan(runs[i]) else float(runs[i])
+            correct = None if actual is None or actual == line else bool(actual > line if over[i] else actual < line)
+            picks.append({
+                "game_id": None if np.isnan(game_ids[i]) else int(game_ids[i]),
+                "game_date": date_str,
+                "matchup": f"{away[i]} @ {home[i]}",
+                "away_team": away[i],
+                "home_team": home[i],
+                "bet": f"{'OVER' if over[i] else 'UNDER'} {line}",
+                "confidence": round(float(conf[i]), 4),
+                "fireballs": fireballs(conf[i]),
+                "model_total": round(float(totals[i]), 2),
+                "actual_runs": actual,
+                "correct": correct,
+            })
+        picks.sort(key=lambda p: p["confidence"], reverse=True)
+        return {"date": date_str, "line": line, "min_conf": min_conf, "picks": picks}
+
+    def accuracy(self, line, min_conf, through=None):
+        cols = self.cols
+        dates = cols["dates"]
+        end = len(dates) if through is None else int(np.searchsorted(dates, np.datetime64(through), side="right"))
+        runs = cols["runs"][:end]
+        over, conf = price(cols["dist"][:end], line, cols["model_over"][:end], cols["model_conf"][:end])
+
+        settled = (conf >= min_conf) & ~np.isnan(runs) & (runs != line)  # a push is neither
+        wins = int(np.where(over, runs > line, runs < line)[settled].sum())
+        games = int(settled.sum())
+        return {
+            "line": line,
+            "min_conf": min_conf,
+            "through": through,
+            "wins": wins,
+            "games": games,
+            "accuracy": round(wins / games, 4) if games else None,
+        }
+
+
+class PicksHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body go out as separate writes on keep-alive sockets
+    index = None
+
+    def do_GET(self):
+        self.index.reload_if_changed()
+        url = urlparse(self.path)
+        version = self.index.version
+        # "today" moves at midnight, so it is part of every cache key and ETag
+        key = f"{datetime.now():%Y-%m-%d}|{self.path}"
+        etag = '"' + hashlib.md5(f"{version}|{key}".encode()).hexdigest() + '"'
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        cached = self.index.responses.get(key)
+        if cached is None:
+            try:
+                status, payload = self.route(url.path, parse_qs(url.query))
+            except ValueError as e:
+                status, payload = 400, {"error": str(e)}
+            cached = (status, json.dumps(payload).encode("utf-8"))
+            if status == 200 and version == self.index.version:
+                if len(self.index.responses) >= MAX_CACHED_RESPONSES:
+                    self.index.responses = {}
+                self.index.responses[key] = cached
+
+        status, body = cached
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 200:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def route(self, path, query):
+        line = float(query.get("line", [DEFAULT_LINE])[0])
+        min_conf = float(query.get("min_conf", [DEFAULT_MIN_CONF])[0])
+        parts = [p for p in path.split("/") if p]
+
+        # Until the first load there is nothing to answer with; a 503 is never cached
+        if self.index.cols is None:
+            return 503, {"error": f"no picks loaded yet: {self.index.path} not found"}
+        if parts == ["picks", "today"] or parts == ["picks"]:
+            return 200, self.index.picks(datetime.now().strftime("%Y-%m-%d"), line, min_conf)
+        if len(parts) == 2 and parts[0] == "picks":
+            date_str = datetime.strptime(parts[1], "%Y-%m-%d").strftime("%Y-%m-%d")
+            return 200, self.index.picks(date_str, line, min_conf)
+        if parts == ["accuracy"]:
+            through = query.get("through", [None])[0]
+            if through:
+                through = datetime.strptime(through, "%Y-%m-%d").strftime("%Y-%m-%d")
+            return 200, self.index.accuracy(line, min_conf, through)
+        if parts == ["health"]:
+            return 200, {"version": self.index.version, "rows": len(self.index.cols["dates"])}
+        return 404, {"error": f"unknown path {path}"}
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8765, path=DATA_FILE):
+    PicksHandler.index = PicksIndex(path)
+    if PicksHandler.index.cols is None:
+        print(f"⚠️ {path} not found: answering 503 until it appears")
+    server = ThreadingHTTPServer((host, port), PicksHandler)
+    server.daemon_threads = True
+    print(f"🚀 Serving picks on http://{host}:{port} (/picks/today, /picks/YYYY-MM-DD, /accuracy)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve picks and rolling accuracy over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--data", default=DATA_FILE)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.data)
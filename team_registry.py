@@ -0,0 +1,91 @@
+﻿"""Canonical MLB team registry.
+
+Every ESPN display name, ESPN abbreviation and FanGraphs code we have seen maps to a
+small integer team ID (0-29). Scripts key on those IDs, so per-team lookups are plain
+NumPy indexing (``table[team_ids]``) instead of string merges, and an unknown name is
+rejected at ingest instead of silently turning into NaN.
+"""
+import numpy as np
+import pandas as pd
+
+# (canonical code, aliases) - the ID is the position in this list, so only ever append
+TEAMS = [
+    ("ARI", ["Arizona Diamondbacks", "Arizona", "Diamondbacks", "AZ"]),
+    ("ATH", ["Athletics", "Oakland Athletics", "Sacramento Athletics", "OAK"]),
+    ("ATL", ["Atlanta Braves", "Atlanta", "Braves"]),
+    ("BAL", ["Baltimore Orioles", "Baltimore", "Orioles"]),
+    ("BOS", ["Boston Red Sox", "Boston", "Red Sox"]),
+    ("CHC", ["Chicago Cubs", "Cubs"]),
+    ("CHW", ["Chicago White Sox", "White Sox", "CWS"]),
+    ("CIN", ["Cincinnati Reds", "Cincinnati", "Reds"]),
+    ("CLE", ["Cleveland Guardians", "Cleveland Indians", "Cleveland", "Guardians"]),
+    ("COL", ["Colorado Rockies", "Colorado", "Rockies"]),
+    ("DET", ["Detroit Tigers", "Detroit", "Tigers"]),
+    ("HOU", ["Houston Astros", "Houston", "Astros"]),
+    ("KCR", ["Kansas City Royals", "Kansas City", "Royals", "KC"]),
+    ("LAA", ["Los Angeles Angels", "Los Angeles Angels of Anaheim", "Angels", "ANA"]),
+    ("LAD", ["Los Angeles Dodgers", "Dodgers"]),
+    ("MIA", ["Miami Marlins", "Florida Marlins", "Miami", "Marlins", "FLA"]),
+    ("MIL", ["Milwaukee Brewers", "Milwaukee", "Brewers"]),
+    ("MIN", ["Minnesota Twins", "Minnesota", "Twins"]),
+    ("NYM", ["New York Mets", "Mets"]),
+    ("NYY", ["New York Yankees", "Yankees"]),
+    ("PHI", ["Philadelphia Phillies", "Philadelphia", "Phillies"]),
+    ("PIT", ["Pittsburgh Pirates", "Pittsburgh", "Pirates"]),
+    ("SDP", ["San Diego Padres", "San Diego", "Padres", "SD"]),
+    ("SEA", ["Seattle Mariners", "Seattle", "Mariners"]),
+    ("SFG", ["San Francisco Giants", "San Francisco", "Giants", "SF"]),
+    ("STL", ["St. Louis Cardinals", "St Louis Cardinals", "St. Louis", "Cardinals"]),
+    ("TBR", ["Tampa Bay Rays", "Tampa Bay Devil Rays", "Tampa Bay", "Rays", "TB"]),
+    ("TEX", ["Texas Rangers", "Texas", "Rangers"]),
+    ("TOR", ["Toronto Blue Jays", "Toronto", "Blue Jays"]),
+    ("WSN", ["Washington Nationals", "Washington", "Nationals", "WSH", "WAS"]),
+]
+
+N_TEAMS = len(TEAMS)
+TEAM_CODES = np.array([code for code, _ in TEAMS])
+
+TEAM_IDS = {}
+for _team_id, (_code, _aliases) in enumerate(TEAMS):
+    for _name in [_code] + _aliases:
+        TEAM_IDS[_name.lower()] = _team_id
+
+
+def team_id(name):
+    """ID for a single name; raises ValueError for anything not in the registry."""
+    try:
+        return TEAM_IDS[str(name).strip().lower()]
+    except KeyError:
+        raise ValueError(f"Unknown team name: {name!r}") from None
+
+
+def team_ids(names, allow_missing=False):
+    """Vectorized name -> ID lookup for a Series / array of names.
+
+    Unknown names raise ValueError listing every offender. Missing values (NaN) raise
+    too unless ``allow_missing``, in which case they come back as -1.
+    """
+    names = pd.Series(names, copy=False)
+    ids = names.astype(str).str.strip().str.lower().map(TEAM_IDS)
+    missing = names.isna()
+    unknown = ids.isna() & ~missing
+    if unknown.any():
+        raise ValueError(f"Unknown team names: {sorted(names[unknown].astype(str).unique())}")
+    if missing.any() and not allow_missing:
+        raise ValueError(f"{int(missing.sum())} rows have no team name")
+    return ids.fillna(-1).to_numpy(dtype=np.int16)
+
+
+def team_codes(ids):
+    """Canonical 3-letter codes for an array of IDs."""
+    return TEAM_CODES[np.asarray(ids)]
+
+
+def team_table(df, team_col, value_cols, fill=np.nan):
+    """Dense (N_TEAMS, len(value_cols)) array of per-team values, indexed by team ID.
+
+    Teams absent from ``df`` get ``fill``; look rows up with ``table[ids]``.
+    """
+    table = np.full((N_TEAMS, len(value_cols)), fill, dtype=np.float64)
+    table[team_ids(df[team_col])] = df[value_cols].to_numpy(dtype=np.float64)
+    return table
@@ -1,134 +1,320 @@
 ﻿import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import classification_report
-from sklearn.preprocessing import StandardScaler
-import joblib
+import numpy as np
 import os
+import json
+import time
+import argparse
+import tempfile
+import importlib
 
-# === Load & Normalize Game Data ===
-games = pd.read_csv("data/mlb_boxscores_full.csv")
-games.columns = games.columns.str.strip().str.replace(" ", "_")
-games["Game_Date"] = pd.to_datetime(games["Game_Date"])
-
-print("✅ Game file columns:", games.columns.tolist())
-
-# === Map full team names to 3-letter codes ===
-TEAM_NAME_MAP = {
-    "Athletics": "OAK", "Atlanta Braves": "ATL", "Baltimore Orioles": "BAL", "Boston Red Sox": "BOS",
-    "Chicago Cubs": "CHC", "Chicago White Sox": "CHW", "Cincinnati Reds": "CIN", "Cleveland Guardians": "CLE",
-    "Colorado Rockies": "COL", "Detroit Tigers": "DET", "Houston Astros": "HOU", "Kansas City Royals": "KCR",
-    "Los Angeles Angels": "LAA", "Los Angeles Dodgers": "LAD", "Miami Marlins": "MIA", "Milwaukee Brewers": "MIL",
-    "Minnesota Twins": "MIN", "New York Mets": "NYM", "New York Yankees": "NYY", "Oakland Athletics": "OAK",
-    "Philadelphia Phillies": "PHI", "Pittsburgh Pirates": "PIT", "San Diego Padres": "SDP", "San Francisco Giants": "SFG",
-    "Seattle Mariners": "SEA", "St. Louis Cardinals": "STL", "Tampa Bay Rays": "TBR", "Texas Rangers": "TEX",
-    "Toronto Blue Jays": "TOR", "Washington Nationals": "WSN"
+from features import load_games, load_team_stats, team_stat_features, rolling_form, FORM_COLUMNS
+from profiling import profiled
+
+def load_training_data(rolling=False, ratings=False, starters=False):
+    """Build the game-level feature matrix, target and game dates from the boxscore + FanGraphs files.
+
+    ``rolling`` adds every features.rolling_form column (multi-window, venue-split and EWM
+    scored/allowed form) on top of the production 22-feature set; ``ratings`` adds the
+    pre-game opponent-adjusted ratings from ratings.py; ``starters`` adds both starting
+    pitchers' pre-game lines from the pitcher log (pitchers.py).
+    """
+    # === Load & Normalize Game Data (team IDs come from the shared registry) ===
+    games = load_games("data/mlb_boxscores_full.csv")
+
+    print("✅ Game file columns:", games.columns.tolist())
+
+    # === Calculate Runs_1_5 for form tracking ===
+    # (min_count=5: games without five scored innings stay NaN and never feed the form)
+    games["Runs_1_5_Away"] = games[[f"Away_{i}th" for i in range(1, 6)]].apply(pd.to_numeric, errors="coerce").sum(axis=1, min_count=5)
+    games["Runs_1_5_Home"] = games[[f"Home_{i}th" for i in range(1, 6)]].apply(pd.to_numeric, errors="coerce").sum(axis=1, min_count=5)
+
+    # Pre-game rolling form in one pass; Last7 is the 7-game scored mean the saved model uses
+    form = rolling_form(
+        games["Game_Date"], games["Home_Team_ID"], games["Away_Team_ID"], games["Runs_1_5_Home"], games["Runs_1_5_Away"]
+    )
+    games["Home_Last7_Runs_1_5"] = form["Home_Form_Scored_L7"]
+    games["Away_Last7_Runs_1_5"] = form["Away_Form_Scored_L7"]
+    form_cols = list(form.columns) if rolling else []
+    games = pd.concat([games, form[form_cols]], axis=1)
+
+    rating_cols = []
+    if ratings:
+        from ratings import pregame_ratings, RATINGS_STATE_FILE
+        team_ratings = pregame_ratings(
+            games["Game_Date"], games["Home_Team_ID"], games["Away_Team_ID"], games["Runs_1_5_Home"], games["Runs_1_5_Away"],
+            state_file=RATINGS_STATE_FILE,
+        )
+        rating_cols = list(team_ratings.columns)
+        games = pd.concat([games, team_ratings], axis=1)
+
+    starter_cols = []
+    if starters:
+        from pitchers import PitcherLog, starter_features
+        starter_lines = starter_features(PitcherLog.load(), games["Game_Date"], games["Home_SP_ID"], games["Away_SP_ID"])
+        starter_cols = list(starter_lines.columns)
+        games = pd.concat([games, starter_lines], axis=1)
+
+    # === Filter games with full inning data
+    innings_cols = [col for col in games.columns if any(s in col for s in ["1th", "2th", "3th", "4th", "5th"])]
+    for col in innings_cols:
+        games[col] = pd.to_numeric(games[col], errors="coerce")
+
+    games_clean = games[games[innings_cols].notna().all(axis=1)].reset_index(drop=True)
+    games_clean["Runs_1_5"] = games_clean[innings_cols].sum(axis=1)
+    games_clean["Over_4_5"] = (games_clean["Runs_1_5"] > 4.5).astype(int)
+
+    # === Team Stats, gathered by team ID
+    team_stats = load_team_stats("downloads/team_standard.csv", "downloads/team_advanced.csv")
+    stat_features = team_stat_features(games_clean["Home_Team_ID"], games_clean["Away_Team_ID"], team_stats)
+    games_enriched = pd.concat([games_clean, stat_features], axis=1)
+
+    # === Sanity Check
+    print("\n🧪 Sample merged features:")
+    print(games_enriched[[col for col in games_enriched.columns if "wRC+" in col or "OBP" in col]].head())
+
+    # === Select Features & Target
+    numeric_cols = list(stat_features.columns) + FORM_COLUMNS + form_cols + rating_cols + starter_cols
+
+    features = games_enriched[numeric_cols].fillna(0)
+    target = games_enriched["Over_4_5"]
+    return features, target, games_enriched["Game_Date"]
+
+def train_default(features, target, dates):
+    import joblib
+    from sklearn.model_selection import train_test_split
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import classification_report
+    from sklearn.preprocessing import StandardScaler
+
+    # === Show Distribution
+    print("\n📊 Class distribution:")
+    print(target.value_counts())
+
+    print(f"🔍 Nonzero feature rows: {(features != 0).any(axis=1).sum()} / {features.shape[0]}")
+
+    # === Train/Test Split
+    X_train, X_test, y_train, y_test = train_test_split(features, target, test_size=0.2, random_state=42)
+
+    # === Scale
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    # === Train Model
+    model = RandomForestClassifier(n_estimators=100, class_weight="balanced", random_state=42, n_jobs=-1)
+    model.fit(X_train_scaled, y_train)
+
+    # === Evaluate
+    y_pred = model.predict(X_test_scaled)
+    print("\n📊 Classification Report:")
+    print(classification_report(y_test, y_pred, zero_division=0))
+
+    # === Feature Importance
+    importances = pd.Series(model.feature_importances_, index=features.columns)
+    print("\n🔥 Top 10 Features:")
+    print(importances.sort_values(ascending=False).head(10))
+
+    # === Save model where predict / backfill load it (and the pipeline pushes it); each file is
+    # replaced atomically, so a predict running meanwhile never unpickles a partial file
+    from predict_over_4_5 import MODEL_FILE, SCALER_FILE
+    for artifact, path in [(model, MODEL_FILE), (scaler, SCALER_FILE)]:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(artifact, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+    print(f"💾 Model + scaler saved to {MODEL_FILE}, {SCALER_FILE}")
+
+    # === Training snapshot for the drift monitor (drift.py), saved with the model
+    from drift import save_snapshot, DRIFT_SNAPSHOT_FILE
+    save_snapshot(features, dates, DRIFT_SNAPSHOT_FILE)
+    print(f"📡 Drift snapshot saved to {DRIFT_SNAPSHOT_FILE}")
+
+# === Sweep mode ===
+
+# Estimators are named, not imported: sklearn only loads once a model is actually built
+MODEL_FAMILIES = {
+    "random_forest": ("sklearn.ensemble.RandomForestClassifier", {"class_weight": "balanced", "random_state": 42, "n_jobs": 1}),
+    "extra_trees": ("sklearn.ensemble.ExtraTreesClassifier", {"class_weight": "balanced", "random_state": 42, "n_jobs": 1}),
+    "hist_gradient_boosting": ("sklearn.ensemble.HistGradientBoostingClassifier", {"random_state": 42}),
+    "logistic_regression": ("sklearn.linear_model.LogisticRegression", {"class_weight": "balanced", "max_iter": 2000}),
+}
+
+# Feature subsets are lists of substrings matched against column names; None keeps every column
+DEFAULT_SWEEP = {
+    "feature_sets": {
+        "all": None,
+        "rates_and_form": ["BB%", "K%", "ISO", "wRC+", "OBP", "SLG", "AVG", "OPS", "Last7"],
+        "rates_and_rolling_form": ["BB%", "K%", "ISO", "wRC+", "OBP", "SLG", "AVG", "OPS", "_Form_"],
+        "rates_form_and_ratings": ["BB%", "K%", "ISO", "wRC+", "OBP", "SLG", "AVG", "OPS", "Last7", "_Rating", "_Adj_Runs"],
+        "rates_form_and_starters": ["BB%", "K%", "ISO", "wRC+", "OBP", "SLG", "AVG", "OPS", "Last7", "_SP_"],
+    },
+    "models": {
+        "random_forest": {
+            "n_estimators": [100, 300],
+            "max_depth": [None, 6, 10],
+            "min_samples_leaf": [1, 5, 20],
+            "max_features": ["sqrt", 0.5],
+        },
+        "extra_trees": {
+            "n_estimators": [300],
+            "max_depth": [None, 8],
+            "min_samples_leaf": [5, 20],
+        },
+        "hist_gradient_boosting": {
+            "learning_rate": [0.03, 0.1],
+            "max_depth": [3, None],
+            "max_iter": [100, 300],
+        },
+        "logistic_regression": {
+            "C": [0.01, 0.1, 1.0],
+        },
+    },
 }
 
-games["Home_Team"] = games["Home_Team"].map(TEAM_NAME_MAP)
-games["Away_Team"] = games["Away_Team"].map(TEAM_NAME_MAP)
-
-# === Calculate Runs_1_5 for form tracking ===
-games["Runs_1_5_Away"] = games[[f"Away_{i}th" for i in range(1, 6)]].apply(pd.to_numeric, errors="coerce").sum(axis=1)
-games["Runs_1_5_Home"] = games[[f"Home_{i}th" for i in range(1, 6)]].apply(pd.to_numeric, errors="coerce").sum(axis=1)
-
-# Build long-form game log
-long_home = games[["Game_Date", "Home_Team", "Runs_1_5_Home"]].rename(columns={
-    "Home_Team": "Team", "Runs_1_5_Home": "Runs_1_5"
-})
-long_away = games[["Game_Date", "Away_Team", "Runs_1_5_Away"]].rename(columns={
-    "Away_Team": "Team", "Runs_1_5_Away": "Runs_1_5"
-})
-long_games = pd.concat([long_home, long_away]).dropna().sort_values(["Team", "Game_Date"])
-
-# Rolling average (last 7 games)
-long_games["Avg_Runs_1_5_Last7"] = (
-    long_games
-    .groupby("Team")["Runs_1_5"]
-    .transform(lambda x: x.shift().rolling(7, min_periods=1).mean())
-)
-
-# Merge back to main games file
-games = games.merge(
-    long_games[["Game_Date", "Team", "Avg_Runs_1_5_Last7"]],
-    left_on=["Game_Date", "Home_Team"],
-    right_on=["Game_Date", "Team"],
-    how="left"
-).rename(columns={"Avg_Runs_1_5_Last7": "Home_Last7_Runs_1_5"}).drop(columns=["Team"])
-
-games = games.merge(
-    long_games[["Game_Date", "Team", "Avg_Runs_1_5_Last7"]],
-    left_on=["Game_Date", "Away_Team"],
-    right_on=["Game_Date", "Team"],
-    how="left"
-).rename(columns={"Avg_Runs_1_5_Last7": "Away_Last7_Runs_1_5"}).drop(columns=["Team"])
-
-# === Load Team Stats ===
-standard = pd.read_csv("downloads/team_standard.csv")
-advanced = pd.read_csv("downloads/team_advanced.csv")
-team_stats = pd.merge(standard, advanced, on="Tm", suffixes=("_std", "_adv")).rename(columns={"Tm": "Team"})
-
-# === Filter games with full inning data
-innings_cols = [col for col in games.columns if any(s in col for s in ["1th", "2th", "3th", "4th", "5th"])]
-for col in innings_cols:
-    games[col] = pd.to_numeric(games[col], errors="coerce")
-
-games_clean = games[games[innings_cols].notna().all(axis=1)].copy()
-games_clean["Runs_1_5"] = games_clean[innings_cols].sum(axis=1)
-games_clean["Over_4_5"] = (games_clean["Runs_1_5"] > 4.5).astype(int)
-
-# === Merge Team Stats
-home_merged = games_clean.merge(team_stats, left_on="Home_Team", right_on="Team", how="left").add_prefix("home_")
-away_merged = games_clean.merge(team_stats, left_on="Away_Team", right_on="Team", how="left").add_prefix("away_")
-
-games_enriched = pd.concat([
-    games_clean.reset_index(drop=True),
-    home_merged.drop(columns=["home_Home_Team"], errors="ignore").reset_index(drop=True),
-    away_merged.drop(columns=["away_Away_Team"], errors="ignore").reset_index(drop=True)
-], axis=1)
-
-# === Sanity Check
-print("\n🧪 Sample merged features:")
-print(games_enriched[[col for col in games_enriched.columns if "wRC+" in col or "OBP" in col]].head())
-
-# === Select Features & Target
-numeric_cols = [col for col in games_enriched.columns if any(stat in col for stat in [
-    "BB%", "K%", "ISO", "wRC+", "OBP", "SLG", "RBI", "AVG", "OPS"
-])]
-numeric_cols += ["Home_Last7_Runs_1_5", "Away_Last7_Runs_1_5"]
-
-features = games_enriched[numeric_cols].fillna(0)
-target = games_enriched["Over_4_5"]
-
-# === Show Distribution
-print("\n📊 Class distribution:")
-print(target.value_counts())
-
-print(f"🔍 Nonzero feature rows: {(features != 0).any(axis=1).sum()} / {features.shape[0]}")
-
-# === Train/Test Split
-X_train, X_test, y_train, y_test = train_test_split(features, target, test_size=0.2, random_state=42)
-
-# === Scale
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
-
-# === Train Model
-model = RandomForestClassifier(n_estimators=100, class_weight="balanced", random_state=42)
-model.fit(X_train_scaled, y_train)
-
-# === Evaluate
-y_pred = model.predict(X_test_scaled)
-print("\n📊 Classification Report:")
-print(classification_report(y_test, y_pred, zero_division=0))
-
-# === Feature Importance
-importances = pd.Series(model.feature_importances_, index=features.columns)
-print("\n🔥 Top 10 Features:")
-print(importances.sort_values(ascending=False).head(10))
-
-# === Save model
-joblib.dump(model, "rf_model_over_4_5.joblib")
-joblib.dump(scaler, "scaler_over_4_5.joblib")
-print("💾 Model + scaler saved.")
+def expand_sweep(sweep, columns):
+    """Cross every model family's grid with every feature subset -> list of configs."""
+    from sklearn.model_selection import ParameterGrid
+
+    subsets = {}
+    for name, patterns in sweep.get("feature_sets", {"all": None}).items():
+        if patterns is None:
+            subsets[name] = list(range(len(columns)))
+        else:
+            subsets[name] = [i for i, col in enumerate(columns) if any(p in col for p in patterns)]
+
+    configs = []
+    for family, grid in sweep["models"].items():
+        for params in ParameterGrid(grid):
+            for subset_name, cols in subsets.items():
+                if cols:
+                    configs.append({
+                        "config_id": len(configs), "family": family, "params": params,
+                        "feature_set": subset_name, "columns": cols,
+                    })
+    return configs
+
+def build_estimator(family, params):
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    path, defaults = MODEL_FAMILIES[family]
+    module, name = path.rsplit(".", 1)
+    cls = getattr(importlib.import_module(module), name)
+    return make_pipeline(StandardScaler(), cls(**{**defaults, **params}))
+
+def evaluate_config(X_path, y_path, config, folds):
+    """Fit one config on every time-ordered fold. X/y are opened memory-mapped, so workers share one copy."""
+    import joblib
+    from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
+
+    X = joblib.load(X_path, mmap_mode="r")
+    y = joblib.load(y_path, mmap_mode="r")
+    cols = config["columns"]
+
+    start = time.perf_counter()
+    losses, accs, aucs = [], [], []
+    for train_idx, test_idx in folds:
+        model = build_estimator(config["family"], config["params"])
+        model.fit(X[np.ix_(train_idx, cols)], y[train_idx])
+        probs = model.predict_proba(X[np.ix_(test_idx, cols)])[:, 1]
+        losses.append(log_loss(y[test_idx], probs, labels=[0, 1]))
+        accs.append(accuracy_score(y[test_idx], probs > 0.5))
+        if len(np.unique(y[test_idx])) > 1:
+            aucs.append(roc_auc_score(y[test_idx], probs))
+
+    return {
+        "config_id": config["config_id"],
+        "family": config["family"],
+        "feature_set": config["feature_set"],
+        "params": json.dumps(config["params"], sort_keys=True),
+        "log_loss": float(np.mean(losses)),
+        "accuracy": float(np.mean(accs)),
+        "roc_auc": float(np.mean(aucs)) if aucs else np.nan,
+        "fit_seconds": round(time.perf_counter() - start, 2),
+    }
+
+def run_sweep(features, target, dates, sweep=DEFAULT_SWEEP, n_splits=5, n_jobs=-1, out_dir="models"):
+    """Evaluate every config in parallel with forward-chaining folds, write a ranked
+    leaderboard and refit the best config on all games."""
+    import joblib
+    from joblib import Parallel, delayed
+    from sklearn.model_selection import TimeSeriesSplit
+
+    order = np.argsort(dates.values, kind="stable")
+    X = features.to_numpy(dtype=np.float64)[order]
+    y = target.to_numpy(dtype=np.int64)[order]
+    folds = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+    configs = expand_sweep(sweep, list(features.columns))
+    print(f"🧪 Sweeping {len(configs)} configs x {n_splits} time-ordered folds on {X.shape[0]} games, {X.shape[1]} features")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        X_path = os.path.join(tmp, "X.joblib")
+        y_path = os.path.join(tmp, "y.joblib")
+        joblib.dump(X, X_path)
+        joblib.dump(y, y_path)
+
+        start = time.perf_counter()
+        results = Parallel(n_jobs=n_jobs, verbose=5)(
+            delayed(evaluate_config)(X_path, y_path, config, folds) for config in configs
+        )
+        print(f"⏱️ Sweep finished in {time.perf_counter() - start:.1f}s")
+
+    leaderboard = pd.DataFrame(results).sort_values(["log_loss", "roc_auc"], ascending=[True, False]).reset_index(drop=True)
+    leaderboard.index += 1
+    os.makedirs(out_dir, exist_ok=True)
+    leaderboard_path = os.path.join(out_dir, "sweep_leaderboard.csv")
+    leaderboard.to_csv(leaderboard_path, index_label="rank")
+    print("\n🏆 Top 10 configs:")
+    print(leaderboard.head(10).to_string())
+    print(f"📄 Leaderboard saved to {leaderboard_path}")
+
+    best = leaderboard.iloc[0]
+    best_config = configs[int(best["config_id"])]
+    pipeline = build_estimator(best_config["family"], best_config["params"])
+    pipeline.fit(X[:, best_config["columns"]], y)
+    artifact = {
+        "model": pipeline,
+        "family": best_config["family"],
+        "params": best_config["params"],
+        "features": [features.columns[i] for i in best_config["columns"]],
+        "cv_log_loss": best["log_loss"],
+    }
+    artifact_path = os.path.join(out_dir, "sweep_best_over_4_5.joblib")
+    joblib.dump(artifact, artifact_path)
+    print(f"💾 Best config ({best['family']}, {best['feature_set']}) saved to {artifact_path}")
+    return leaderboard
+
+@profiled
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the Over 4.5 model.")
+    parser.add_argument("--sweep", action="store_true", help="run the parallel hyperparameter / model-family sweep")
+    parser.add_argument("--grid", help="JSON file with 'models' (family -> param grid) and optional 'feature_sets'")
+    parser.add_argument("--splits", type=int, default=5, help="time-ordered validation folds for --sweep")
+    parser.add_argument("--jobs", type=int, default=-1, help="worker processes for --sweep (-1 = every core)")
+    parser.add_argument("--rolling", action="store_true", help="add the multi-window rolling form features (always on for --sweep)")
+    parser.add_argument("--ratings", action="store_true", help="add the opponent-adjusted team ratings (always on for --sweep)")
+    parser.add_argument("--starters", action="store_true", help="add the starting pitchers' rolling lines (always on for --sweep)")
+    parser.add_argument("--if-needed", action="store_true", help="only retrain when drift.py reports drift or enough new labels")
+    args = parser.parse_args(argv)
+
+    if args.if_needed:
+        from drift import retrain_decision
+        retrain, reason = retrain_decision()
+        if not retrain:
+            print(f"⏭️ Retrain skipped: {reason}")
+            return
+        print(f"🔁 Retraining: {reason}")
+
+    features, target, dates = load_training_data(
+        rolling=args.rolling or args.sweep, ratings=args.ratings or args.sweep, starters=args.starters or args.sweep
+    )
+    if args.sweep:
+        sweep = DEFAULT_SWEEP
+        if args.grid:
+            with open(args.grid) as f:
+                sweep = json.load(f)
+        run_sweep(features, target, dates, sweep, n_splits=args.splits, n_jobs=args.jobs)
+    else:
+        train_default(features, target, dates)
+
+if __name__ == "__main__":
+    main()